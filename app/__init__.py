@@ -3,40 +3,98 @@ from flask_sqlalchemy import SQLAlchemy
 from dotenv import load_dotenv
 import os
 
-# Load environment variables
+# Load environment variables (the only load_dotenv call; every app module imports this package first)
 load_dotenv()
 
+from app.utils.db_routing import RoutingSession
+from app.utils.startup import StartupProfiler
+
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 def create_app(config_name='default'):
     """
     Application factory pattern
+    
+    Each phase is timed; see app.extensions['startup_profile'].
     """
+    profiler = StartupProfiler()
     app = Flask(__name__)
     
     # Import and apply configuration
-    from app.config.config import config
-    app.config.from_object(config[config_name])
+    with profiler.phase('config'):
+        from app.config.config import config
+        app.config.from_object(config[config_name])
     
     # Initialize extensions with app
-    db.init_app(app)
+    with profiler.phase('database'):
+        from app.utils.db_profile import init_engine_profile, register_sqlite_pragmas
+        init_engine_profile(app)
+        db.init_app(app)
+        with app.app_context():
+            register_sqlite_pragmas(app, db.engines.values())
+    
+        from app.utils.db_routing import db_router
+        db_router.init_app(app)
+    
+    with profiler.phase('policies'):
+        from app.utils.password_utils import init_password_policy
+        init_password_policy(app)
+    
+        from app.utils.encryption import init_kdf_policy
+        init_kdf_policy(app)
+    
+    with profiler.phase('extensions'):
+        from app.utils.hashing_executor import hashing_executor
+        hashing_executor.init_app(app)
+    
+        from app.utils.throttle import login_throttle
+        login_throttle.init_app(app)
+    
+        from app.utils.admission import admission_controller
+        admission_controller.init_app(app)
+    
+        from app.utils.key_cache import key_cache
+        key_cache.init_app(app)
+    
+        from app.utils.batch_decrypt import batch_decryptor
+        batch_decryptor.init_app(app)
+    
+        from app.utils.user_cache import user_cache
+        user_cache.init_app(app)
+    
+        from app.services.rekey_service import rekey_scheduler
+        rekey_scheduler.init_app(app)
     
     # Import models to ensure they are registered with SQLAlchemy
-    from app.models.user import User
-    from app.models.service import Service
+    with profiler.phase('models'):
+        from app.models.user import User
+        from app.models.service import Service
+        from app.models.rekey_job import RekeyJob
+        from app.models.archived_service import ArchivedService
     
     # Register blueprints
-    from app.views.auth import auth_bp
-    from app.views.dashboard import dashboard_bp
-    from app.views.services import services_bp
+    with profiler.phase('blueprints'):
+        from app.views.auth import auth_bp
+        from app.views.dashboard import dashboard_bp
+        from app.views.services import services_bp
+        from app.views.system import system_bp
+    
+        app.register_blueprint(auth_bp)
+        app.register_blueprint(dashboard_bp)
+        app.register_blueprint(services_bp)
+        app.register_blueprint(system_bp)
     
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(dashboard_bp)
-    app.register_blueprint(services_bp)
+    # Register CLI commands
+    with profiler.phase('cli'):
+        from app.cli import register_commands
+        register_commands(app)
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # Create tables, columns and indexes only when the schema version changed (SCHEMA_CHECK)
+    with profiler.phase('schema'):
+        from app.utils.schema import ensure_schema
+        with app.app_context():
+            app.extensions['schema_status'] = ensure_schema(app.config.get('SCHEMA_CHECK', 'auto'))
     
-    return app 
\ No newline at end of file
+    profiler.finish(app)
+    return app
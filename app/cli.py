@@ -0,0 +1,282 @@
+"""
+Flask CLI commands
+"""
+import json
+import click
+from flask.cli import AppGroup
+
+users_cli = AppGroup('users', help='User management commands')
+vault_cli = AppGroup('vault', help='Vault encryption commands')
+replica_cli = AppGroup('replica', help='Read replica commands')
+services_cli = AppGroup('services', help='Service maintenance commands')
+schema_cli = AppGroup('schema', help='Database schema commands')
+
+
+@users_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'jsonl']),
+              help='Input format, guessed from the file extension by default')
+@click.option('--batch-size', default=1000, show_default=True, help='Users per transaction')
+@click.option('--workers', type=int, help='Hashing processes (default: CPU count)')
+@click.option('--errors', 'errors_path', type=click.Path(dir_okay=False),
+              help='Write per-row errors as JSONL to this file')
+def import_users(path, file_format, batch_size, workers, errors_path):
+    """Bulk-create users from a CSV or JSONL file (username, email, password)"""
+    from app.services.provisioning_service import ProvisioningService
+
+    report = ProvisioningService.import_users(
+        ProvisioningService.read_users(path, file_format),
+        batch_size=batch_size,
+        workers=workers,
+    )
+
+    if errors_path:
+        with open(errors_path, 'w', encoding='utf-8') as fh:
+            for error in report['errors']:
+                fh.write(json.dumps(error, ensure_ascii=False) + '\n')
+    else:
+        for error in report['errors']:
+            click.echo(f"line {error['line']}: {error['username']}: {error['error']}", err=True)
+
+    click.echo(f"Imported {report['imported']} users, {report['failed']} failed")
+
+
+@users_cli.command('calibrate-bcrypt')
+@click.option('--target-ms', type=float, help='Latency budget per hash (default: BCRYPT_TARGET_MS)')
+@click.option('--min-rounds', type=int, help='Security floor (default: BCRYPT_MIN_ROUNDS)')
+@click.option('--max-rounds', type=int, help='Upper bound (default: BCRYPT_MAX_ROUNDS)')
+@click.option('--env-file', type=click.Path(dir_okay=False), help='Write BCRYPT_ROUNDS into this .env file')
+def calibrate_bcrypt(target_ms, min_rounds, max_rounds, env_file):
+    """Measure the bcrypt cost for this machine once, to pin it as BCRYPT_ROUNDS for every worker"""
+    import os
+    from flask import current_app
+    from app.utils.password_utils import calibrate_bcrypt_rounds
+
+    rounds = calibrate_bcrypt_rounds(
+        target_ms=target_ms or current_app.config.get('BCRYPT_TARGET_MS', 150),
+        min_rounds=min_rounds or current_app.config.get('BCRYPT_MIN_ROUNDS', 10),
+        max_rounds=max_rounds or current_app.config.get('BCRYPT_MAX_ROUNDS', 16),
+    )
+    line = f"BCRYPT_ROUNDS={rounds}"
+    if not env_file:
+        click.echo(line)
+        return
+    lines = []
+    if os.path.exists(env_file):
+        with open(env_file, encoding='utf-8') as fh:
+            lines = [existing for existing in fh.read().splitlines() if not existing.startswith('BCRYPT_ROUNDS=')]
+    lines.append(line)
+    with open(env_file, 'w', encoding='utf-8') as fh:
+        fh.write('\n'.join(lines) + '\n')
+    click.echo(f"Wrote {line} to {env_file}")
+
+
+@users_cli.command('reconcile-counters')
+@click.option('--batch-size', default=1000, show_default=True, help='Users per transaction')
+def reconcile_counters(batch_size):
+    """Recount total/active services of every user and fix drifted counters"""
+    from app.services.counter_service import CounterService
+
+    fixed = CounterService.reconcile(batch_size=batch_size)
+    click.echo(f"Corrected service counters of {fixed} users")
+
+
+@vault_cli.command('migrate')
+@click.option('--username', help='Only migrate this user')
+@click.option('--batch-size', default=100, show_default=True, help='Users loaded per query')
+def migrate_vault(username, batch_size):
+    """Convert services in older formats to per-user vault records"""
+    from app.models.user import User
+    from app.services.vault_service import VaultService
+
+    if username:
+        user = User.query.filter_by(username=username).first()
+        if not user:
+            raise click.ClickException(f"User {username} not found")
+        result = VaultService.migrate_user(user)
+        click.echo(f"Migrated {result['migrated']} services, {result['failed']} failed")
+    else:
+        totals = VaultService.migrate_all(batch_size=batch_size)
+        click.echo(f"Migrated {totals['migrated']} services for {totals['users']} users, "
+                   f"{totals['failed']} failed")
+
+
+@vault_cli.command('rekey')
+@click.option('--username', help='Only re-key this user')
+@click.option('--batch-size', default=500, show_default=True, help='Services per transaction')
+@click.option('--workers', default=1, show_default=True, help='Users re-keyed in parallel')
+@click.option('--dry-run', is_flag=True, help='Only report what would change')
+@click.option('--abandon', is_flag=True, help='Give up services readable with neither secret and forget '
+                                              'the previous secret (otherwise after REKEY_MAX_ATTEMPTS runs)')
+def rekey_vault(username, batch_size, workers, dry_run, abandon):
+    """Re-encrypt services of users whose master secret changed (resumable)"""
+    from app.models.user import User
+    from app.services.rekey_service import RekeyService
+
+    def progress(user_id, done, total):
+        click.echo(f"user {user_id}: {done}/{total} services")
+
+    if username:
+        user = User.query.filter_by(username=username).first()
+        if not user:
+            raise click.ClickException(f"User {username} not found")
+        results = [RekeyService.rekey_user(user.id, batch_size, dry_run, progress, abandon)]
+    else:
+        results = RekeyService.rekey_all(workers, batch_size, dry_run, progress, abandon)["results"]
+
+    for result in results:
+        line = (f"user {result['user_id']}: {result['status']}, re-keyed {result['processed']}, "
+                f"skipped {result['skipped']}, failed {result['failed']}")
+        if result.get('error'):
+            line += f" ({result['error']})"
+        if result.get('failed_ids'):
+            line += f"; unreadable services {result['failed_ids']}"
+        click.echo(line)
+    click.echo(f"{len(results)} users{' (dry run, nothing written)' if dry_run else ''}")
+
+
+@vault_cli.command('export')
+@click.argument('username')
+@click.option('--format', 'export_format', type=click.Choice(['ndjson', 'csv']), default='ndjson', show_default=True)
+@click.option('--output', '-o', type=click.Path(dir_okay=False, writable=True), default='-',
+              help='Output file, - for stdout')
+@click.option('--encrypt', is_flag=True, help='Prompt for a passphrase and encrypt the whole archive')
+@click.option('--batch-size', type=int, help='Services decrypted per batch (default: EXPORT_BATCH_SIZE)')
+def export_vault(username, export_format, output, encrypt, batch_size):
+    """Stream a user's services with decrypted passwords as NDJSON or CSV"""
+    from app.models.user import User
+    from app.services.export_service import ExportService
+
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        raise click.ClickException(f"User {username} not found")
+    passphrase = click.prompt('Passphrase', hide_input=True, confirmation_prompt=True, err=True) if encrypt else None
+
+    chunks = ExportService.stream_export(user.id, user.password_hash, export_format, passphrase, batch_size)
+    with click.open_file(output, 'wb') as fh:
+        for chunk in chunks:
+            fh.write(chunk)
+
+
+@vault_cli.command('decrypt-export')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--output', '-o', type=click.Path(dir_okay=False, writable=True), default='-',
+              help='Output file, - for stdout')
+def decrypt_export(path, output):
+    """Decrypt an archive written by `vault export --encrypt`"""
+    from cryptography.exceptions import InvalidTag
+    from app.utils.archive_crypto import decrypt_stream
+
+    passphrase = click.prompt('Passphrase', hide_input=True, err=True)
+    with open(path, 'rb') as source, click.open_file(output, 'wb') as fh:
+        try:
+            for chunk in decrypt_stream(source, passphrase):
+                fh.write(chunk)
+        except InvalidTag:
+            raise click.ClickException("Wrong passphrase or modified archive")
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+
+@services_cli.command('purge')
+@click.option('--days', type=int, help='Purge services soft deleted more than N days ago '
+                                       '(default: SERVICE_RETENTION_DAYS)')
+@click.option('--chunk-size', type=int, help='Services per transaction (default: SERVICE_PURGE_CHUNK_SIZE)')
+@click.option('--archive', type=click.Choice(['table', 'file', 'none']), default='table', show_default=True,
+              help='Where purged rows are kept')
+@click.option('--archive-path', type=click.Path(dir_okay=False), help='JSONL file for --archive file')
+@click.option('--pause', default=0.0, show_default=True, help='Seconds to wait between chunks')
+@click.option('--vacuum', is_flag=True, help='Run VACUUM afterwards (locks the database while it runs)')
+@click.option('--dry-run', is_flag=True, help='Only report what would be purged')
+def purge_services(days, chunk_size, archive, archive_path, pause, vacuum, dry_run):
+    """Archive and delete services that were soft deleted longer than the retention period"""
+    from flask import current_app
+    from app.services.retention_service import RetentionService
+
+    if archive == 'file' and not archive_path:
+        raise click.ClickException("--archive-path is required with --archive file")
+
+    def progress(purged, size):
+        click.echo(f"purged {purged} services, {size} bytes")
+
+    report = RetentionService.purge_deleted(
+        days=current_app.config.get('SERVICE_RETENTION_DAYS', 30) if days is None else days,
+        chunk_size=chunk_size or current_app.config.get('SERVICE_PURGE_CHUNK_SIZE', 500),
+        archive=archive,
+        archive_path=archive_path,
+        dry_run=dry_run,
+        pause=pause,
+        vacuum=vacuum,
+        progress=progress,
+    )
+    if dry_run:
+        click.echo(f"{report['purged']} services ({report['bytes']} bytes) deleted before {report['cutoff']} "
+                   f"would be purged")
+        return
+    line = (f"Purged {report['purged']} services ({report['bytes']} bytes) deleted before {report['cutoff']}, "
+            f"{report['archived']} archived")
+    if 'free_bytes' in report:
+        line += f"; {report['free_bytes']} bytes free for reuse in a {report['file_bytes']} byte database"
+    if 'vacuumed_bytes' in report:
+        line += f"; VACUUM shrank the file by {report['vacuumed_bytes']} bytes"
+    click.echo(line)
+
+
+@replica_cli.command('sync')
+@click.option('--interval', type=float, help='Keep syncing every N seconds instead of once')
+def sync_replica(interval):
+    """Copy the primary SQLite database to the replica bind (local stand-in for replication)"""
+    import time
+    from flask import current_app
+    from app.utils.replication import SQLiteReplicator
+
+    try:
+        replicator = SQLiteReplicator.from_app(current_app, interval or 1.0)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    if not interval:
+        click.echo(f"Replica synced in {replicator.sync() * 1000:.1f} ms")
+        return
+    click.echo(f"Syncing {replicator.primary_path} -> {replicator.replica_path} every {interval}s (Ctrl+C to stop)")
+    replicator.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        replicator.stop()
+
+
+@schema_cli.command('status')
+def schema_status():
+    """Show whether the database matches the declared schema"""
+    from app.utils.schema import schema_fingerprint, stored_schema_fingerprint
+
+    declared = schema_fingerprint()
+    stored = stored_schema_fingerprint()
+    click.echo(f"declared {declared[:12]}")
+    click.echo(f"database {stored[:12] if stored else '(none)'}")
+    click.echo("up to date" if stored == declared else "out of date, run `flask schema upgrade`")
+
+
+@schema_cli.command('upgrade')
+def upgrade_schema():
+    """Create missing tables, columns and indexes and record the schema version"""
+    from app.utils.schema import sync_schema
+
+    added = sync_schema()
+    click.echo(f"Schema synced{', added ' + ', '.join(added) if added else ''}")
+
+
+def register_commands(app) -> None:
+    """
+    Register CLI command groups on the app
+
+    Args:
+        app (Flask): Flask application
+    """
+    app.cli.add_command(users_cli)
+    app.cli.add_command(vault_cli)
+    app.cli.add_command(replica_cli)
+    app.cli.add_command(services_cli)
+    app.cli.add_command(schema_cli)
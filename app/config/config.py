@@ -1,14 +1,137 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+# .env is loaded once by the app package, which is always imported before this module
 
 class Config:
     """Base configuration class"""
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Startup schema check: auto (sync only when the schema version changed) | always | skip
+    SCHEMA_CHECK = os.getenv('SCHEMA_CHECK', 'auto')
+    # Log the create_app phase timings at INFO
+    STARTUP_PROFILE = os.getenv('STARTUP_PROFILE', 'false').lower() == 'true'
+    # Connection pool (ignored for in-memory SQLite, which uses a single static connection)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true',
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', '30')),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '3600')),
+    }
+
+    # SQLite PRAGMAs applied to every new connection (see app.utils.db_profile)
+    SQLITE_PRAGMAS_ENABLED = os.getenv('SQLITE_PRAGMAS_ENABLED', 'true').lower() == 'true'
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+    # Negative values are KiB: -65536 = 64 MiB page cache per connection
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '-65536'))
+    SQLITE_FOREIGN_KEYS = os.getenv('SQLITE_FOREIGN_KEYS', 'true').lower() == 'true'
+
+    # Read replica for read-only service methods; unset keeps everything on the primary
+    DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
+    SQLALCHEMY_BINDS = {'replica': DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    DB_REPLICA_BIND = 'replica'
+    # Keep a client's reads on the primary this long after it wrote (should exceed replica lag)
+    DB_REPLICA_STICKY_SECONDS = float(os.getenv('DB_REPLICA_STICKY_SECONDS', '5'))
+    
     PASSWORD_PEPPER = os.getenv('PASSWORD_PEPPER', 'dev_pepper_2025_abetdt_secret_key')
 
+    # Password hashing worker pool (inline | thread | process)
+    HASHING_EXECUTOR = os.getenv('HASHING_EXECUTOR', 'thread')
+    HASHING_WORKERS = int(os.getenv('HASHING_WORKERS', os.cpu_count() or 2))
+    HASHING_QUEUE_DEPTH = int(os.getenv('HASHING_QUEUE_DEPTH', '32'))
+    HASHING_TIMEOUT = float(os.getenv('HASHING_TIMEOUT', '5'))
+
+    # Admission control for crypto-heavy views (login, register, add/edit/view service)
+    ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'true').lower() == 'true'
+    ADMISSION_MAX_CONCURRENT = int(os.getenv('ADMISSION_MAX_CONCURRENT', os.cpu_count() or 2))
+    ADMISSION_MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', '16'))
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '2'))
+    ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '2'))
+    # /system/stats exposes internals: off by default and only served with the shared bearer token
+    SYSTEM_STATS_ENABLED = os.getenv('SYSTEM_STATS_ENABLED', 'false').lower() == 'true'
+    SYSTEM_STATS_TOKEN = os.getenv('SYSTEM_STATS_TOKEN')
+
+    # Opt-in cache of PBKDF2-derived service encryption keys
+    ENCRYPTION_KEY_CACHE_ENABLED = os.getenv('ENCRYPTION_KEY_CACHE_ENABLED', 'false').lower() == 'true'
+    ENCRYPTION_KEY_CACHE_TTL = int(os.getenv('ENCRYPTION_KEY_CACHE_TTL', '300'))
+    ENCRYPTION_KEY_CACHE_MAX_ENTRIES = int(os.getenv('ENCRYPTION_KEY_CACHE_MAX_ENTRIES', '1024'))
+
+    # Opt-in process-local cache of slim current-user records (no password hashes).
+    # Invalidation only reaches the process that changed the user: with several
+    # workers, a deactivated user keeps access on the others for up to USER_CACHE_TTL.
+    USER_CACHE_ENABLED = os.getenv('USER_CACHE_ENABLED', 'false').lower() == 'true'
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', '60'))
+    USER_CACHE_MAX_ENTRIES = int(os.getenv('USER_CACHE_MAX_ENTRIES', '10000'))
+
+    # Parallel decryption of legacy per-row PBKDF2 services (inline | thread | process)
+    # 'process' sidesteps the GIL but forks workers; opt in only where that is safe
+    DECRYPT_EXECUTOR = os.getenv('DECRYPT_EXECUTOR', 'thread')
+    DECRYPT_WORKERS = int(os.getenv('DECRYPT_WORKERS', os.cpu_count() or 2))
+    DECRYPT_PARALLEL_THRESHOLD = int(os.getenv('DECRYPT_PARALLEL_THRESHOLD', '4'))
+    # Seconds a request waits for one parallel batch before giving up on it
+    DECRYPT_TIMEOUT = float(os.getenv('DECRYPT_TIMEOUT', '30'))
+
+    # KDF for new service records; old records keep the parameters in their header
+    KDF_ALGORITHM = os.getenv('KDF_ALGORITHM', 'pbkdf2_sha256')
+    KDF_ITERATIONS = int(os.getenv('KDF_ITERATIONS', '100000'))
+
+    # Re-key after a login upgraded the password hash: background | inline | off (CLI only)
+    REKEY_MODE = os.getenv('REKEY_MODE', 'background')
+    REKEY_BATCH_SIZE = int(os.getenv('REKEY_BATCH_SIZE', '500'))
+    # Runs ending with unreadable services before those are given up and the previous secret is dropped
+    REKEY_MAX_ATTEMPTS = int(os.getenv('REKEY_MAX_ATTEMPTS', '3'))
+    
+    # Dashboard service listing page size (keyset pagination)
+    SERVICES_PAGE_SIZE = int(os.getenv('SERVICES_PAGE_SIZE', '20'))
+    SERVICES_PAGE_SIZE_MAX = int(os.getenv('SERVICES_PAGE_SIZE_MAX', '100'))
+
+    # Bulk delete/restore: IDs per request and per UPDATE statement
+    SERVICES_BULK_MAX = int(os.getenv('SERVICES_BULK_MAX', '1000'))
+    SERVICES_BULK_BATCH_SIZE = int(os.getenv('SERVICES_BULK_BATCH_SIZE', '500'))
+
+    # Retention of soft-deleted services (flask services purge)
+    SERVICE_RETENTION_DAYS = int(os.getenv('SERVICE_RETENTION_DAYS', '30'))
+    SERVICE_PURGE_CHUNK_SIZE = int(os.getenv('SERVICE_PURGE_CHUNK_SIZE', '500'))
+
+    # Vault export: services decrypted per batch, minimum length of an archive passphrase
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '500'))
+    EXPORT_MIN_PASSPHRASE_LENGTH = int(os.getenv('EXPORT_MIN_PASSPHRASE_LENGTH', '12'))
+    # Allow /services/export without a passphrase (plain NDJSON/CSV download)
+    EXPORT_ALLOW_CLEARTEXT = os.getenv('EXPORT_ALLOW_CLEARTEXT', 'false').lower() == 'true'
+    # KDF of encrypted archives (scrypt | pbkdf2_sha256 | pbkdf2_sha512), separate from KDF_*
+    EXPORT_KDF_ALGORITHM = os.getenv('EXPORT_KDF_ALGORITHM', 'scrypt')
+    EXPORT_SCRYPT_N = int(os.getenv('EXPORT_SCRYPT_N', str(2 ** 17)))
+    EXPORT_KDF_ITERATIONS = int(os.getenv('EXPORT_KDF_ITERATIONS', '600000'))
+    
+    # Failed-login throttling (store: memory | sqlite, shared across workers)
+    LOGIN_THROTTLE_ENABLED = os.getenv('LOGIN_THROTTLE_ENABLED', 'true').lower() == 'true'
+    LOGIN_THROTTLE_WINDOW = int(os.getenv('LOGIN_THROTTLE_WINDOW', '900'))
+    LOGIN_THROTTLE_USER_LIMIT = int(os.getenv('LOGIN_THROTTLE_USER_LIMIT', '5'))
+    LOGIN_THROTTLE_IP_LIMIT = int(os.getenv('LOGIN_THROTTLE_IP_LIMIT', '20'))
+    LOGIN_THROTTLE_BACKOFF_BASE = float(os.getenv('LOGIN_THROTTLE_BACKOFF_BASE', '1'))
+    LOGIN_THROTTLE_BACKOFF_MAX = float(os.getenv('LOGIN_THROTTLE_BACKOFF_MAX', '900'))
+    LOGIN_THROTTLE_MAX_KEYS = int(os.getenv('LOGIN_THROTTLE_MAX_KEYS', '100000'))
+    LOGIN_THROTTLE_STORE = os.getenv('LOGIN_THROTTLE_STORE', 'memory')
+    LOGIN_THROTTLE_SQLITE_PATH = os.getenv('LOGIN_THROTTLE_SQLITE_PATH')
+
+    # Hasher for new passwords (bcrypt | scrypt | pbkdf2_sha256); other formats migrate on login
+    PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'bcrypt')
+    SCRYPT_N = int(os.getenv('SCRYPT_N', str(2 ** 15)))
+    SCRYPT_R = int(os.getenv('SCRYPT_R', '8'))
+    SCRYPT_P = int(os.getenv('SCRYPT_P', '1'))
+    PBKDF2_HASHER_ITERATIONS = int(os.getenv('PBKDF2_HASHER_ITERATIONS', '600000'))
+
+    # bcrypt cost: pin BCRYPT_ROUNDS (see `flask users calibrate-bcrypt`). Calibrating in every
+    # worker at startup is opt-in: workers could pick different costs and rehash each other's hashes
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '0')) or None
+    BCRYPT_CALIBRATE = os.getenv('BCRYPT_CALIBRATE', 'false').lower() == 'true'
+    BCRYPT_TARGET_MS = float(os.getenv('BCRYPT_TARGET_MS', '150'))
+    BCRYPT_MIN_ROUNDS = int(os.getenv('BCRYPT_MIN_ROUNDS', '10'))
+    BCRYPT_MAX_ROUNDS = int(os.getenv('BCRYPT_MAX_ROUNDS', '16'))
+
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
@@ -25,7 +148,11 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_BINDS = {}
     WTF_CSRF_ENABLED = False
+    BCRYPT_ROUNDS = 4
+    REKEY_MODE = 'inline'
+    EXPORT_SCRYPT_N = 2 ** 14
 
 # Always use development config by default
 config = {
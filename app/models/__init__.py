@@ -1,5 +1,7 @@
 # Models package
 from .user import User
 from .service import Service
+from .rekey_job import RekeyJob
+from .archived_service import ArchivedService
 
-__all__ = ['User', 'Service'] 
\ No newline at end of file
+__all__ = ['User', 'Service', 'RekeyJob', 'ArchivedService'] 
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""
+Archive of purged soft-deleted services
+"""
+from datetime import datetime
+from typing import Any, Dict, List
+from app import db
+from app.models.service import Service
+
+class ArchivedService(db.Model):
+    """Soft-deleted service moved out of the services table by the retention job"""
+
+    __tablename__ = 'archived_services'
+
+    # Own key: SQLite reuses the rowid of a purged service, so the same
+    # services.id can be archived more than once
+    id = db.Column(db.Integer, primary_key=True)
+    # services.id at archive time; no foreign keys so the archive outlives users
+    service_id = db.Column(db.Integer, nullable=False, index=True)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    service_name = db.Column(db.String(100), nullable=False)
+    service_url = db.Column(db.String(255))
+    service_username = db.Column(db.String(100), nullable=False)
+    service_password_encrypted = db.Column(db.Text, nullable=False)
+    encryption_salt = db.Column(db.String(32), nullable=False)
+    wrapped_data_key = db.Column(db.LargeBinary)
+    password_record = db.Column(db.LargeBinary)
+    notes = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime)
+    deleted_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # Columns copied from services, in this order; service_id is services.id
+    COPIED_COLUMNS = (
+        'service_id', 'user_id', 'service_name', 'service_url', 'service_username',
+        'service_password_encrypted', 'encryption_salt', 'wrapped_data_key',
+        'password_record', 'notes', 'created_at', 'updated_at', 'deleted_at',
+    )
+
+    @classmethod
+    def source_columns(cls) -> List[Any]:
+        """Service columns to select for COPIED_COLUMNS, labelled with the archive names"""
+        return [(Service.id if name == 'service_id' else getattr(Service, name)).label(name)
+                for name in cls.COPIED_COLUMNS]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert ArchivedService object to dictionary (without encrypted columns)"""
+        return {
+            "id": self.id,
+            "service_id": self.service_id,
+            "user_id": self.user_id,
+            "service_name": self.service_name,
+            "service_url": self.service_url,
+            "service_username": self.service_username,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "deleted_at": self.deleted_at.isoformat() if self.deleted_at else None,
+            "archived_at": self.archived_at.isoformat() if self.archived_at else None
+        }
+
+    def __repr__(self) -> str:
+        return f"<ArchivedService {self.service_name}>"
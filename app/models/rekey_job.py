@@ -0,0 +1,50 @@
+"""
+Checkpoint of a user's re-key run
+"""
+from datetime import datetime
+from typing import Dict, Any
+from app import db
+
+class RekeyJob(db.Model):
+    """Progress of re-encrypting a user's services under a new master secret"""
+    
+    __tablename__ = 'rekey_jobs'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    # Highest service id already committed under the new secret
+    last_service_id = db.Column(db.Integer, default=0, nullable=False)
+    processed = db.Column(db.Integer, default=0, nullable=False)
+    skipped = db.Column(db.Integer, default=0, nullable=False)
+    failed = db.Column(db.Integer, default=0, nullable=False)
+    status = db.Column(db.String(20), default='pending', nullable=False)
+    # Runs that ended with unreadable rows, see REKEY_MAX_ATTEMPTS
+    attempts = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def reset(self) -> None:
+        """Start over for a new master secret"""
+        self.last_service_id = 0
+        self.processed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.attempts = 0
+        self.status = 'pending'
+        self.started_at = datetime.utcnow()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert RekeyJob object to dictionary"""
+        return {
+            "user_id": self.user_id,
+            "last_service_id": self.last_service_id,
+            "processed": self.processed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "status": self.status,
+            "attempts": self.attempts,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self) -> str:
+        return f"<RekeyJob user={self.user_id} {self.status}>"
@@ -2,9 +2,13 @@
 Service model for password management
 """
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, NamedTuple
+from sqlalchemy.orm import deferred, undefer_group
 from app import db
-from app.utils.encryption import EncryptionService
+from app.utils.batch_decrypt import DECRYPT_ERROR
+from app.utils.vault import (
+    VaultKey, StoredPassword, seal_password, decrypt_stored_password, is_current_format
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,26 +17,53 @@ class Service(db.Model):
     """Service model for storing encrypted passwords"""
     
     __tablename__ = 'services'
+    __table_args__ = (
+        # Active services of a user in listing order; is_active = 1 is rendered
+        # as a literal by SQLAlchemy, so SQLite can match the partial index
+        db.Index('ix_services_user_active', 'user_id', 'created_at', 'id',
+                 sqlite_where=db.text('is_active = 1'), postgresql_where=db.text('is_active')),
+        db.Index('ix_services_user_active_name', 'user_id', 'service_name', 'id',
+                 sqlite_where=db.text('is_active = 1'), postgresql_where=db.text('is_active')),
+        # Soft-deleted services by deletion time, for the retention job
+        db.Index('ix_services_deleted', 'deleted_at', 'id',
+                 sqlite_where=db.text('is_active = 0'), postgresql_where=db.text('NOT is_active')),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     service_name = db.Column(db.String(100), nullable=False)
     service_url = db.Column(db.String(255))
     service_username = db.Column(db.String(100), nullable=False)
-    service_password_encrypted = db.Column(db.Text, nullable=False)
-    encryption_salt = db.Column(db.String(32), nullable=False)
-    notes = db.Column(db.Text)
+    # Encrypted columns are deferred and load together on first access;
+    # queries that decrypt many rows use with_secrets() to load them up front.
+    # Legacy Fernet token and per-row salt; empty once the row uses password_record
+    service_password_encrypted = deferred(db.Column(db.Text, nullable=False), group='secret')
+    encryption_salt = deferred(db.Column(db.String(32), nullable=False), group='secret')
+    # Per-service data key wrapped with the user's vault key; NULL for legacy per-row PBKDF2 rows
+    wrapped_data_key = deferred(db.Column(db.LargeBinary), group='secret')
+    # Binary AES-GCM record (see app.utils.records)
+    password_record = deferred(db.Column(db.LargeBinary), group='secret')
+    notes = deferred(db.Column(db.Text))
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Set on soft delete, cleared on restore; updated_at also moves on re-key
+    deleted_at = db.Column(db.DateTime)
 
-    def to_dict(self, include_password: bool = False, master_password: str = None) -> Dict[str, Any]:
+    @staticmethod
+    def with_secrets():
+        """Loader option that loads the deferred encrypted columns in the main query"""
+        return undefer_group('secret')
+
+    def to_dict(self, include_password: bool = False, master_password: str = None,
+                vault_key: Optional[VaultKey] = None) -> Dict[str, Any]:
         """
         Convert Service object to dictionary
         
         Args:
             include_password (bool): Include decrypted password
             master_password (str): Master password for decryption (if needed)
+            vault_key (VaultKey, optional): Already derived vault key of the owner
             
         Returns:
             dict: Service data
@@ -52,11 +83,11 @@ class Service(db.Model):
         # Add decrypted password if requested and master password provided
         if include_password and master_password:
             try:
-                decrypted_password = self.get_service_password(master_password)
+                decrypted_password = self.get_service_password(master_password, vault_key=vault_key)
                 service_dict["service_password"] = decrypted_password
             except Exception as e:
                 service_dict["service_password"] = None
-                service_dict["password_error"] = "Could not decrypt password"
+                service_dict["password_error"] = DECRYPT_ERROR
                 logger.error(f"Error decrypting password for service {self.id}: {e}")
 
         return service_dict
@@ -72,13 +103,52 @@ class Service(db.Model):
             "created_at": self.created_at.isoformat() if self.created_at else None
         }
 
-    def set_service_password(self, password: str, master_password: str) -> None:
+    @property
+    def stored_password(self) -> StoredPassword:
+        """Encrypted password columns of this row"""
+        return StoredPassword(
+            self.service_password_encrypted, self.encryption_salt, self.wrapped_data_key, self.password_record
+        )
+
+    @staticmethod
+    def encrypt_password_columns(password: str, master_password: str,
+                                 vault_key: Optional[VaultKey] = None) -> Dict[str, Any]:
+        """
+        Encrypt a password and return the column values to store
+        
+        With a vault key the password gets a fresh data key wrapped under it;
+        without one the record carries its own PBKDF2 parameters.
+        
+        Args:
+            password (str): Plain text password to encrypt
+            master_password (str): Master password for encryption
+            vault_key (VaultKey, optional): Vault key of the owner
+            
+        Returns:
+            dict: Values for the encrypted password columns
+        """
+        stored = seal_password(password, master_password, vault_key)
+        return {
+            "service_password_encrypted": stored.ciphertext,
+            "encryption_salt": stored.salt,
+            "wrapped_data_key": stored.wrapped_key,
+            "password_record": stored.record,
+        }
+
+    def apply_columns(self, values: Dict[str, Any]) -> None:
+        """Set several column values at once"""
+        for name, value in values.items():
+            setattr(self, name, value)
+
+    def set_service_password(self, password: str, master_password: str,
+                             vault_key: Optional[VaultKey] = None) -> None:
         """
         Encrypt and set service password
         
         Args:
             password (str): Plain text password to encrypt
             master_password (str): Master password for encryption
+            vault_key (VaultKey, optional): Vault key of the owner (envelope encryption)
         """
         if not password:
             raise ValueError("Password cannot be empty")
@@ -87,20 +157,22 @@ class Service(db.Model):
             raise ValueError("Master password cannot be empty")
             
         try:
-            encryptor = EncryptionService(master_password)
-            self.service_password_encrypted = encryptor.encrypt(password)
-            self.encryption_salt = encryptor.get_salt()
+            self.apply_columns(self.encrypt_password_columns(password, master_password, vault_key))
             logger.debug(f"Password encrypted successfully for service {self.id}")
         except Exception as e:
             logger.error(f"Error encrypting password for service {self.id}: {e}")
             raise
 
-    def get_service_password(self, master_password: str) -> Optional[str]:
+    def get_service_password(self, master_password: str, vault_key: Optional[VaultKey] = None,
+                             upgrade: bool = False) -> Optional[str]:
         """
         Decrypt service password
         
         Args:
             master_password (str): Master password for decryption
+            vault_key (VaultKey, optional): Already derived vault key of the owner
+            upgrade (bool): Rewrite a row in an old format or under the previous
+                secret of a pending re-key (the caller commits)
             
         Returns:
             str: Decrypted password, or None if decryption fails
@@ -108,17 +180,137 @@ class Service(db.Model):
         if not master_password:
             raise ValueError("Master password cannot be empty")
             
-        if not self.service_password_encrypted or not self.encryption_salt:
+        stored = self.stored_password
+        if not (stored.ciphertext or stored.record):
             return None
             
         try:
-            encryptor = EncryptionService(master_password, salt=self.encryption_salt)
-            decrypted = encryptor.decrypt(self.service_password_encrypted)
-            logger.debug(f"Password decrypted successfully for service {self.id}")
-            return decrypted
+            decrypted = self._decrypt(stored, master_password, vault_key)
+            outdated = not is_current_format(stored)
         except Exception as e:
-            logger.error(f"Error decrypting password for service {self.id}: {e}")
+            # While a re-key is pending the row may still use the previous secret
+            user = self.user
+            if user is None or not user.rekey_pending or master_password != user.password_hash:
+                logger.error(f"Error decrypting password for service {self.id}: {e}")
+                return None
+            try:
+                decrypted = self._decrypt(stored, user.previous_password_hash, user.get_previous_vault_key())
+                outdated = True
+            except Exception as e:
+                logger.error(f"Error decrypting password for service {self.id}: {e}")
+                return None
+        logger.debug(f"Password decrypted successfully for service {self.id}")
+
+        if upgrade and outdated:
+            try:
+                vault_key = vault_key or self.user.get_vault_key(master_password)
+                self.apply_columns(self.encrypt_password_columns(decrypted, master_password, vault_key))
+                logger.debug(f"Service {self.id} rewritten in the current record format")
+            except Exception as e:
+                logger.warning(f"Service {self.id} could not be rewritten: {e}")
+        return decrypted
+
+    def _decrypt(self, stored: StoredPassword, master_password: str, vault_key: Optional[VaultKey]) -> str:
+        if stored.wrapped_key and vault_key is None:
+            vault_key = self.user.get_vault_key(master_password)
+        return decrypt_stored_password(stored, master_password, vault_key)
+
+    def reencrypt_password(self, old_master_password: str, new_master_password: str,
+                           old_vault_key: Optional[VaultKey] = None,
+                           new_vault_key: Optional[VaultKey] = None) -> Optional[Dict[str, Any]]:
+        """
+        Encrypt the stored password under a new master password
+        
+        Vault records only need their data key re-wrapped. Rows in an older
+        format are decrypted and, when new_vault_key is given, converted to
+        vault records. The row itself is not modified, so callers can apply the
+        results of several services all at once with apply_columns().
+        
+        Args:
+            old_master_password (str): Master password the row is encrypted with
+            new_master_password (str): Master password to encrypt with
+            old_vault_key (VaultKey, optional): Vault key derived from the old master password
+            new_vault_key (VaultKey, optional): Vault key derived from the new master password
+            
+        Returns:
+            dict: Column values to apply, or None if nothing can be decrypted
+        """
+        try:
+            if self.wrapped_data_key and self.password_record:
+                old_vault_key = old_vault_key or self.user.get_vault_key(old_master_password)
+                new_vault_key = new_vault_key or self.user.get_vault_key(new_master_password)
+                return {"wrapped_data_key": new_vault_key.wrap(old_vault_key.unwrap(self.wrapped_data_key))}
+        except Exception as e:
+            logger.warning(f"Service {self.id} could not be unwrapped, skipping re-encryption: {e}")
+            return None
+
+        password = self.get_service_password(old_master_password, old_vault_key)
+        if password is None:
+            logger.warning(f"Service {self.id} could not be decrypted, skipping re-encryption")
             return None
+        return self.encrypt_password_columns(password, new_master_password, new_vault_key)
 
     def __repr__(self) -> str:
-        return f'<Service {self.service_name} for user {self.user_id}>' 
\ No newline at end of file
+        return f'<Service {self.service_name} for user {self.user_id}>'
+
+
+class ServiceRow(NamedTuple):
+    """
+    Read-only projection of a Service for list views
+    
+    Built from a column projection, so it skips the encrypted columns, the
+    identity map and change tracking of full ORM objects. Notes are left out
+    as well; they can be long and are only shown on the detail page.
+    """
+    id: int
+    user_id: int
+    service_name: str
+    service_username: str
+    service_url: Optional[str]
+    is_active: bool
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def columns(cls) -> List[Any]:
+        """Service columns to select, in field order"""
+        return [getattr(Service, name) for name in cls._fields]
+
+    @classmethod
+    def select(cls):
+        """SELECT of the projected columns; add filters and run with db.session.execute"""
+        return db.select(*cls.columns())
+
+    @classmethod
+    def from_rows(cls, rows) -> List['ServiceRow']:
+        """Wrap result rows of select()"""
+        return [cls._make(row) for row in rows]
+
+    @classmethod
+    def from_service(cls, service: Service) -> 'ServiceRow':
+        """Project an already loaded Service, so list dicts keep the same keys"""
+        return cls._make(getattr(service, name) for name in cls._fields)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Same keys as Service.to_dict() without notes and password"""
+        return {
+            "id": self.id,
+            "service_name": self.service_name,
+            "service_url": self.service_url,
+            "service_username": self.service_username,
+            "is_active": self.is_active,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "user_id": self.user_id
+        }
+
+    def to_summary_dict(self) -> Dict[str, Any]:
+        """Same keys as Service.to_summary_dict()"""
+        return {
+            "id": self.id,
+            "service_name": self.service_name,
+            "service_url": self.service_url,
+            "service_username": self.service_username,
+            "is_active": self.is_active,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
@@ -2,9 +2,16 @@
 User model for authentication and user management
 """
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, NamedTuple
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session, object_session
 from app import db
-from app.utils.password_utils import hash_password, verify_password
+from app.utils.hashing_executor import hashing_executor, HashingBusyError
+from app.utils.password_utils import needs_rehash, extract_salt_from_hash
+from app.utils.key_cache import key_cache
+from app.utils.user_cache import user_cache
+from app.utils.vault import VaultKey
+from app.models.rekey_job import RekeyJob
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,64 +20,203 @@ class User(db.Model):
     """User model for authentication and user management"""
     
     __tablename__ = 'users'
+    __table_args__ = (
+        # Only users with a pending re-key, see RekeyService.pending_user_ids
+        db.Index('ix_users_rekey_pending', 'id',
+                 sqlite_where=db.text('previous_password_hash IS NOT NULL'),
+                 postgresql_where=db.text('previous_password_hash IS NOT NULL')),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(150), unique=True, nullable=False, index=True)
     email = db.Column(db.String(150), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
+    # Master secret the services were encrypted with before the last change,
+    # kept until the re-key pipeline has converted every service
+    previous_password_hash = db.Column(db.String(255))
+    # Salt of the key-encryption key that wraps the service data keys
+    vault_salt = db.Column(db.String(32))
+    # Counter cache of the user's services, see adjust_service_counters()
+    total_services = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    active_services = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     services = db.relationship('Service', backref='user', lazy=True, cascade='all, delete-orphan')
+    rekey_job = db.relationship('RekeyJob', uselist=False, cascade='all, delete-orphan')
 
     def set_password(self, password: str) -> None:
         """
         Set user password with hashing
         
+        Changing the password of an existing user starts a re-key of their
+        services (see begin_rekey). A re-key still pending from an earlier
+        change is completed first; rows readable with neither secret are
+        given up (see RekeyService.rekey_user). This commits the session.
+        
         Args:
             password (str): Plain text password
             
         Raises:
             ValueError: If password is empty
+            HashingBusyError: If the hashing pool is saturated
             Exception: If error occurs during hashing
         """
         if not password:
             raise ValueError("Password cannot be empty")
             
         try:
-            self.password_hash = hash_password(password)
+            new_hash = hashing_executor.hash_password(password)
+            if self.rekey_pending:
+                from app.services.rekey_service import RekeyService
+                RekeyService.rekey_user(self.id, abandon=True)
+            if self.password_hash:
+                self.begin_rekey(new_hash)
+            else:
+                self.password_hash = new_hash
             logger.debug(f"Password set successfully for user: {self.username}")
         except Exception as e:
             logger.error(f"Error setting password for user {self.username}: {e}")
             raise
 
-    def verify_password(self, password: str) -> bool:
+    def verify_password(self, password: str, rehash: bool = True) -> bool:
         """
         Verify user password
         
+        After a successful check, a hash made by a non-preferred hasher or
+        with weaker parameters than the current policy is transparently
+        replaced (the caller commits the session). This is skipped while a
+        re-key is pending.
+        
         Args:
             password (str): Plain text password to verify
+            rehash (bool): Upgrade an outdated hash on success
             
         Returns:
             bool: True if password is correct, False otherwise
+            
+        Raises:
+            HashingBusyError: If the hashing pool is saturated
         """
         if not password or not self.password_hash:
             return False
             
         try:
-            is_valid = verify_password(password, self.password_hash)
+            is_valid = hashing_executor.verify_password(password, self.password_hash)
             logger.debug(f"Password verification for user {self.username}: {'SUCCESS' if is_valid else 'FAILED'}")
-            return is_valid
+        except HashingBusyError:
+            raise
         except Exception as e:
             logger.error(f"Error verifying password for user {self.username}: {e}")
             return False
 
+        if is_valid and rehash and not self.rekey_pending and needs_rehash(self.password_hash):
+            self.upgrade_password_hash(password)
+        return is_valid
+
+    def upgrade_password_hash(self, password: str) -> bool:
+        """
+        Rehash password with the current policy
+        
+        The password hash is also the master secret of the user's stored
+        services, so the old hash is kept until the re-key pipeline has
+        converted them (see begin_rekey).
+        
+        Args:
+            password (str): Verified plain text password
+            
+        Returns:
+            bool: True if the hash was upgraded
+        """
+        if self.rekey_pending:
+            return False
+        try:
+            new_hash = hashing_executor.hash_password(password)
+        except Exception as e:
+            logger.error(f"Error upgrading password hash for user {self.username}: {e}")
+            return False
+
+        self.begin_rekey(new_hash)
+        logger.info(f"Password hash upgraded for user {self.username}")
+        return True
+
+    @property
+    def rekey_pending(self) -> bool:
+        """True while some services may still be encrypted with the previous secret"""
+        return bool(self.previous_password_hash)
+
+    def begin_rekey(self, new_hash: str) -> None:
+        """
+        Switch to a new password hash and schedule a re-key of the services
+        
+        Services stay readable through the previous hash until
+        RekeyService has re-encrypted all of them (the caller commits).
+        
+        Args:
+            new_hash (str): New password hash
+            
+        Raises:
+            RuntimeError: If a previous re-key is still pending
+        """
+        if self.rekey_pending:
+            raise RuntimeError("Re-key of the previous password is still pending")
+            
+        old_hash = self.password_hash
+        self.password_hash = new_hash
+        if not self.has_services():
+            key_cache.invalidate(old_hash)
+            return
+            
+        self.previous_password_hash = old_hash
+        if self.rekey_job is None:
+            self.rekey_job = RekeyJob()
+        self.rekey_job.reset()
+        logger.info(f"Re-key scheduled for user {self.username}")
+
+    def has_services(self) -> bool:
+        """True if the user owns any service row, active or not (one LIMIT 1 query)"""
+        from app.models.service import Service
+        if self.id is None:
+            return False
+        session = object_session(self) or db.session
+        return session.execute(
+            select(Service.id).where(Service.user_id == self.id).limit(1)
+        ).first() is not None
+
+    def finish_rekey(self) -> None:
+        """Forget the previous hash once every service uses the new one"""
+        if self.previous_password_hash:
+            key_cache.invalidate(self.previous_password_hash)
+        self.previous_password_hash = None
+
+    def get_vault_key(self, master_password: Optional[str] = None) -> VaultKey:
+        """
+        Derive the key-encryption key of the user's vault
+        
+        The vault salt is created on first use (the caller commits).
+        
+        Args:
+            master_password (str, optional): Master secret, defaults to the password hash
+            
+        Returns:
+            VaultKey: Key-encryption key
+        """
+        if not self.vault_salt:
+            self.vault_salt = VaultKey.generate_salt()
+        return VaultKey(master_password or self.password_hash, self.vault_salt)
+
+    def get_previous_vault_key(self) -> Optional[VaultKey]:
+        """Vault key derived from the previous hash while a re-key is pending"""
+        if not self.rekey_pending or not self.vault_salt:
+            return None
+        return VaultKey(self.previous_password_hash, self.vault_salt)
+
     @property
     def salt_from_hash(self) -> Optional[str]:
         """Extract salt from hash (for debugging purposes only)"""
-        return self.password_hash[:29] if self.password_hash else None
+        return extract_salt_from_hash(self.password_hash)
 
     def to_dict(self, include_services: bool = False, include_stats: bool = False) -> Dict[str, Any]:
         """
@@ -95,39 +241,29 @@ class User(db.Model):
         # Add services if requested
         if include_services:
             try:
-                from app.models.service import Service
-                active_services = db.session.query(Service).filter(
+                from app.models.service import Service, ServiceRow
+                rows = db.session.execute(ServiceRow.select().where(
                     Service.user_id == self.id,
                     Service.is_active == True
-                ).all()
+                ))
                 
-                services_list = [service.to_dict() for service in active_services]
+                services_list = [row.to_dict() for row in ServiceRow.from_rows(rows)]
                 user_dict["services"] = services_list
             except Exception as e:
                 logger.error(f"Error loading services for user {self.username}: {e}")
                 user_dict["services"] = []
 
-        # Add stats if requested
+        # Add stats if requested (service counts come from the counter columns)
         if include_stats:
             try:
-                from app.models.service import Service
-                total_services = db.session.query(Service).filter(
-                    Service.user_id == self.id
-                ).count()
-                
-                active_services_count = db.session.query(Service).filter(
-                    Service.user_id == self.id,
-                    Service.is_active == True,
-                ).count()
-                
                 account_age_days = 0
                 if self.created_at:
                     now = datetime.utcnow()
                     account_age_days = (now - self.created_at).days
                     
                 user_dict["stats"] = {
-                    "total_services": total_services,
-                    "active_services": active_services_count,
+                    "total_services": self.total_services or 0,
+                    "active_services": self.active_services or 0,
                     "account_age_days": account_age_days
                 }
             except Exception as e:
@@ -140,6 +276,29 @@ class User(db.Model):
                 
         return user_dict
 
+    @classmethod
+    def adjust_service_counters(cls, user_id: int, total: int = 0, active: int = 0) -> None:
+        """
+        Change the service counters of a user in the current transaction
+        
+        Uses an UPDATE ... SET x = x + n so concurrent writers cannot lose
+        increments; updated_at is left untouched.
+        
+        Args:
+            user_id (int): User ID
+            total (int): Change of total_services
+            active (int): Change of active_services
+        """
+        if not total and not active:
+            return
+        db.session.execute(
+            update(cls).where(cls.id == user_id).values(
+                total_services=cls.total_services + total,
+                active_services=cls.active_services + active,
+                updated_at=cls.updated_at,
+            )
+        )
+
     def to_public_dict(self) -> Dict[str, Any]:
         """Public version with limited information"""
         return {
@@ -160,4 +319,54 @@ class User(db.Model):
         return cls.query.filter_by(email=email, is_active=True).first()
 
     def __repr__(self) -> str:
-        return f"<User {self.username}>" 
\ No newline at end of file
+        return f"<User {self.username}>"
+
+
+class UserRecord(NamedTuple):
+    """
+    Slim read-only projection of a User for the current-user lookup
+    
+    Cached across requests by user_cache, so it deliberately leaves out
+    password hashes (the master secret) and the service counters.
+    """
+    id: int
+    username: str
+    email: str
+    is_active: bool
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def select(cls):
+        """SELECT of the projected columns; add filters and run with db.session.execute"""
+        return db.select(*[getattr(User, name) for name in cls._fields])
+
+    @classmethod
+    def from_user(cls, user: User) -> 'UserRecord':
+        """Record of an already loaded User"""
+        return cls._make(getattr(user, name) for name in cls._fields)
+
+    def to_public_dict(self) -> Dict[str, Any]:
+        """Same keys as User.to_public_dict()"""
+        return {
+            "id": self.id,
+            "username": self.username,
+            "is_active": self.is_active,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_user_record(mapper, connection, target) -> None:
+    # Drop now and again after commit, so a request reading the old row in between cannot keep it cached
+    user_cache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('stale_user_ids', set()).add(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_user_records(session) -> None:
+    for user_id in session.info.pop('stale_user_ids', ()):
+        user_cache.invalidate(user_id)
@@ -2,8 +2,12 @@
 Authentication service for user management
 """
 from typing import Optional, Tuple
-from flask import session
-from app.models.user import User
+from flask import session, g
+from app.models.user import User, UserRecord
+from app.utils.user_cache import user_cache
+from app.utils.hashing_executor import HashingBusyError
+from app.utils.throttle import login_throttle
+from app.services.rekey_service import rekey_scheduler
 from app import db
 import logging
 
@@ -13,27 +17,48 @@ class AuthService:
     """Service for handling authentication logic"""
     
     @staticmethod
-    def login_user(username: str, password: str) -> Tuple[bool, Optional[str]]:
+    def login_user(username: str, password: str, client_ip: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Authenticate user login
         
+        Attempts for a username or client IP with too many recent failures are
+        rejected before any password hashing is done.
+        
         Args:
             username (str): Username
             password (str): Password
+            client_ip (str, optional): Client IP address for throttling
             
         Returns:
             tuple: (success, error_message)
         """
         try:
+            retry_after = login_throttle.check(username, client_ip)
+            if retry_after:
+                logger.warning(f"Throttled login attempt for username: {username} from {client_ip}")
+                return False, f"Đăng nhập sai quá nhiều lần. Vui lòng thử lại sau {retry_after} giây."
+            
             user = User.find_by_username(username)
             if user and user.verify_password(password):
+                if user in db.session.dirty:
+                    # Password hash was upgraded to the current policy
+                    db.session.commit()
+                if user.rekey_pending:
+                    # Re-encrypt the services under the upgraded hash without waiting for the CLI
+                    rekey_scheduler.schedule(user.id)
+                login_throttle.reset(username)
                 session['user_id'] = user.id
                 logger.info(f"User {username} logged in successfully")
                 return True, None
             else:
+                login_throttle.record_failure(username, client_ip)
                 logger.warning(f"Failed login attempt for username: {username}")
                 return False, "Tên đăng nhập hoặc mật khẩu sai."
+        except HashingBusyError:
+            logger.warning(f"Login for user {username} rejected, hashing pool is busy")
+            return False, "Hệ thống đang bận, vui lòng thử lại sau."
         except Exception as e:
+            db.session.rollback()
             logger.error(f"Error during login for user {username}: {e}")
             return False, "Có lỗi xảy ra trong quá trình đăng nhập."
 
@@ -68,11 +93,43 @@ class AuthService:
             logger.info(f"User {username} registered successfully")
             return True, None
             
+        except HashingBusyError:
+            db.session.rollback()
+            logger.warning(f"Registration for user {username} rejected, hashing pool is busy")
+            return False, "Hệ thống đang bận, vui lòng thử lại sau."
         except Exception as e:
             db.session.rollback()
             logger.error(f"Error registering user {username}: {e}")
             return False, "Có lỗi xảy ra trong quá trình đăng ký."
 
+    @staticmethod
+    def confirm_password(user: User, password: str, client_ip: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+        """
+        Re-check the password of the logged-in user before a sensitive action
+        
+        Failures count towards the same throttle as logins, so a stolen
+        session cannot be used to guess the password.
+        
+        Args:
+            user (User): Logged-in user
+            password (str): Password entered again
+            client_ip (str, optional): Client IP address for throttling
+            
+        Returns:
+            tuple: (success, error_message)
+        """
+        try:
+            retry_after = login_throttle.check(user.username, client_ip)
+            if retry_after:
+                return False, f"Nhập sai mật khẩu quá nhiều lần. Vui lòng thử lại sau {retry_after} giây."
+            if not user.verify_password(password, rehash=False):
+                login_throttle.record_failure(user.username, client_ip)
+                logger.warning(f"Password confirmation failed for user {user.username}")
+                return False, "Mật khẩu không đúng."
+            return True, None
+        except HashingBusyError:
+            return False, "Hệ thống đang bận, vui lòng thử lại sau."
+
     @staticmethod
     def logout_user() -> None:
         """Logout current user"""
@@ -85,13 +142,60 @@ class AuthService:
         """
         Get current logged in user
         
+        Loaded once per request and memoized on flask.g. Use this when the
+        master secret (password_hash) is needed; pages that only show the
+        user should use get_current_user_record.
+        
         Returns:
-            User: Current user object or None if not logged in
+            User: Current user object or None if not logged in or deactivated
         """
         user_id = session.get('user_id')
-        if user_id:
-            return User.query.get(user_id)
-        return None
+        if not user_id:
+            return None
+        cached = g.get('_current_user')
+        if cached is not None and cached[0] == user_id:
+            return cached[1]
+        # Always from the primary: password_hash is the master secret used to encrypt writes
+        user = db.session.get(User, user_id)
+        if user is not None and not user.is_active:
+            user = None
+        g._current_user = (user_id, user)
+        return user
+
+    @staticmethod
+    def get_current_user_record() -> Optional[UserRecord]:
+        """
+        Get a slim record of the current logged in user
+        
+        Memoized on flask.g and, when USER_CACHE_ENABLED is set, across
+        requests in the process-local user_cache, so most requests do not
+        touch the users table. A deactivation made by another process is
+        then only seen once the cached record expires.
+        
+        Returns:
+            UserRecord: Current user record or None if not logged in or deactivated
+        """
+        user_id = session.get('user_id')
+        if not user_id:
+            return None
+        cached = g.get('_current_user_record')
+        if cached is not None and cached[0] == user_id:
+            return cached[1]
+        
+        record = user_cache.get(user_id)
+        if record is None:
+            loaded = g.get('_current_user')
+            if loaded is not None and loaded[0] == user_id and loaded[1] is not None:
+                record = UserRecord.from_user(loaded[1])
+            else:
+                row = db.session.execute(UserRecord.select().where(User.id == user_id)).first()
+                record = UserRecord._make(row) if row else None
+            if record is not None:
+                user_cache.put(user_id, record)
+        if record is not None and not record.is_active:
+            record = None
+        g._current_user_record = (user_id, record)
+        return record
 
     @staticmethod
     def is_authenticated() -> bool:
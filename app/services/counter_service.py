@@ -0,0 +1,60 @@
+"""
+Maintenance of the per-user service counters
+"""
+import logging
+from typing import List, Optional
+
+from sqlalchemy import func, or_, select, update
+
+from app import db
+from app.models.service import Service
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class CounterService:
+    """Service for reconciling User.total_services / User.active_services"""
+
+    @staticmethod
+    def reconcile(batch_size: int = 1000, user_ids: Optional[List[int]] = None) -> int:
+        """
+        Recount services and fix users whose counters drifted
+
+        Works through the users table in id ranges, one UPDATE and commit
+        per range, and only rewrites rows whose counters are wrong.
+
+        Args:
+            batch_size (int): Users per id range
+            user_ids (list, optional): Only reconcile these users
+
+        Returns:
+            int: Number of users that were corrected
+        """
+        total = select(func.count(Service.id)).where(Service.user_id == User.id).scalar_subquery()
+        active = select(func.count(Service.id)).where(
+            Service.user_id == User.id,
+            Service.is_active == True
+        ).scalar_subquery()
+        drifted = or_(User.total_services != total, User.active_services != active)
+
+        def fix(*conditions) -> int:
+            result = db.session.execute(
+                update(User).where(drifted, *conditions).values(
+                    total_services=total, active_services=active, updated_at=User.updated_at
+                ).execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            return result.rowcount
+
+        if user_ids is not None:
+            fixed = fix(User.id.in_(user_ids)) if user_ids else 0
+        else:
+            fixed = 0
+            max_id = db.session.query(func.max(User.id)).scalar() or 0
+            for start in range(0, max_id, batch_size):
+                fixed += fix(User.id > start, User.id <= start + batch_size)
+
+        db.session.expire_all()
+        logger.info(f"Reconciled service counters, {fixed} users corrected")
+        return fixed
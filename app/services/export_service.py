@@ -0,0 +1,138 @@
+"""
+Streaming export of a user's vault
+"""
+import csv
+import io
+import json
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import undefer
+
+from app import db
+from app.models.service import Service
+from app.models.user import User
+from app.services.password_service import PasswordService
+from app.utils.archive_crypto import encrypt_stream
+from app.utils.batch_decrypt import DECRYPT_ERROR
+
+logger = logging.getLogger(__name__)
+
+# Format -> MIME type of the unencrypted output
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+EXPORT_FIELDS = ('id', 'service_name', 'service_url', 'service_username', 'service_password', 'notes',
+                 'created_at', 'updated_at')
+
+
+class ExportService:
+    """Service for exporting services with decrypted passwords without loading the whole vault"""
+
+    @staticmethod
+    def iter_batches(user_id: int, master_password: str, batch_size: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Active services of a user in id order, decrypted one batch at a time
+
+        Rows are fetched with yield_per and expunged once their batch has
+        been handed out, so memory stays flat whatever the vault size.
+
+        Args:
+            user_id (int): User ID
+            master_password (str): Master password for decryption
+            batch_size (int, optional): Rows per batch (default: EXPORT_BATCH_SIZE)
+
+        Yields:
+            list: Service dictionaries with service_password (None and password_error on failure)
+        """
+        batch_size = batch_size or current_app.config.get('EXPORT_BATCH_SIZE', 500)
+        statement = select(Service).where(
+            Service.user_id == user_id,
+            Service.is_active == True
+        ).order_by(Service.id).options(
+            Service.with_secrets(), undefer(Service.notes)
+        ).execution_options(yield_per=batch_size)
+
+        # Derived once; PBKDF2 per batch would dominate large exports
+        user = db.session.get(User, user_id)
+        vault_key = user.get_vault_key(master_password) if user and user.vault_salt else None
+        result = db.session.execute(statement)
+        try:
+            for services in result.scalars().partitions():
+                passwords = PasswordService.decrypt_service_passwords(user_id, services, master_password, vault_key)
+                batch = []
+                for service, password in zip(services, passwords):
+                    row = {
+                        "id": service.id,
+                        "service_name": service.service_name,
+                        "service_url": service.service_url,
+                        "service_username": service.service_username,
+                        "service_password": password,
+                        "notes": service.notes,
+                        "created_at": service.created_at.isoformat() if service.created_at else None,
+                        "updated_at": service.updated_at.isoformat() if service.updated_at else None,
+                    }
+                    if password is None:
+                        row["password_error"] = DECRYPT_ERROR
+                    batch.append(row)
+                    db.session.expunge(service)
+                yield batch
+        finally:
+            result.close()
+
+    @staticmethod
+    def encode_ndjson(batches: Iterable[List[Dict[str, Any]]]) -> Iterator[str]:
+        """One JSON object per line, one chunk per batch"""
+        for batch in batches:
+            yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in batch)
+
+    @staticmethod
+    def encode_csv(batches: Iterable[List[Dict[str, Any]]]) -> Iterator[str]:
+        """CSV with a header row, one chunk per batch"""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS + ('password_error',), restval='')
+        writer.writeheader()
+        # The header goes out before the first row is read
+        yield buffer.getvalue()
+        for batch in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(batch)
+            yield buffer.getvalue()
+
+    @staticmethod
+    def stream_export(user_id: int, master_password: str, export_format: str = 'ndjson',
+                      passphrase: Optional[str] = None, batch_size: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Export a user's active services as a stream of bytes
+
+        Args:
+            user_id (int): User ID
+            master_password (str): Master password for decryption
+            export_format (str): 'ndjson' or 'csv'
+            passphrase (str, optional): Encrypt the whole archive with this passphrase
+                (see app.utils.archive_crypto)
+            batch_size (int, optional): Rows per batch (default: EXPORT_BATCH_SIZE)
+
+        Returns:
+            iterator: Output chunks in bytes; nothing is read until the first one is requested
+
+        Raises:
+            ValueError: If the format is unknown
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {export_format}")
+        encode = ExportService.encode_csv if export_format == 'csv' else ExportService.encode_ndjson
+        chunks = (text.encode('utf-8') for text in
+                  encode(ExportService.iter_batches(user_id, master_password, batch_size)))
+        if passphrase:
+            chunks = encrypt_stream(chunks, passphrase)
+        return chunks
+
+    @staticmethod
+    def filename(export_format: str, encrypted: bool = False) -> str:
+        """Download file name, e.g. vault-export.ndjson.enc"""
+        return f"vault-export.{export_format}{'.enc' if encrypted else ''}"
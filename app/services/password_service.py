@@ -1,14 +1,30 @@
 """
 Password management service
 """
+from datetime import datetime
 from typing import Optional, Tuple, List, Dict, Any
-from app.models.service import Service
+from flask import current_app
+from sqlalchemy import or_, tuple_, update
+from app.models.service import Service, ServiceRow
 from app.models.user import User
 from app import db
+from app.utils.db_routing import primary_reads, replica_reads
+from app.utils.batch_decrypt import batch_decryptor, DECRYPT_ERROR
+from app.utils.vault import VaultKey
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.search import (
+    services_fts, search_available, build_match_query, match_clause, rank_expression, like_pattern
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Listing orders: sort column and whether it is shown descending (ties broken by id)
+SERVICE_SORTS = {
+    'created': (Service.created_at, True),
+    'name': (Service.service_name, False),
+}
+
 class PasswordService:
     """Service for handling password management logic"""
     
@@ -35,11 +51,15 @@ class PasswordService:
                 notes=service_data.get('notes', '')
             )
             
-            # Encrypt password
-            service.set_service_password(service_data['service_password'], master_password)
+            # Encrypt password with a fresh data key wrapped under the user's vault key
+            user = db.session.get(User, user_id)
+            service.set_service_password(
+                service_data['service_password'], master_password, user.get_vault_key(master_password)
+            )
             
             # Save to database
             db.session.add(service)
+            User.adjust_service_counters(user_id, total=1, active=1)
             db.session.commit()
             
             logger.info(f"Service {service_data['service_name']} added successfully for user {user_id}")
@@ -65,9 +85,9 @@ class PasswordService:
             tuple: (success, error_message)
         """
         try:
-            service = Service.query.get(service_id)
+            service = PasswordService.get_service_for_update(service_id, user_id)
             
-            if not service or service.user_id != user_id:
+            if not service:
                 return False, "Dịch vụ không tồn tại hoặc bạn không có quyền chỉnh sửa."
             
             # Update service data
@@ -78,7 +98,9 @@ class PasswordService:
             
             # Update encrypted password if provided
             if 'service_password' in service_data:
-                service.set_service_password(service_data['service_password'], master_password)
+                service.set_service_password(
+                    service_data['service_password'], master_password, service.user.get_vault_key(master_password)
+                )
             
             db.session.commit()
             
@@ -103,13 +125,16 @@ class PasswordService:
             tuple: (success, error_message)
         """
         try:
-            service = Service.query.get(service_id)
+            service = PasswordService.get_service_for_update(service_id, user_id, include_inactive=True)
             
-            if not service or service.user_id != user_id:
+            if not service:
                 return False, "Dịch vụ không tồn tại hoặc bạn không có quyền xóa."
             
             # Soft delete
-            service.is_active = False
+            if service.is_active:
+                service.is_active = False
+                service.deleted_at = datetime.utcnow()
+                User.adjust_service_counters(user_id, active=-1)
             db.session.commit()
             
             logger.info(f"Service {service_id} soft deleted successfully")
@@ -121,6 +146,82 @@ class PasswordService:
             return False, "Có lỗi xảy ra khi xóa dịch vụ."
 
     @staticmethod
+    def delete_services(user_id: int, service_ids: List[int]) -> Tuple[Dict[int, str], Optional[str]]:
+        """
+        Soft delete several services of a user
+        
+        Args:
+            user_id (int): User ID
+            service_ids (list): Service IDs
+            
+        Returns:
+            tuple: (status per ID: 'deleted' | 'unchanged' | 'not_found', error_message)
+        """
+        return PasswordService._set_services_active(user_id, service_ids, False)
+
+    @staticmethod
+    def restore_services(user_id: int, service_ids: List[int]) -> Tuple[Dict[int, str], Optional[str]]:
+        """
+        Restore several soft-deleted services of a user
+        
+        Args:
+            user_id (int): User ID
+            service_ids (list): Service IDs
+            
+        Returns:
+            tuple: (status per ID: 'restored' | 'unchanged' | 'not_found', error_message)
+        """
+        return PasswordService._set_services_active(user_id, service_ids, True)
+
+    @staticmethod
+    def _set_services_active(user_id: int, service_ids: List[int], active: bool) -> Tuple[Dict[int, str], Optional[str]]:
+        """
+        Set is_active on the user's services, one SELECT and one UPDATE per batch
+        
+        IDs of other users' services are reported as not_found, like missing
+        ones. Everything is committed in one transaction.
+        """
+        ids = list(dict.fromkeys(service_ids))
+        results = {service_id: 'not_found' for service_id in ids}
+        changed_status = 'restored' if active else 'deleted'
+        batch_size = current_app.config.get('SERVICES_BULK_BATCH_SIZE', 500)
+        try:
+            for start in range(0, len(ids), batch_size):
+                batch = ids[start:start + batch_size]
+                rows = db.session.execute(
+                    db.select(Service.id, Service.is_active).where(
+                        Service.user_id == user_id,
+                        Service.id.in_(batch)
+                    )
+                ).all()
+                to_change = [row.id for row in rows if row.is_active != active]
+                for row in rows:
+                    results[row.id] = 'unchanged'
+                if not to_change:
+                    continue
+                
+                db.session.execute(
+                    update(Service).where(
+                        Service.user_id == user_id,
+                        Service.id.in_(to_change)
+                    ).values(is_active=active, deleted_at=None if active else datetime.utcnow())
+                )
+                User.adjust_service_counters(user_id, active=len(to_change) if active else -len(to_change))
+                for service_id in to_change:
+                    results[service_id] = changed_status
+            db.session.commit()
+            
+            changed = sum(1 for status in results.values() if status == changed_status)
+            logger.info(f"{changed} of {len(ids)} services {changed_status} for user {user_id}")
+            return results, None
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error updating {len(ids)} services of user {user_id}: {e}")
+            return {}, "Có lỗi xảy ra khi cập nhật các dịch vụ."
+
+    @staticmethod
+    @replica_reads()
     def get_service(service_id: int, user_id: int, include_password: bool = False, master_password: str = None) -> Optional[Service]:
         """
         Get service by ID
@@ -135,7 +236,7 @@ class PasswordService:
             Service: Service object or None if not found
         """
         try:
-            service = Service.query.get(service_id)
+            service = db.session.get(Service, service_id)
             
             if not service or service.user_id != user_id or not service.is_active:
                 return None
@@ -147,6 +248,33 @@ class PasswordService:
             return None
 
     @staticmethod
+    @primary_reads()
+    def get_service_for_update(service_id: int, user_id: int, include_inactive: bool = False) -> Optional[Service]:
+        """
+        Get a service of the user from the primary, to modify it
+        
+        Unlike get_service() this never reads the replica, so an edit or
+        delete never acts on a lagging copy of the row. Where the database
+        supports it the row stays locked until the transaction ends.
+        
+        Args:
+            service_id (int): Service ID
+            user_id (int): User ID
+            include_inactive (bool): Also return a soft-deleted service
+            
+        Returns:
+            Service: Service object or None if not found
+        """
+        statement = db.select(Service).where(
+            Service.id == service_id,
+            Service.user_id == user_id
+        ).with_for_update()
+        if not include_inactive:
+            statement = statement.where(Service.is_active == True)
+        return db.session.execute(statement).scalar_one_or_none()
+
+    @staticmethod
+    @replica_reads()
     def get_user_services(user_id: int, include_passwords: bool = False, master_password: str = None) -> List[Dict[str, Any]]:
         """
         Get all active services for user
@@ -160,18 +288,26 @@ class PasswordService:
             list: List of service dictionaries
         """
         try:
+            if not (include_passwords and master_password):
+                rows = db.session.execute(ServiceRow.select().where(
+                    Service.user_id == user_id,
+                    Service.is_active == True
+                ))
+                return [row.to_dict() for row in ServiceRow.from_rows(rows)]
+                
             services = Service.query.filter_by(
                 user_id=user_id,
                 is_active=True
-            ).all()
+            ).options(Service.with_secrets()).all()
             
-            service_list = []
-            for service in services:
-                service_dict = service.to_dict(
-                    include_password=include_passwords,
-                    master_password=master_password
-                )
-                service_list.append(service_dict)
+            # Same keys as the list above; notes stay on the detail page
+            service_list = [ServiceRow.from_service(service).to_dict() for service in services]
+            if include_passwords and master_password:
+                passwords = PasswordService.decrypt_service_passwords(user_id, services, master_password)
+                for service_dict, password in zip(service_list, passwords):
+                    service_dict["service_password"] = password
+                    if password is None:
+                        service_dict["password_error"] = DECRYPT_ERROR
                 
             return service_list
             
@@ -179,6 +315,155 @@ class PasswordService:
             logger.error(f"Error getting services for user {user_id}: {e}")
             return []
 
+    @staticmethod
+    @replica_reads()
+    def get_user_services_page(user_id: int, cursor: Optional[str] = None, direction: str = 'next',
+                               limit: Optional[int] = None, sort: str = 'created') -> Dict[str, Any]:
+        """
+        Get one page of active services for user using keyset pagination
+        
+        Rows are sought from the cursor on (sort column, id) instead of using
+        OFFSET, so the cost of a page does not grow with the vault size.
+        
+        Args:
+            user_id (int): User ID
+            cursor (str, optional): Cursor of the page boundary, None for the first page
+            direction (str): 'next' for rows after the cursor, 'prev' for rows before it
+            limit (int, optional): Page size, capped by SERVICES_PAGE_SIZE_MAX
+            sort (str): 'created' (newest first) or 'name'
+            
+        Returns:
+            dict: items (ServiceRow records), next_cursor, prev_cursor, sort and limit
+        """
+        if sort not in SERVICE_SORTS:
+            sort = 'created'
+        column, descending = SERVICE_SORTS[sort]
+        max_limit = current_app.config.get('SERVICES_PAGE_SIZE_MAX', 100)
+        limit = max(1, min(limit or current_app.config.get('SERVICES_PAGE_SIZE', 20), max_limit))
+        page = {"items": [], "next_cursor": None, "prev_cursor": None, "sort": sort, "limit": limit}
+        
+        try:
+            query = ServiceRow.select().where(Service.user_id == user_id, Service.is_active == True)
+            backwards = False
+            if cursor:
+                try:
+                    value, last_id = decode_cursor(cursor, sort, is_datetime=sort == 'created')
+                    backwards = direction == 'prev'
+                    key = tuple_(column, Service.id)
+                    # Walking towards smaller keys when the listing is descending, or backwards
+                    query = query.where(key < (value, last_id) if descending != backwards else key > (value, last_id))
+                except ValueError:
+                    cursor = None
+                    
+            if descending != backwards:
+                query = query.order_by(column.desc(), Service.id.desc())
+            else:
+                query = query.order_by(column.asc(), Service.id.asc())
+            rows = ServiceRow.from_rows(db.session.execute(query.limit(limit + 1)))
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            if backwards:
+                rows.reverse()
+                
+            page["items"] = rows
+            # Coming back from a later page there is always a next page
+            has_next = True if backwards else has_more
+            has_prev = has_more if backwards else bool(cursor)
+            if rows and has_next:
+                page["next_cursor"] = encode_cursor(sort, getattr(rows[-1], column.key), rows[-1].id)
+            if rows and has_prev:
+                page["prev_cursor"] = encode_cursor(sort, getattr(rows[0], column.key), rows[0].id)
+            return page
+            
+        except Exception as e:
+            logger.error(f"Error getting services page for user {user_id}: {e}")
+            return page
+
+    @staticmethod
+    @replica_reads()
+    def search_services(user_id: int, query: str, limit: Optional[int] = None) -> List[ServiceRow]:
+        """
+        Full-text search over the user's active services
+        
+        Every word of the query is matched as a prefix against name, URL,
+        username and notes; results are ranked by bm25 with name matches
+        first. Falls back to LIKE when the FTS5 index is unavailable.
+        
+        Args:
+            user_id (int): User ID
+            query (str): Search text
+            limit (int, optional): Maximum results, capped by SERVICES_PAGE_SIZE_MAX
+            
+        Returns:
+            list: ServiceRow records, best match first
+        """
+        max_limit = current_app.config.get('SERVICES_PAGE_SIZE_MAX', 100)
+        limit = max(1, min(limit or current_app.config.get('SERVICES_PAGE_SIZE', 20), max_limit))
+        match_query = build_match_query(query)
+        if not match_query:
+            return []
+            
+        try:
+            statement = ServiceRow.select().where(
+                Service.user_id == user_id,
+                Service.is_active == True
+            )
+            if search_available():
+                statement = statement.join(services_fts, services_fts.c.rowid == Service.id).where(
+                    match_clause(match_query, user_id)
+                ).order_by(rank_expression(), Service.id)
+            else:
+                for word in query.split():
+                    pattern = like_pattern(word)
+                    statement = statement.where(or_(
+                        Service.service_name.ilike(pattern, escape='\\'),
+                        Service.service_url.ilike(pattern, escape='\\'),
+                        Service.service_username.ilike(pattern, escape='\\'),
+                        Service.notes.ilike(pattern, escape='\\')
+                    ))
+                statement = statement.order_by(Service.service_name, Service.id)
+            return ServiceRow.from_rows(db.session.execute(statement.limit(limit)))
+            
+        except Exception as e:
+            logger.error(f"Error searching services for user {user_id}: {e}")
+            return []
+
+    @staticmethod
+    def decrypt_service_passwords(user_id: int, services: List[Service], master_password: str,
+                                  vault_key: Optional[VaultKey] = None) -> List[Optional[str]]:
+        """
+        Decrypt the passwords of many services of one user
+        
+        The vault key is derived once; legacy rows that need their own
+        PBKDF2 run are decrypted in parallel on the batch decryption pool.
+        While a re-key is pending, rows that fail are retried with the
+        previous secret.
+        
+        Args:
+            user_id (int): Owner of the services
+            services (list): Service objects
+            master_password (str): Master password for decryption
+            vault_key (VaultKey, optional): Vault key already derived from master_password,
+                reused by callers that decrypt in several batches
+            
+        Returns:
+            list: Passwords in input order, None where decryption failed
+        """
+        user = db.session.get(User, user_id)
+        if vault_key is None and any(service.wrapped_data_key for service in services):
+            vault_key = user.get_vault_key(master_password)
+        passwords = batch_decryptor.decrypt_services(services, master_password, vault_key)
+        
+        # Rows not yet converted by a pending re-key still use the previous secret
+        retry = [index for index, password in enumerate(passwords) if password is None]
+        if retry and user.rekey_pending and master_password == user.password_hash:
+            previous = batch_decryptor.decrypt_services(
+                [services[index] for index in retry], user.previous_password_hash, user.get_previous_vault_key()
+            )
+            for index, password in zip(retry, previous):
+                passwords[index] = password
+        return passwords
+
     @staticmethod
     def get_service_password(service_id: int, user_id: int, master_password: str) -> Optional[str]:
         """
@@ -193,13 +478,18 @@ class PasswordService:
             str: Decrypted password or None if error
         """
         try:
-            service = Service.query.get(service_id)
+            service = db.session.get(Service, service_id, options=[Service.with_secrets()])
             
             if not service or service.user_id != user_id or not service.is_active:
                 return None
                 
-            return service.get_service_password(master_password)
+            # Rows in an older format are rewritten on access
+            password = service.get_service_password(master_password, upgrade=True)
+            if service in db.session.dirty:
+                db.session.commit()
+            return password
             
         except Exception as e:
+            db.session.rollback()
             logger.error(f"Error getting password for service {service_id}: {e}")
             return None 
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""
+Bulk user provisioning service
+"""
+import csv
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.user import User
+from app.utils.password_utils import hash_password, get_hashing_policy
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ('username', 'email', 'password')
+
+
+class ProvisioningService:
+    """Service for importing many users at once"""
+
+    @staticmethod
+    def read_users(path: str, file_format: Optional[str] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Stream user records from a CSV or JSONL file
+
+        Args:
+            path (str): File path
+            file_format (str, optional): 'csv' or 'jsonl', guessed from the extension if None
+
+        Yields:
+            tuple: (line_number, record)
+        """
+        file_format = file_format or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        with open(path, newline='', encoding='utf-8') as fh:
+            if file_format == 'csv':
+                # Header is line 1
+                for line_number, record in enumerate(csv.DictReader(fh), start=2):
+                    yield line_number, record
+            elif file_format == 'jsonl':
+                for line_number, line in enumerate(fh, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        yield line_number, json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield line_number, {"_error": f"Invalid JSON: {e}"}
+            else:
+                raise ValueError(f"Unsupported format: {file_format}")
+
+    @staticmethod
+    def import_users(records: Iterable[Tuple[int, Dict[str, Any]]], batch_size: int = 1000,
+                     workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Create users in batches
+
+        Passwords are hashed on a process pool; each batch needs a single
+        uniqueness query and a single insert transaction.
+
+        Args:
+            records (iterable): (line_number, record) pairs, e.g. from read_users
+            batch_size (int): Users per transaction
+            workers (int, optional): Hashing processes, defaults to the CPU count
+
+        Returns:
+            dict: Counts of imported/failed rows and per-row errors
+        """
+        report: Dict[str, Any] = {"imported": 0, "failed": 0, "errors": []}
+        seen_usernames = set()
+        seen_emails = set()
+        hasher = partial(hash_password, **get_hashing_policy())
+        workers = workers or os.cpu_count() or 1
+        records = iter(records)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                batch = list(islice(records, batch_size))
+                if not batch:
+                    break
+
+                valid = ProvisioningService._validate_batch(batch, seen_usernames, seen_emails, report)
+                if not valid:
+                    continue
+
+                chunksize = max(1, len(valid) // (workers * 4))
+                hashes = pool.map(hasher, [record['password'] for _, record in valid], chunksize=chunksize)
+                rows = [
+                    (line_number, {"username": record['username'], "email": record['email'],
+                                   "password_hash": password_hash, "is_active": True})
+                    for (line_number, record), password_hash in zip(valid, hashes)
+                ]
+                ProvisioningService._insert_batch(rows, report)
+                logger.info(f"Imported {report['imported']} users so far")
+
+        return report
+
+    @staticmethod
+    def _validate_batch(batch: List[Tuple[int, Dict[str, Any]]], seen_usernames: set, seen_emails: set,
+                        report: Dict[str, Any]) -> List[Tuple[int, Dict[str, Any]]]:
+        """Drop malformed and duplicate rows, recording an error for each"""
+        candidates = []
+        for line_number, record in batch:
+            if '_error' in record:
+                ProvisioningService._fail(report, line_number, record, record['_error'])
+                continue
+            missing = [field for field in REQUIRED_FIELDS if not str(record.get(field) or '').strip()]
+            if missing:
+                ProvisioningService._fail(report, line_number, record, f"Missing fields: {', '.join(missing)}")
+                continue
+            record = {
+                "username": str(record['username']).strip(),
+                "email": str(record['email']).strip(),
+                "password": str(record['password']),
+            }
+            candidates.append((line_number, record))
+
+        # One set-based lookup for the whole batch
+        usernames = [record['username'] for _, record in candidates]
+        emails = [record['email'] for _, record in candidates]
+        existing_usernames = set()
+        existing_emails = set()
+        if candidates:
+            for username, email in db.session.query(User.username, User.email).filter(
+                or_(User.username.in_(usernames), User.email.in_(emails))
+            ):
+                existing_usernames.add(username)
+                existing_emails.add(email)
+
+        valid = []
+        for line_number, record in candidates:
+            if record['username'] in existing_usernames or record['username'] in seen_usernames:
+                ProvisioningService._fail(report, line_number, record, "Username already exists")
+            elif record['email'] in existing_emails or record['email'] in seen_emails:
+                ProvisioningService._fail(report, line_number, record, "Email already exists")
+            else:
+                seen_usernames.add(record['username'])
+                seen_emails.add(record['email'])
+                valid.append((line_number, record))
+        return valid
+
+    @staticmethod
+    def _insert_batch(rows: List[Tuple[int, Dict[str, Any]]], report: Dict[str, Any]) -> None:
+        """Insert a batch in one transaction, falling back to row by row on conflicts"""
+        try:
+            db.session.execute(insert(User), [row for _, row in rows])
+            db.session.commit()
+            report["imported"] += len(rows)
+            return
+        except IntegrityError:
+            db.session.rollback()
+            logger.warning("Batch insert hit a conflict, retrying row by row")
+
+        for line_number, row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(User), [row])
+                report["imported"] += 1
+            except IntegrityError as e:
+                ProvisioningService._fail(report, line_number, row, f"Database conflict: {e.orig}")
+        db.session.commit()
+
+    @staticmethod
+    def _fail(report: Dict[str, Any], line_number: int, record: Dict[str, Any], error: str) -> None:
+        report["failed"] += 1
+        report["errors"].append({
+            "line": line_number,
+            "username": record.get('username'),
+            "error": error,
+        })
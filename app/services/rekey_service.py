@@ -0,0 +1,366 @@
+"""
+Re-key pipeline for services after a user's master secret changed
+"""
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from flask import current_app
+from sqlalchemy import update
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.exc import ObjectDeletedError
+
+from app import db
+from app.models.rekey_job import RekeyJob
+from app.models.service import Service
+from app.models.user import User
+from app.utils.vault import decrypt_stored_password
+
+logger = logging.getLogger(__name__)
+
+# Called with (user_id, done, total) after every batch
+ProgressCallback = Callable[[int, int, int], None]
+
+REKEY_MODES = ('background', 'inline', 'off')
+
+# Columns a re-key rewrites; a row is only written back if they are unchanged
+SECRET_COLUMNS = ('service_password_encrypted', 'encryption_salt', 'wrapped_data_key', 'password_record')
+# Times a row changed by a concurrent edit is read again before it counts as failed
+ROW_RETRIES = 3
+
+
+class RekeyService:
+    """Service for re-encrypting services under a user's new master secret"""
+
+    @staticmethod
+    def rekey_user(user_id: int, batch_size: int = 500, dry_run: bool = False,
+                   progress: Optional[ProgressCallback] = None, abandon: bool = False) -> Dict[str, Any]:
+        """
+        Re-encrypt one user's services from the previous to the current secret
+
+        Services are streamed in id order, batch_size rows at a time. Each
+        batch is committed together with the checkpoint in rekey_jobs, so an
+        interrupted run resumes after the last committed service. Rows that
+        already use the current secret are skipped. Each row is written with
+        a conditional UPDATE, so a row edited while its batch was converted
+        is read again rather than overwritten with stale values.
+
+        Rows readable with neither secret fail. A run with failures keeps
+        the previous secret so it can be retried; after REKEY_MAX_ATTEMPTS
+        such runs (or at once with abandon) the failed rows are logged and
+        given up, and the previous secret is forgotten.
+
+        Args:
+            user_id (int): User ID
+            batch_size (int): Services per transaction
+            dry_run (bool): Only count what would change, write nothing
+            progress (callable, optional): Called with (user_id, done, total) after each batch
+            abandon (bool): Give up failed rows without further attempts
+
+        Returns:
+            dict: Counts of processed, skipped and failed services, failed_ids
+                of this run and the final status ('done', 'failed', 'abandoned',
+                'dry-run' or 'idle')
+        """
+        user = db.session.get(User, user_id)
+        if user is None or not user.rekey_pending:
+            return {"user_id": user_id, "processed": 0, "skipped": 0, "failed": 0, "failed_ids": [],
+                    "status": "idle"}
+
+        old_master, new_master = user.previous_password_hash, user.password_hash
+        old_vault_key = user.get_previous_vault_key()
+        new_vault_key = user.get_vault_key(new_master)
+
+        job = user.rekey_job or RekeyJob(user_id=user_id)
+        # Continue an interrupted run; a run that ended with failures starts over
+        resume = job.status in ('pending', 'running')
+        last_id = (job.last_service_id or 0) if resume else 0
+        if dry_run:
+            counts = {"processed": 0, "skipped": 0, "failed": 0}
+        else:
+            user.rekey_job = job
+            if not resume:
+                # A retry after failures; the attempt count belongs to the same secret change
+                attempts = job.attempts or 0
+                job.reset()
+                job.attempts = attempts
+            job.status = 'running'
+            counts = {"processed": job.processed or 0, "skipped": job.skipped or 0, "failed": job.failed or 0}
+        total = Service.query.filter(Service.user_id == user_id).count()
+        failed_ids: List[int] = []
+
+        try:
+            while True:
+                batch = Service.query.filter(
+                    Service.user_id == user_id,
+                    Service.id > last_id
+                ).options(Service.with_secrets()).order_by(Service.id).limit(batch_size).all()
+                if not batch:
+                    break
+
+                for service in batch:
+                    outcome = RekeyService._rekey_row(service, old_master, new_master, old_vault_key,
+                                                      new_vault_key, dry_run)
+                    counts[outcome] += 1
+                    if outcome == 'failed':
+                        failed_ids.append(service.id)
+                last_id = batch[-1].id
+
+                if not dry_run:
+                    job.last_service_id = last_id
+                    job.processed, job.skipped, job.failed = counts["processed"], counts["skipped"], counts["failed"]
+                    db.session.commit()
+                if progress:
+                    progress(user_id, sum(counts.values()), total)
+
+            if dry_run:
+                status = 'dry-run'
+            elif counts["failed"]:
+                job.attempts = (job.attempts or 0) + 1
+                if abandon or job.attempts >= current_app.config.get('REKEY_MAX_ATTEMPTS', 3):
+                    logger.error(f"Re-key of user {user_id} abandoned after {job.attempts} attempts, "
+                                 f"{counts['failed']} services are unreadable: {failed_ids}")
+                    status = job.status = 'abandoned'
+                    user.finish_rekey()
+                else:
+                    # Keep the previous secret so the next attempt can still read the rows
+                    status = job.status = 'failed'
+            else:
+                status = job.status = 'done'
+                user.finish_rekey()
+            if dry_run:
+                db.session.rollback()
+            else:
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Re-key of user {user_id} interrupted after service {last_id}: {e}")
+            raise
+
+        logger.info(f"Re-key of user {user_id} {status}: {counts}")
+        return {"user_id": user_id, **counts, "failed_ids": failed_ids, "status": status}
+
+    @staticmethod
+    def _rekey_row(service: Service, old_master: str, new_master: str, old_vault_key, new_vault_key,
+                   dry_run: bool = False) -> str:
+        """
+        Re-encrypt one row and write it back if nobody changed it meanwhile
+
+        Returns:
+            str: 'processed', 'skipped' (already on the new secret, or deleted) or 'failed'
+        """
+        for _ in range(ROW_RETRIES):
+            read = {name: getattr(service, name) for name in SECRET_COLUMNS}
+            values = service.reencrypt_password(old_master, new_master, old_vault_key, new_vault_key)
+            if values is None:
+                return 'skipped' if RekeyService._uses_secret(service, new_master, new_vault_key) else 'failed'
+            if dry_run or RekeyService._write_if_unchanged(service, read, values):
+                return 'processed'
+            logger.info(f"Service {service.id} changed during its re-key, reading it again")
+            try:
+                db.session.refresh(service, SECRET_COLUMNS)
+            except ObjectDeletedError:
+                return 'skipped'
+        logger.warning(f"Service {service.id} kept changing during its re-key")
+        return 'failed'
+
+    @staticmethod
+    def _write_if_unchanged(service: Service, read: Dict[str, Any], values: Dict[str, Any]) -> bool:
+        """
+        UPDATE the row only where its secret columns still hold the values read
+
+        An edit saved in between already stores the row under the new
+        secret; values derived from the old columns would make it unreadable.
+
+        Returns:
+            bool: False if the row changed or was deleted
+        """
+        unchanged = [getattr(Service, name).is_not_distinct_from(value) for name, value in read.items()]
+        result = db.session.execute(
+            update(Service).where(Service.id == service.id, *unchanged).values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            return False
+        for name, value in values.items():
+            set_committed_value(service, name, value)
+        return True
+
+    @staticmethod
+    def _uses_secret(service: Service, master_password: str, vault_key) -> bool:
+        """True if the row already decrypts with the given secret (no fallback)"""
+        try:
+            decrypt_stored_password(service.stored_password, master_password, vault_key)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def pending_user_ids() -> List[int]:
+        """IDs of users with a pending re-key"""
+        rows = db.session.query(User.id).filter(
+            User.previous_password_hash.isnot(None)
+        ).order_by(User.id).all()
+        return [row.id for row in rows]
+
+    @staticmethod
+    def rekey_all(workers: int = 1, batch_size: int = 500, dry_run: bool = False,
+                  progress: Optional[ProgressCallback] = None, abandon: bool = False) -> Dict[str, Any]:
+        """
+        Run the re-key pipeline for every user with a pending re-key
+
+        Users are independent, so with workers > 1 they are processed in
+        parallel threads, each with its own app context and session. Key
+        derivation in cryptography releases the GIL.
+
+        Args:
+            workers (int): Users processed at the same time
+            batch_size (int): Services per transaction
+            dry_run (bool): Only count what would change, write nothing
+            progress (callable, optional): Called with (user_id, done, total) after each batch
+            abandon (bool): Give up rows that cannot be read, see rekey_user
+
+        Returns:
+            dict: Totals over all users plus the per-user results
+        """
+        user_ids = RekeyService.pending_user_ids()
+        results: List[Dict[str, Any]] = []
+
+        if workers <= 1 or len(user_ids) <= 1:
+            for user_id in user_ids:
+                results.append(RekeyService._rekey_safely(user_id, batch_size, dry_run, progress, abandon))
+        else:
+            app = current_app._get_current_object()
+
+            def run(user_id: int) -> Dict[str, Any]:
+                with app.app_context():
+                    return RekeyService._rekey_safely(user_id, batch_size, dry_run, progress, abandon)
+
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rekey') as pool:
+                futures = [pool.submit(run, user_id) for user_id in user_ids]
+                for future in as_completed(futures):
+                    results.append(future.result())
+            results.sort(key=lambda result: result["user_id"])
+
+        totals = {"users": len(results), "processed": 0, "skipped": 0, "failed": 0, "errors": 0, "abandoned": 0}
+        for result in results:
+            totals["processed"] += result["processed"]
+            totals["skipped"] += result["skipped"]
+            totals["failed"] += result["failed"]
+            totals["errors"] += result["status"] == 'error'
+            totals["abandoned"] += result["status"] == 'abandoned'
+        totals["results"] = results
+        return totals
+
+    @staticmethod
+    def _rekey_safely(user_id: int, batch_size: int, dry_run: bool,
+                      progress: Optional[ProgressCallback], abandon: bool = False) -> Dict[str, Any]:
+        try:
+            return RekeyService.rekey_user(user_id, batch_size, dry_run, progress, abandon)
+        except Exception as e:
+            return {"user_id": user_id, "processed": 0, "skipped": 0, "failed": 0, "failed_ids": [],
+                    "status": 'error', "error": str(e)}
+
+
+class RekeyScheduler:
+    """
+    Runs the re-key of a user soon after their master secret changed
+
+    A login that upgrades an outdated hash schedules the re-key here, so
+    users do not wait for an operator to run `flask vault rekey`. Modes
+    (REKEY_MODE): 'background' runs it on a single worker thread after the
+    response, 'inline' runs it in the request, 'off' leaves it to the CLI.
+    """
+
+    def __init__(self, mode: str = 'background'):
+        self.mode = mode
+        self.batch_size = 500
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._queued: Set[int] = set()
+        self._scheduled = 0
+        self._completed = 0
+        self._errors = 0
+
+    def init_app(self, app) -> None:
+        """
+        Configure scheduler from Flask app config (REKEY_MODE, REKEY_BATCH_SIZE)
+
+        Args:
+            app (Flask): Flask application
+        """
+        mode = app.config.get('REKEY_MODE', 'background')
+        if mode not in REKEY_MODES:
+            raise ValueError(f"Unknown re-key mode: {mode}")
+        self.mode = mode
+        self.batch_size = app.config.get('REKEY_BATCH_SIZE', 500)
+        with self._lock:
+            self._scheduled = self._completed = self._errors = 0
+        app.extensions['rekey_scheduler'] = self
+
+    def schedule(self, user_id: int) -> None:
+        """
+        Re-key a user's services according to the configured mode
+
+        A user already queued is not queued twice.
+
+        Args:
+            user_id (int): User with a pending re-key
+        """
+        if self.mode == 'off':
+            return
+        with self._lock:
+            if user_id in self._queued:
+                return
+            self._queued.add(user_id)
+            self._scheduled += 1
+        if self.mode == 'inline':
+            self._run(None, user_id)
+            return
+        app = current_app._get_current_object()
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='rekey')
+            pool = self._pool
+        try:
+            pool.submit(self._run, app, user_id)
+        except RuntimeError as e:
+            # Interpreter shutting down; the next login or the CLI picks it up
+            logger.warning(f"Could not schedule re-key of user {user_id}: {e}")
+            with self._lock:
+                self._queued.discard(user_id)
+
+    def _run(self, app, user_id: int) -> None:
+        error = True
+        try:
+            if app is None:
+                result = RekeyService._rekey_safely(user_id, self.batch_size, False, None)
+            else:
+                with app.app_context():
+                    result = RekeyService._rekey_safely(user_id, self.batch_size, False, None)
+            error = result["status"] == 'error'
+            if error:
+                logger.error(f"Scheduled re-key of user {user_id} failed: {result['error']}")
+        finally:
+            with self._lock:
+                self._queued.discard(user_id)
+                self._completed += 1
+                self._errors += error
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"mode": self.mode, "queued": len(self._queued), "scheduled": self._scheduled,
+                    "completed": self._completed, "errors": self._errors}
+
+    def shutdown(self) -> None:
+        """Stop accepting work; queued re-keys are resumed by the next login or the CLI"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+rekey_scheduler = RekeyScheduler()
+atexit.register(rekey_scheduler.shutdown)
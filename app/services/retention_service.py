@@ -0,0 +1,223 @@
+"""
+Retention job that archives and purges long soft-deleted services
+"""
+import base64
+import json
+import logging
+import operator
+import time
+from datetime import datetime, timedelta
+from functools import reduce
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import LargeBinary, cast, delete, func, insert, literal, select, text
+
+from app import db
+from app.models.archived_service import ArchivedService
+from app.models.service import Service
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_MODES = ('table', 'file', 'none')
+
+# Called with (purged so far, bytes so far) after every chunk
+ProgressCallback = Callable[[int, int], None]
+
+
+class RetentionService:
+    """Service for moving soft-deleted services out of the services table"""
+
+    @staticmethod
+    def purgeable_filter(cutoff: datetime):
+        """
+        Services soft deleted before cutoff
+
+        Uses deleted_at rather than updated_at, which re-keys and format
+        upgrades bump on deleted rows too. Matches the ix_services_deleted
+        partial index.
+        """
+        return (Service.is_active == False) & (Service.deleted_at < cutoff)
+
+    @staticmethod
+    def _row_bytes():
+        """Approximate stored size of a service row: byte length of its variable-size columns"""
+        columns = (
+            Service.service_name, Service.service_url, Service.service_username,
+            Service.service_password_encrypted, Service.encryption_salt,
+            Service.wrapped_data_key, Service.password_record, Service.notes,
+        )
+        sizes = [func.coalesce(func.length(cast(column, LargeBinary)), 0) for column in columns]
+        return reduce(operator.add, sizes)
+
+    @staticmethod
+    def purge_deleted(days: int = 30, chunk_size: int = 500, archive: str = 'table',
+                      archive_path: Optional[str] = None, dry_run: bool = False, pause: float = 0.0,
+                      vacuum: bool = False, progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """
+        Archive and delete services that were soft deleted more than `days` ago
+
+        Rows are handled in chunks of chunk_size, each in its own short
+        transaction: copy to the archive, delete, fix the owners'
+        total_services counters, commit. The FTS index follows through its
+        delete trigger. With archive='file' the chunk is written and flushed
+        to the JSONL file before the delete is committed.
+
+        Args:
+            days (int): Retention period for soft-deleted services
+            chunk_size (int): Services per transaction
+            archive (str): 'table' (archived_services), 'file' (JSONL at archive_path) or 'none'
+            archive_path (str, optional): JSONL file for archive='file' (appended to)
+            dry_run (bool): Only count what would be purged
+            pause (float): Seconds to sleep between chunks so other writers get the lock
+            vacuum (bool): Run VACUUM afterwards to return freed pages to the OS (locks the database)
+            progress (callable, optional): Called with (purged, bytes) after each chunk
+
+        Returns:
+            dict: Rows purged, rows archived, bytes reclaimed, chunks and the cutoff
+        """
+        if archive not in ARCHIVE_MODES:
+            raise ValueError(f"Unknown archive mode: {archive}")
+        if archive == 'file' and not archive_path:
+            raise ValueError("archive_path is required for archive='file'")
+
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        purgeable = RetentionService.purgeable_filter(cutoff)
+        report: Dict[str, Any] = {"cutoff": cutoff.isoformat(), "purged": 0, "archived": 0,
+                                  "bytes": 0, "chunks": 0, "dry_run": dry_run}
+
+        if dry_run:
+            count, size = db.session.execute(
+                select(func.count(Service.id), func.coalesce(func.sum(RetentionService._row_bytes()), 0))
+                .where(purgeable)
+            ).one()
+            db.session.rollback()
+            report.update(purged=count, bytes=int(size))
+            return report
+
+        archive_file = open(archive_path, 'a', encoding='utf-8') if archive == 'file' else None
+        try:
+            while True:
+                ids = db.session.execute(
+                    select(Service.id).where(purgeable).order_by(Service.deleted_at, Service.id).limit(chunk_size)
+                ).scalars().all()
+                if not ids:
+                    break
+                purged, size = RetentionService._purge_chunk(ids, archive, archive_file)
+                if purged is None:
+                    # A service was restored meanwhile; select the chunk again
+                    continue
+                report["purged"] += purged
+                report["archived"] += purged if archive != 'none' else 0
+                report["bytes"] += size
+                report["chunks"] += 1
+                if progress:
+                    progress(report["purged"], report["bytes"])
+                if pause:
+                    time.sleep(pause)
+        finally:
+            if archive_file is not None:
+                archive_file.close()
+
+        report.update(RetentionService.storage_stats())
+        if vacuum and report["purged"]:
+            report["vacuumed_bytes"] = RetentionService.vacuum()
+        logger.info(f"Purged {report['purged']} services deleted before {report['cutoff']}, "
+                    f"{report['bytes']} bytes in {report['chunks']} chunks")
+        return report
+
+    @staticmethod
+    def _purge_chunk(ids: List[int], archive: str, archive_file) -> tuple:
+        """
+        Archive and delete one chunk in a single transaction
+
+        Returns:
+            tuple: (rows purged, bytes), or (None, 0) if the chunk changed and was rolled back
+        """
+        in_chunk = Service.id.in_(ids)
+        try:
+            owners = db.session.execute(
+                select(Service.user_id, func.count(Service.id), func.sum(RetentionService._row_bytes()))
+                .where(in_chunk).group_by(Service.user_id)
+            ).all()
+            size = sum(int(row[2] or 0) for row in owners)
+
+            if archive == 'table':
+                db.session.execute(
+                    insert(ArchivedService).from_select(
+                        [*ArchivedService.COPIED_COLUMNS, 'archived_at'],
+                        select(*ArchivedService.source_columns(),
+                               literal(datetime.utcnow()).label('archived_at')).where(in_chunk)
+                    )
+                )
+            elif archive == 'file':
+                rows = db.session.execute(
+                    select(*ArchivedService.source_columns()).where(in_chunk)
+                ).mappings().all()
+
+            result = db.session.execute(
+                delete(Service).where(in_chunk, Service.is_active == False)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount != len(ids):
+                db.session.rollback()
+                return None, 0
+
+            if archive == 'file':
+                # Written only once the delete is certain, and before it is committed
+                for row in rows:
+                    archive_file.write(json.dumps(RetentionService._archive_record(row), ensure_ascii=False) + '\n')
+                archive_file.flush()
+
+            for user_id, count, _ in owners:
+                User.adjust_service_counters(user_id, total=-count)
+            db.session.commit()
+            return len(ids), size
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @staticmethod
+    def _archive_record(row) -> Dict[str, Any]:
+        """JSON-safe copy of a service row (binary columns base64, dates ISO 8601)"""
+        record = {}
+        for name, value in row.items():
+            if isinstance(value, (bytes, memoryview)):
+                value = base64.b64encode(bytes(value)).decode()
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            record[name] = value
+        record["archived_at"] = datetime.utcnow().isoformat()
+        return record
+
+    @staticmethod
+    def storage_stats() -> Dict[str, int]:
+        """
+        Database file size and the free pages reusable after deletes (SQLite only)
+
+        Returns:
+            dict: file_bytes and free_bytes, empty for other databases
+        """
+        if db.engine.dialect.name != 'sqlite':
+            return {}
+        with db.engine.connect() as conn:
+            page_size = conn.execute(text("PRAGMA page_size")).scalar()
+            page_count = conn.execute(text("PRAGMA page_count")).scalar()
+            free_pages = conn.execute(text("PRAGMA freelist_count")).scalar()
+        return {"file_bytes": page_size * page_count, "free_bytes": page_size * free_pages}
+
+    @staticmethod
+    def vacuum() -> int:
+        """
+        Rebuild the SQLite database file to release free pages
+
+        Holds an exclusive lock for the whole rebuild; run in a maintenance window.
+
+        Returns:
+            int: Bytes the file shrank by
+        """
+        before = RetentionService.storage_stats().get("file_bytes", 0)
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.exec_driver_sql("VACUUM")
+        after = RetentionService.storage_stats().get("file_bytes", 0)
+        return before - after
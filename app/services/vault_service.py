@@ -0,0 +1,103 @@
+"""
+Vault maintenance service
+"""
+from typing import Any, Dict, Optional
+from sqlalchemy import func, or_
+from app.models.service import Service
+from app.models.user import User
+from app import db
+from app.utils import records
+from app.utils.encryption import get_kdf_policy
+import logging
+
+logger = logging.getLogger(__name__)
+
+class VaultService:
+    """Service for converting services to envelope-encrypted AES-GCM records"""
+
+    @staticmethod
+    def outdated_filter():
+        """Filter matching services not yet stored as vault records with the current KDF policy"""
+        algorithm, iterations = get_kdf_policy()
+        prefix = records.header_prefix(records.KDF_IDS[algorithm], iterations)
+        return or_(
+            Service.wrapped_data_key.is_(None),
+            Service.password_record.is_(None),
+            func.substr(Service.wrapped_data_key, 1, len(prefix)) != prefix
+        )
+
+    
+    @staticmethod
+    def migrate_user(user: User, master_password: Optional[str] = None) -> Dict[str, int]:
+        """
+        Convert a user's services in older formats to vault records
+        
+        This is the background counterpart of the lazy rewrite done when a
+        single service is read.
+        
+        Args:
+            user (User): Owner of the services
+            master_password (str, optional): Master secret, defaults to the password hash
+            
+        Returns:
+            dict: Counts of migrated and failed services
+        """
+        master_password = master_password or user.password_hash
+        legacy_services = Service.query.filter(
+            Service.user_id == user.id,
+            VaultService.outdated_filter()
+        ).options(Service.with_secrets()).all()
+        
+        result = {"migrated": 0, "failed": 0}
+        if not legacy_services:
+            return result
+        
+        try:
+            vault_key = user.get_vault_key(master_password)
+            for service in legacy_services:
+                password = service.get_service_password(master_password, vault_key)
+                values = None
+                if password is not None:
+                    values = service.encrypt_password_columns(password, master_password, vault_key)
+                if values is None:
+                    result["failed"] += 1
+                    continue
+                service.apply_columns(values)
+                result["migrated"] += 1
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error migrating vault for user {user.id}: {e}")
+            return {"migrated": 0, "failed": len(legacy_services)}
+        
+        logger.info(f"Migrated {result['migrated']} services to vault records for user {user.id}")
+        return result
+    
+    @staticmethod
+    def migrate_all(batch_size: int = 100) -> Dict[str, Any]:
+        """
+        Migrate every user that still has legacy services
+        
+        Args:
+            batch_size (int): Users loaded per query
+            
+        Returns:
+            dict: Totals over all users
+        """
+        totals = {"users": 0, "migrated": 0, "failed": 0}
+        last_id = 0
+        while True:
+            users = User.query.filter(
+                User.id > last_id,
+                User.services.any(VaultService.outdated_filter())
+            ).order_by(User.id).limit(batch_size).all()
+            if not users:
+                break
+            for user in users:
+                result = VaultService.migrate_user(user)
+                totals["users"] += 1
+                totals["migrated"] += result["migrated"]
+                totals["failed"] += result["failed"]
+            last_id = users[-1].id
+            db.session.expunge_all()
+        return totals
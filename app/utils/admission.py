@@ -0,0 +1,144 @@
+"""
+Admission control for CPU-heavy (crypto) views
+"""
+import threading
+import logging
+from functools import wraps
+from typing import Any, Dict, Iterable, Optional
+
+from flask import request, make_response
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionController:
+    """
+    Concurrency limiter with a bounded wait queue
+
+    At most ``max_concurrent`` crypto-heavy requests run at once. Up to
+    ``max_queue`` more wait for a slot for ``queue_timeout`` seconds; any
+    other request is shed immediately with 503 and a Retry-After header, so
+    cheap pages keep their worker threads.
+    """
+
+    def __init__(self, max_concurrent: int = 4, max_queue: int = 16,
+                 queue_timeout: float = 2.0, retry_after: int = 2):
+        self._cond = threading.Condition()
+        self.enabled = True
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._reset_counters()
+
+    def _reset_counters(self) -> None:
+        self._active = 0
+        self._waiting = 0
+        self._admitted = 0
+        self._shed_queue_full = 0
+        self._shed_timeout = 0
+
+    def init_app(self, app) -> None:
+        """
+        Configure limiter from Flask app config
+
+        Args:
+            app (Flask): Flask application
+        """
+        with self._cond:
+            self.enabled = app.config.get('ADMISSION_ENABLED', True)
+            self.max_concurrent = app.config.get('ADMISSION_MAX_CONCURRENT', 4)
+            self.max_queue = app.config.get('ADMISSION_MAX_QUEUE', 16)
+            self.queue_timeout = app.config.get('ADMISSION_QUEUE_TIMEOUT', 2.0)
+            self.retry_after = app.config.get('ADMISSION_RETRY_AFTER', 2)
+            self._reset_counters()
+        app.extensions['admission_controller'] = self
+
+    def acquire(self) -> bool:
+        """
+        Take a slot, waiting in the queue if necessary
+
+        Returns:
+            bool: True if admitted, False if the request must be shed
+        """
+        with self._cond:
+            if self._active < self.max_concurrent and self._waiting == 0:
+                self._active += 1
+                self._admitted += 1
+                return True
+            if self._waiting >= self.max_queue:
+                self._shed_queue_full += 1
+                return False
+
+            self._waiting += 1
+            try:
+                admitted = self._cond.wait_for(lambda: self._active < self.max_concurrent, self.queue_timeout)
+            finally:
+                self._waiting -= 1
+            if not admitted:
+                self._shed_timeout += 1
+                return False
+            self._active += 1
+            self._admitted += 1
+            return True
+
+    def release(self) -> None:
+        """Return a slot and wake one waiting request"""
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+
+    def limit(self, methods: Optional[Iterable[str]] = None):
+        """
+        Decorator limiting concurrent executions of a view
+
+        Args:
+            methods (iterable, optional): Only limit these HTTP methods (default: all)
+        """
+        limited_methods = {m.upper() for m in methods} if methods else None
+
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                if not self.enabled or (limited_methods and request.method not in limited_methods):
+                    return f(*args, **kwargs)
+                if not self.acquire():
+                    logger.warning(f"Shedding request to {request.endpoint}: crypto capacity exhausted")
+                    return self.overloaded_response()
+                try:
+                    return f(*args, **kwargs)
+                finally:
+                    self.release()
+            return decorated_function
+        return decorator
+
+    def overloaded_response(self):
+        """503 response sent to shed requests"""
+        response = make_response("Hệ thống đang quá tải, vui lòng thử lại sau.", 503)
+        response.headers['Retry-After'] = str(self.retry_after)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get limiter statistics
+
+        Returns:
+            dict: Configuration, current load and shed counters
+        """
+        with self._cond:
+            return {
+                "enabled": self.enabled,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "queue_timeout": self.queue_timeout,
+                "active": self._active,
+                "waiting": self._waiting,
+                "admitted": self._admitted,
+                "shed_queue_full": self._shed_queue_full,
+                "shed_timeout": self._shed_timeout,
+                "shed_total": self._shed_queue_full + self._shed_timeout,
+            }
+
+
+admission_controller = AdmissionController()
+crypto_heavy = admission_controller.limit
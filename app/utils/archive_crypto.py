@@ -0,0 +1,214 @@
+"""
+Streaming passphrase encryption of export archives
+
+The archive is cut into segments that are sealed one by one with AES-GCM,
+so a vault of any size is encrypted and decrypted in constant memory.
+Layout (all integers big endian):
+
+    offset  size  field
+    0       4     magic b'PMX1'
+    4       1     KDF id (see KDF_IDS)
+    5       4     KDF work factor: PBKDF2 iterations or the scrypt cost N
+    9       1     salt length n
+    10      n     salt
+    10+n    7     nonce prefix
+    then per segment:
+            4     ciphertext length, top bit set on the last segment
+            ...   ciphertext followed by the 16 byte GCM tag
+
+The nonce of a segment is the prefix, a 4 byte segment counter and a flag
+byte that is 1 only on the last segment. The header is authenticated as
+associated data of every segment, so reordered, dropped or truncated
+segments and tampered KDF parameters all fail to decrypt.
+
+An archive leaves the server, so its key is derived with a KDF of its own
+(EXPORT_KDF_*) that is much stronger than the one of service records, and
+never goes through the derived-key cache.
+"""
+import os
+import struct
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple
+
+from flask import current_app, has_app_context
+
+# cryptography is imported on first use to keep application startup fast
+
+MAGIC = b'PMX1'
+SEGMENT_SIZE = 64 * 1024
+NONCE_PREFIX_SIZE = 7
+
+# KDF name -> id in the header; the PBKDF2 ids match app.utils.records
+KDF_IDS = {
+    'pbkdf2_sha256': 1,
+    'pbkdf2_sha512': 2,
+    'scrypt': 3,
+}
+KDF_NAMES = {kdf_id: name for name, kdf_id in KDF_IDS.items()}
+
+# Policy for new archives when there is no app config
+DEFAULT_KDF = ('scrypt', 2 ** 17)
+MIN_PBKDF2_ITERATIONS = 600000
+MIN_SCRYPT_N = 2 ** 14
+# Upper bound read from a header, so a crafted archive cannot ask for gigabytes
+MAX_SCRYPT_N = 2 ** 20
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+_FIXED = struct.Struct('>4sBIB')
+_LENGTH = struct.Struct('>I')
+_LAST = 0x80000000
+
+
+def get_export_kdf() -> Tuple[str, int]:
+    """
+    KDF for new archives: EXPORT_KDF_ALGORITHM with EXPORT_SCRYPT_N or EXPORT_KDF_ITERATIONS
+
+    Returns:
+        tuple: (algorithm, work factor)
+    """
+    if not has_app_context():
+        return DEFAULT_KDF
+    algorithm = current_app.config.get('EXPORT_KDF_ALGORITHM', DEFAULT_KDF[0])
+    if algorithm == 'scrypt':
+        return algorithm, current_app.config.get('EXPORT_SCRYPT_N', DEFAULT_KDF[1])
+    return algorithm, current_app.config.get('EXPORT_KDF_ITERATIONS', MIN_PBKDF2_ITERATIONS)
+
+
+def check_export_kdf(algorithm: str, work_factor: int) -> None:
+    """
+    Reject KDF settings too weak (or too large) for new archives
+
+    Raises:
+        ValueError: If the algorithm is unknown or the work factor out of range
+    """
+    if algorithm not in KDF_IDS:
+        raise ValueError(f"Unknown export KDF: {algorithm}")
+    if algorithm == 'scrypt':
+        if not MIN_SCRYPT_N <= work_factor <= MAX_SCRYPT_N or work_factor & (work_factor - 1):
+            raise ValueError(f"scrypt N must be a power of two between {MIN_SCRYPT_N} and {MAX_SCRYPT_N}")
+    elif work_factor < MIN_PBKDF2_ITERATIONS:
+        raise ValueError(f"Export PBKDF2 needs at least {MIN_PBKDF2_ITERATIONS} iterations")
+
+
+def _derive_key(passphrase: str, kdf_id: int, work_factor: int, salt: bytes) -> bytes:
+    """32 byte AES key for a passphrase"""
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+    from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+
+    name = KDF_NAMES.get(kdf_id)
+    if name is None:
+        raise ValueError(f"Unknown KDF id: {kdf_id}")
+    if name == 'scrypt':
+        if work_factor > MAX_SCRYPT_N:
+            raise ValueError("Archive asks for a scrypt cost above the limit")
+        kdf = Scrypt(salt=salt, length=32, n=work_factor, r=SCRYPT_R, p=SCRYPT_P)
+    else:
+        algorithm = hashes.SHA512() if name == 'pbkdf2_sha512' else hashes.SHA256()
+        kdf = PBKDF2HMAC(algorithm=algorithm, length=32, salt=salt, iterations=work_factor)
+    return kdf.derive(passphrase.encode())
+
+
+def _nonce(prefix: bytes, counter: int, last: bool) -> bytes:
+    if counter >= 2 ** 32:
+        raise ValueError("Archive has too many segments")
+    return prefix + struct.pack('>IB', counter, 1 if last else 0)
+
+
+def encrypt_stream(chunks: Iterable[bytes], passphrase: str, segment_size: int = SEGMENT_SIZE,
+                   kdf: Optional[Tuple[str, int]] = None) -> Iterator[bytes]:
+    """
+    Encrypt a stream of bytes with a passphrase
+
+    The header is yielded before the first chunk is read; afterwards one
+    sealed segment is yielded per segment_size bytes of input.
+
+    Args:
+        chunks (iterable): Plaintext chunks
+        passphrase (str): Archive passphrase
+        segment_size (int): Plaintext bytes per segment
+        kdf (tuple, optional): (algorithm, work factor), default get_export_kdf()
+
+    Yields:
+        bytes: Header, then sealed segments
+
+    Raises:
+        ValueError: If the passphrase is empty or the KDF too weak
+    """
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+    if not passphrase:
+        raise ValueError("Passphrase cannot be empty")
+    algorithm, work_factor = kdf or get_export_kdf()
+    check_export_kdf(algorithm, work_factor)
+    kdf_id = KDF_IDS[algorithm]
+    salt = os.urandom(16)
+    prefix = os.urandom(NONCE_PREFIX_SIZE)
+    header = _FIXED.pack(MAGIC, kdf_id, work_factor, len(salt)) + salt + prefix
+    yield header
+
+    aead = AESGCM(_derive_key(passphrase, kdf_id, work_factor, salt))
+    counter = 0
+    buffer = bytearray()
+
+    def sealed(data: bytes, last: bool) -> bytes:
+        ciphertext = aead.encrypt(_nonce(prefix, counter, last), data, header)
+        return _LENGTH.pack(len(ciphertext) | (_LAST if last else 0)) + ciphertext
+
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= segment_size:
+            yield sealed(bytes(buffer[:segment_size]), False)
+            del buffer[:segment_size]
+            counter += 1
+    # The last segment may be empty; it marks the end of the archive
+    yield sealed(bytes(buffer), True)
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError("Archive is truncated")
+    return data
+
+
+def _read_header(stream: BinaryIO) -> Tuple[bytes, int, int, bytes, bytes]:
+    fixed = _read_exact(stream, _FIXED.size)
+    magic, kdf_id, work_factor, salt_length = _FIXED.unpack(fixed)
+    if magic != MAGIC:
+        raise ValueError("Not an encrypted export archive")
+    salt = _read_exact(stream, salt_length)
+    prefix = _read_exact(stream, NONCE_PREFIX_SIZE)
+    return fixed + salt + prefix, kdf_id, work_factor, salt, prefix
+
+
+def decrypt_stream(stream: BinaryIO, passphrase: str) -> Iterator[bytes]:
+    """
+    Decrypt an archive written by encrypt_stream()
+
+    Args:
+        stream (file): Binary file object positioned at the archive start
+        passphrase (str): Archive passphrase
+
+    Yields:
+        bytes: Plaintext of each segment
+
+    Raises:
+        ValueError: If the archive is not in this format or is truncated
+        cryptography.exceptions.InvalidTag: If the passphrase is wrong or the archive was modified
+    """
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+    header, kdf_id, work_factor, salt, prefix = _read_header(stream)
+    aead = AESGCM(_derive_key(passphrase, kdf_id, work_factor, salt))
+    counter = 0
+    while True:
+        (length,) = _LENGTH.unpack(_read_exact(stream, _LENGTH.size))
+        last = bool(length & _LAST)
+        ciphertext = _read_exact(stream, length & ~_LAST)
+        yield aead.decrypt(_nonce(prefix, counter, last), ciphertext, header)
+        if last:
+            break
+        counter += 1
+    if stream.read(1):
+        raise ValueError("Unexpected data after the last segment")
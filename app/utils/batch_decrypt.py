@@ -0,0 +1,189 @@
+"""
+Parallel batch decryption of service passwords
+"""
+import atexit
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.utils.vault import VaultKey, StoredPassword, decrypt_stored_password, needs_own_kdf
+
+logger = logging.getLogger(__name__)
+
+DECRYPT_ERROR = "Could not decrypt password"
+
+# (password, error) per row; error is None on success
+LegacyResult = Tuple[Optional[str], Optional[str]]
+
+
+def _decrypt_legacy_chunk(master_password: str, chunk: List[StoredPassword]) -> List[LegacyResult]:
+    """
+    Decrypt rows that need their own PBKDF2 run (runs on a pool worker)
+
+    Errors are returned as strings instead of logged here, since a process
+    worker's log records do not reach the parent's handlers.
+    """
+    results = []
+    for stored in chunk:
+        try:
+            results.append((decrypt_stored_password(stored, master_password), None))
+        except Exception as e:
+            results.append((None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+class BatchDecryptor:
+    """
+    Decrypts many service passwords at once
+
+    Enveloped rows only need a cheap unwrap with the already derived vault
+    key and are handled inline. Rows without a vault key (legacy Fernet or
+    records with their own KDF parameters) each need a full PBKDF2 run, so
+    they are split into one chunk per worker and derived in parallel.
+    Results always come back in input order.
+
+    Rows whose chunk misses the timeout come back as None. If a process
+    pool breaks, it is discarded and the batch is decrypted inline.
+    """
+
+    def __init__(self, kind: str = 'inline', max_workers: int = 2, threshold: int = 4, timeout: float = 30):
+        self._lock = threading.Lock()
+        self._pool = None
+        self.kind = kind
+        self.max_workers = max_workers
+        self.threshold = threshold
+        self.timeout = timeout
+        self._timeouts = 0
+        self._broken = 0
+
+    def init_app(self, app) -> None:
+        """
+        Configure decryptor from Flask app config
+
+        Args:
+            app (Flask): Flask application
+        """
+        self.shutdown()
+        self.kind = app.config.get('DECRYPT_EXECUTOR', 'thread')
+        self.max_workers = app.config.get('DECRYPT_WORKERS', 2)
+        self.threshold = app.config.get('DECRYPT_PARALLEL_THRESHOLD', 4)
+        self.timeout = app.config.get('DECRYPT_TIMEOUT', 30)
+        self._timeouts = self._broken = 0
+        app.extensions['batch_decryptor'] = self
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                if self.kind == 'process':
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='decrypt')
+            return self._pool
+
+    def decrypt(self, records: Sequence[StoredPassword], master_password: str,
+                vault_key: Optional[VaultKey] = None) -> List[Optional[str]]:
+        """
+        Decrypt a batch of encrypted records
+
+        Args:
+            records (sequence): StoredPassword per service
+            master_password (str): Master password for decryption
+            vault_key (VaultKey, optional): Vault key for enveloped records
+
+        Returns:
+            list: Decrypted passwords in input order, None where decryption failed
+        """
+        results: List[Optional[str]] = [None] * len(records)
+        legacy_indexes = []
+        for index, stored in enumerate(records):
+            if not (stored.ciphertext or stored.record):
+                continue
+            try:
+                if needs_own_kdf(stored):
+                    legacy_indexes.append(index)
+                else:
+                    results[index] = decrypt_stored_password(stored, master_password, vault_key)
+            except Exception as e:
+                logger.error(f"Error decrypting record {index}: {e}")
+
+        legacy = [records[i] for i in legacy_indexes]
+        for index, (password, error) in zip(legacy_indexes, self._decrypt_legacy(legacy, master_password)):
+            if error:
+                logger.error(f"Error decrypting record {index}: {error}")
+            results[index] = password
+        return results
+
+    def _decrypt_legacy(self, legacy: List[StoredPassword], master_password: str) -> List[LegacyResult]:
+        if self.kind == 'inline' or len(legacy) < self.threshold or self.max_workers < 2:
+            return _decrypt_legacy_chunk(master_password, legacy)
+
+        # One contiguous chunk per worker keeps the order trivial to restore
+        size = -(-len(legacy) // self.max_workers)
+        chunks = [legacy[i:i + size] for i in range(0, len(legacy), size)]
+        pool = self._get_pool()
+        try:
+            futures = [pool.submit(_decrypt_legacy_chunk, master_password, chunk) for chunk in chunks]
+        except (BrokenProcessPool, RuntimeError) as e:
+            self._discard_pool(pool, e)
+            return _decrypt_legacy_chunk(master_password, legacy)
+
+        deadline = time.monotonic() + self.timeout
+        results: List[LegacyResult] = []
+        for future, chunk in zip(futures, chunks):
+            try:
+                results.extend(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except FutureTimeoutError:
+                future.cancel()
+                with self._lock:
+                    self._timeouts += 1
+                logger.error(f"Decrypting {len(chunk)} records timed out after {self.timeout}s")
+                results.extend([(None, None)] * len(chunk))
+            except BrokenProcessPool as e:
+                # A worker died (e.g. killed by the OS); finish this chunk here
+                self._discard_pool(pool, e)
+                results.extend(_decrypt_legacy_chunk(master_password, chunk))
+        return results
+
+    def _discard_pool(self, pool, error: Exception) -> None:
+        """Drop a broken pool so the next batch starts a fresh one"""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+            self._broken += 1
+        logger.error(f"Decryption pool failed, decrypting inline: {error}")
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def decrypt_services(self, services: Sequence[Any], master_password: str,
+                         vault_key: Optional[VaultKey] = None) -> List[Optional[str]]:
+        """
+        Decrypt the passwords of Service rows
+
+        Args:
+            services (sequence): Service objects
+            master_password (str): Master password for decryption
+            vault_key (VaultKey, optional): Owner's vault key
+
+        Returns:
+            list: Decrypted passwords in input order, None where decryption failed
+        """
+        records = [service.stored_password for service in services]
+        return self.decrypt(records, master_password, vault_key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "max_workers": self.max_workers, "threshold": self.threshold,
+                "timeout": self.timeout, "timeouts": self._timeouts, "broken_pools": self._broken}
+
+    def shutdown(self) -> None:
+        """Shut down the worker pool if it was started"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+batch_decryptor = BatchDecryptor()
+atexit.register(batch_decryptor.shutdown)
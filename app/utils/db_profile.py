@@ -0,0 +1,125 @@
+"""
+Connection-time engine profile for SQLite
+"""
+import logging
+from typing import Any, Dict, List, Mapping, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+_POOL_ARGS = ('pool_size', 'max_overflow', 'pool_timeout')
+
+
+def sqlite_pragmas(config: Mapping[str, Any]) -> List[Tuple[str, Any]]:
+    """
+    PRAGMAs to run on each new SQLite connection, in order
+
+    Args:
+        config (mapping): Flask config or any mapping with the SQLITE_* keys
+
+    Returns:
+        list: (pragma, value) pairs
+    """
+    pragmas = [
+        ('journal_mode', config.get('SQLITE_JOURNAL_MODE', 'WAL')),
+        ('synchronous', config.get('SQLITE_SYNCHRONOUS', 'NORMAL')),
+        ('busy_timeout', config.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        ('mmap_size', config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        ('cache_size', config.get('SQLITE_CACHE_SIZE', -65536)),
+        ('foreign_keys', 'ON' if config.get('SQLITE_FOREIGN_KEYS', True) else 'OFF'),
+    ]
+    return [(name, value) for name, value in pragmas if value is not None]
+
+
+def apply_pragmas(dbapi_connection, pragmas: List[Tuple[str, Any]]) -> None:
+    """
+    Run PRAGMAs on a raw DB-API connection
+
+    Args:
+        dbapi_connection: sqlite3 connection
+        pragmas (list): (pragma, value) pairs from sqlite_pragmas()
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def sqlite_engine_options(uri: str, options: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Drop pool sizing options that the SQLite pool in use does not accept
+
+    In-memory databases use a single static connection, so pool_size,
+    max_overflow and pool_timeout would make engine creation fail.
+
+    Args:
+        uri (str): Database URI
+        options (mapping): SQLALCHEMY_ENGINE_OPTIONS
+
+    Returns:
+        dict: Options safe to pass to create_engine
+    """
+    options = dict(options)
+    if uri and uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') == 'sqlite:'):
+        for name in _POOL_ARGS:
+            options.pop(name, None)
+    return options
+
+
+def init_engine_profile(app) -> Dict[str, Any]:
+    """
+    Prepare SQLALCHEMY_ENGINE_OPTIONS; call before db.init_app(app)
+
+    Args:
+        app (Flask): Flask application
+
+    Returns:
+        dict: Engine options that will be used
+    """
+    options = sqlite_engine_options(
+        app.config.get('SQLALCHEMY_DATABASE_URI') or '',
+        app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+    )
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    return options
+
+
+def register_sqlite_pragmas(app, engines) -> int:
+    """
+    Apply the PRAGMA profile to every new connection of the SQLite engines
+
+    Args:
+        app (Flask): Flask application
+        engines (iterable): Engines to configure (e.g. db.engines.values())
+
+    Returns:
+        int: Number of engines configured
+    """
+    if not app.config.get('SQLITE_PRAGMAS_ENABLED', True):
+        return 0
+    pragmas = sqlite_pragmas(app.config)
+    count = 0
+    for engine in engines:
+        if engine.dialect.name != 'sqlite':
+            continue
+
+        def on_connect(dbapi_connection, connection_record, pragmas=pragmas):
+            apply_pragmas(dbapi_connection, pragmas)
+
+        event.listen(engine, 'connect', on_connect)
+        count += 1
+        logger.debug(f"SQLite PRAGMAs registered for {engine.url}: {pragmas}")
+    return count
+
+
+def pool_stats(engine) -> Dict[str, Any]:
+    """Checked-out and idle connections of a QueuePool engine"""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    return {"pool": "QueuePool", "size": pool.size(), "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(), "idle": pool.checkedin()}
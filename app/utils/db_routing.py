@@ -0,0 +1,160 @@
+"""
+Read/write routing between the primary database and a read replica bind
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from flask import has_request_context, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+logger = logging.getLogger(__name__)
+
+# session.info key set once the session has written to the primary
+WROTE_KEY = 'db_wrote'
+# Flask session key: read from the primary until this timestamp
+STICKY_KEY = '_db_primary_until'
+
+_replica_reads: ContextVar[bool] = ContextVar('replica_reads', default=False)
+
+
+@contextmanager
+def replica_reads():
+    """
+    Send reads inside the block (or decorated function) to the replica bind
+
+    Writes always go to the primary. Once the session has written, reads go
+    to the primary too, so a request sees its own writes.
+    """
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """
+    Send reads inside the block (or decorated function) to the primary
+
+    For reads that a write depends on, even when called from code running
+    in replica_reads().
+    """
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class RoutingSession(Session):
+    """
+    Flask-SQLAlchemy session that routes reads in replica_reads() to the replica
+
+    Pass as session_options={'class_': RoutingSession}. Without a configured
+    replica bind it behaves exactly like the default session.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if isinstance(clause, UpdateBase):
+            # Bulk INSERT/UPDATE/DELETE statements bypass the flush
+            self.info[WROTE_KEY] = True
+        elif bind is None and not self._flushing and _replica_reads.get():
+            engine = db_router.read_engine(self)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_wrote(session, flush_context) -> None:
+    session.info[WROTE_KEY] = True
+
+
+class DBRouter:
+    """
+    Decides where replica-eligible reads go and counts the decisions
+
+    Reads go to the primary after the session has written, and for
+    sticky_seconds after a request that wrote (kept in the Flask session),
+    so a redirect after a POST does not read a lagging replica.
+    """
+
+    def __init__(self, bind: Optional[str] = None, sticky_seconds: float = 5):
+        self.bind = bind
+        self.sticky_seconds = sticky_seconds
+        self._lock = threading.Lock()
+        self._replica_reads = 0
+        self._primary_reads = 0
+
+    def init_app(self, app) -> None:
+        """
+        Configure routing from Flask app config; call after db.init_app(app)
+
+        Args:
+            app (Flask): Flask application
+        """
+        db = app.extensions['sqlalchemy']
+        bind = app.config.get('DB_REPLICA_BIND', 'replica')
+        self.bind = bind if bind in (app.config.get('SQLALCHEMY_BINDS') or {}) else None
+        self.sticky_seconds = app.config.get('DB_REPLICA_STICKY_SECONDS', 5)
+        with self._lock:
+            self._replica_reads = self._primary_reads = 0
+
+        if self.bind:
+            with app.app_context():
+                engine = db.engines[self.bind]
+            if engine.dialect.name == 'sqlite':
+                @event.listens_for(engine, 'connect')
+                def read_only_connection(dbapi_connection, connection_record):
+                    dbapi_connection.execute("PRAGMA query_only=ON")
+
+            @app.after_request
+            def remember_write(response):
+                if self.sticky_seconds > 0 and db.session().info.get(WROTE_KEY):
+                    flask_session[STICKY_KEY] = time.time() + self.sticky_seconds
+                return response
+
+            logger.info(f"Read replica bind '{self.bind}' enabled")
+        app.extensions['db_router'] = self
+
+    def read_engine(self, session: Session):
+        """
+        Engine for a replica-eligible read, or None to use the primary
+
+        Args:
+            session (Session): Session running the read
+
+        Returns:
+            Engine: Replica engine or None
+        """
+        if not self.bind:
+            return None
+        if session.info.get(WROTE_KEY) or self._sticky():
+            with self._lock:
+                self._primary_reads += 1
+            return None
+        with self._lock:
+            self._replica_reads += 1
+        return session._db.engines[self.bind]
+
+    def _sticky(self) -> bool:
+        return has_request_context() and flask_session.get(STICKY_KEY, 0) > time.time()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counts of reads sent to the replica and kept on the primary after a write"""
+        with self._lock:
+            return {
+                "replica_bind": self.bind,
+                "replica_reads": self._replica_reads,
+                "primary_reads_after_write": self._primary_reads,
+            }
+
+
+db_router = DBRouter()
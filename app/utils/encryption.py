@@ -4,31 +4,112 @@ Encryption utilities for password management
 import base64
 import secrets
 import logging
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from typing import Tuple
+from app.utils.key_cache import key_cache
 
 logger = logging.getLogger(__name__)
 
+# KDF of rows written before the parameters were stored per record
+PBKDF2_ITERATIONS = 100000
+DEFAULT_KDF_ALGORITHM = 'pbkdf2_sha256'
+
+# KDF name -> hash class in cryptography.hazmat.primitives.hashes
+KDF_HASHES = {
+    'pbkdf2_sha256': 'SHA256',
+    'pbkdf2_sha512': 'SHA512',
+}
+
+# Policy for new writes, see init_kdf_policy()
+_kdf_policy = (DEFAULT_KDF_ALGORITHM, PBKDF2_ITERATIONS)
+
+
+def _fernet(key: bytes):
+    """Fernet for a key; cryptography is imported on first use to keep application startup fast"""
+    from cryptography.fernet import Fernet
+    return Fernet(key)
+
+
+def get_kdf_policy() -> Tuple[str, int]:
+    """
+    Get the KDF used for new records
+    
+    Returns:
+        tuple: (algorithm, iterations)
+    """
+    return _kdf_policy
+
+
+def set_kdf_policy(algorithm: str, iterations: int) -> None:
+    """
+    Set the KDF used for new records
+    
+    Existing records keep the parameters stored in their header.
+    
+    Args:
+        algorithm (str): Name in KDF_HASHES
+        iterations (int): Iteration count
+    """
+    global _kdf_policy
+    if algorithm not in KDF_HASHES:
+        raise ValueError(f"Unknown KDF algorithm: {algorithm}")
+    if not 1 <= int(iterations) < 2 ** 32:
+        raise ValueError(f"Invalid KDF iteration count: {iterations}")
+    _kdf_policy = (algorithm, int(iterations))
+
+
+def init_kdf_policy(app) -> None:
+    """
+    Apply KDF policy from Flask app config (KDF_ALGORITHM, KDF_ITERATIONS)
+    
+    Args:
+        app (Flask): Flask application
+    """
+    set_kdf_policy(
+        app.config.get('KDF_ALGORITHM', DEFAULT_KDF_ALGORITHM),
+        app.config.get('KDF_ITERATIONS', PBKDF2_ITERATIONS),
+    )
+
+
 class EncryptionService:
     """
     Service for encrypting and decrypting sensitive data using Fernet encryption
     """
     
-    def __init__(self, master_password: str, salt: str = None):
+    def __init__(self, master_password: str, salt: str = None, iterations: int = PBKDF2_ITERATIONS,
+                 algorithm: str = DEFAULT_KDF_ALGORITHM):
         """
         Initialize encryption service with master password
         
         Args:
             master_password (str): Master password for encryption/decryption
             salt (str, optional): Salt for key derivation. If None, generates new salt
+            iterations (int): PBKDF2 iteration count
+            algorithm (str): KDF name in KDF_HASHES
         """
         if not master_password:
             raise ValueError("Master password cannot be empty")
             
         self.master_password = master_password
         self.salt = salt or secrets.token_hex(16)
-        self._key = self._derive_key()
+        self.iterations = iterations
+        if algorithm not in KDF_HASHES:
+            raise ValueError(f"Unknown KDF algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self._key = self._get_key()
+
+    def _get_key(self) -> bytes:
+        """
+        Get encryption key from the derived-key cache, deriving it on a miss
+        
+        Returns:
+            bytes: Derived encryption key
+        """
+        params = (self.algorithm, self.salt, self.iterations)
+        key = key_cache.get(self.master_password, params)
+        if key is None:
+            key = self._derive_key()
+            key_cache.put(self.master_password, params, key)
+        return key
 
     def _derive_key(self) -> bytes:
         """
@@ -37,12 +118,14 @@ class EncryptionService:
         Returns:
             bytes: Derived encryption key
         """
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
         try:
             kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
+                algorithm=getattr(hashes, KDF_HASHES[self.algorithm])(),
                 length=32,
                 salt=self.salt.encode(),
-                iterations=100000,
+                iterations=self.iterations,
             )
             return base64.urlsafe_b64encode(kdf.derive(self.master_password.encode()))
         except Exception as e:
@@ -63,7 +146,7 @@ class EncryptionService:
             raise ValueError("Plaintext cannot be empty")
             
         try:
-            f = Fernet(self._key)
+            f = _fernet(self._key)
             encrypted = f.encrypt(plaintext.encode())
             return encrypted.decode()
         except Exception as e:
@@ -84,13 +167,50 @@ class EncryptionService:
             raise ValueError("Encrypted text cannot be empty")
             
         try:
-            f = Fernet(self._key)
+            f = _fernet(self._key)
             decrypted = f.decrypt(encrypted_text.encode())
             return decrypted.decode()
         except Exception as e:
             logger.error(f"Error decrypting text: {e}")
             raise
 
+    def get_raw_key(self) -> bytes:
+        """
+        Get the derived key as 32 raw bytes (for AES-GCM records)
+        
+        Returns:
+            bytes: Raw derived key
+        """
+        return base64.urlsafe_b64decode(self._key)
+
+    def encrypt_bytes(self, data: bytes) -> bytes:
+        """
+        Encrypt raw bytes (e.g. a data key) using Fernet encryption
+        
+        Args:
+            data (bytes): Bytes to encrypt
+            
+        Returns:
+            bytes: Fernet token
+        """
+        if not data:
+            raise ValueError("Data cannot be empty")
+        return _fernet(self._key).encrypt(data)
+
+    def decrypt_bytes(self, token: bytes) -> bytes:
+        """
+        Decrypt a Fernet token produced by encrypt_bytes
+        
+        Args:
+            token (bytes): Fernet token
+            
+        Returns:
+            bytes: Decrypted bytes
+        """
+        if not token:
+            raise ValueError("Token cannot be empty")
+        return _fernet(self._key).decrypt(token)
+
     def get_salt(self) -> str:
         """
         Get the salt used for key derivation
@@ -0,0 +1,280 @@
+"""
+Password hasher registry
+
+Stored hashes are tagged as ``<algorithm>$<version>$<payload>`` so several
+algorithms can live side by side in ``User.password_hash``. Untagged bcrypt
+hashes written before the registry existed are still recognised.
+"""
+import base64
+import hashlib
+import hmac
+import re
+import secrets
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+_BCRYPT_NATIVE_RE = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + '=' * (-len(data) % 4))
+
+
+class PasswordHasher(ABC):
+    """Base class for password hashing backends"""
+
+    algorithm: str = ''
+    version: int = 1
+
+    def configure(self, **params: Any) -> None:
+        """
+        Update tunable parameters used for new hashes
+
+        Args:
+            **params: Backend specific parameters
+        """
+        for name, value in params.items():
+            if value is None:
+                continue
+            if name not in self.params():
+                raise ValueError(f"Unknown {self.algorithm} parameter: {name}")
+            setattr(self, name, value)
+
+    @abstractmethod
+    def params(self) -> Dict[str, Any]:
+        """Current parameters used for new hashes"""
+
+    @abstractmethod
+    def encode(self, password: bytes, **params: Any) -> str:
+        """
+        Hash a (peppered) password
+
+        Args:
+            password (bytes): Password bytes
+            **params: Per-call parameter overrides
+
+        Returns:
+            str: Tagged hash
+        """
+
+    @abstractmethod
+    def verify(self, password: bytes, encoded: str) -> bool:
+        """Check a (peppered) password against a tagged hash"""
+
+    @abstractmethod
+    def decode_params(self, encoded: str) -> Dict[str, Any]:
+        """Parameters a stored hash was created with"""
+
+    def must_update(self, encoded: str) -> bool:
+        """
+        Check whether a stored hash is weaker than the current parameters
+
+        Args:
+            encoded (str): Tagged hash produced by this backend
+
+        Returns:
+            bool: True if any cost parameter is below policy
+        """
+        stored = self.decode_params(encoded)
+        return any(stored.get(name, 0) < value for name, value in self.params().items()
+                   if isinstance(value, int))
+
+    def salt(self, encoded: str) -> Optional[str]:
+        """Salt part of a stored hash (for debugging purposes only)"""
+        return None
+
+    @property
+    def prefix(self) -> str:
+        return f"{self.algorithm}${self.version}$"
+
+    def _payload(self, encoded: str) -> str:
+        return encoded[len(self.prefix):] if encoded.startswith(self.prefix) else encoded
+
+
+class BcryptHasher(PasswordHasher):
+    """bcrypt, the original backend of this project"""
+
+    algorithm = 'bcrypt'
+
+    def __init__(self, rounds: int = 12):
+        self.rounds = rounds
+
+    def params(self) -> Dict[str, Any]:
+        return {"rounds": self.rounds}
+
+    def encode(self, password: bytes, rounds: Optional[int] = None) -> str:
+        # bcrypt is imported on first use to keep application startup fast
+        import bcrypt
+        hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds or self.rounds))
+        return self.prefix + hashed.decode('utf-8')
+
+    def verify(self, password: bytes, encoded: str) -> bool:
+        import bcrypt
+        return bcrypt.checkpw(password, self._payload(encoded).encode('utf-8'))
+
+    def decode_params(self, encoded: str) -> Dict[str, Any]:
+        match = _BCRYPT_NATIVE_RE.match(self._payload(encoded))
+        return {"rounds": int(match.group(1))} if match else {}
+
+    def salt(self, encoded: str) -> Optional[str]:
+        return self._payload(encoded)[:29]
+
+
+class ScryptHasher(PasswordHasher):
+    """stdlib hashlib.scrypt; n is the CPU/memory cost, r the block size, p the parallelism"""
+
+    algorithm = 'scrypt'
+
+    def __init__(self, n: int = 2 ** 15, r: int = 8, p: int = 1, dklen: int = 32):
+        self.n = n
+        self.r = r
+        self.p = p
+        self.dklen = dklen
+
+    def params(self) -> Dict[str, Any]:
+        return {"n": self.n, "r": self.r, "p": self.p}
+
+    def _derive(self, password: bytes, salt: bytes, n: int, r: int, p: int, dklen: int) -> bytes:
+        # scrypt needs 128 * n * r bytes per lane; leave headroom over the 32 MiB default
+        maxmem = 128 * n * r * (p + 1) + 1024 * 1024
+        return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p, maxmem=maxmem, dklen=dklen)
+
+    def encode(self, password: bytes, n: Optional[int] = None, r: Optional[int] = None,
+               p: Optional[int] = None) -> str:
+        n, r, p = n or self.n, r or self.r, p or self.p
+        salt = secrets.token_bytes(16)
+        digest = self._derive(password, salt, n, r, p, self.dklen)
+        return f"{self.prefix}n={n},r={r},p={p}${_b64encode(salt)}${_b64encode(digest)}"
+
+    def _split(self, encoded: str):
+        params, salt, digest = self._payload(encoded).split('$')
+        values = dict(item.split('=') for item in params.split(','))
+        return {k: int(v) for k, v in values.items()}, salt, digest
+
+    def verify(self, password: bytes, encoded: str) -> bool:
+        params, salt, digest = self._split(encoded)
+        expected = _b64decode(digest)
+        computed = self._derive(password, _b64decode(salt), params['n'], params['r'], params['p'], len(expected))
+        return hmac.compare_digest(computed, expected)
+
+    def decode_params(self, encoded: str) -> Dict[str, Any]:
+        return self._split(encoded)[0]
+
+    def salt(self, encoded: str) -> Optional[str]:
+        return self._split(encoded)[1]
+
+
+class Pbkdf2Hasher(PasswordHasher):
+    """stdlib PBKDF2-HMAC-SHA256"""
+
+    algorithm = 'pbkdf2_sha256'
+
+    def __init__(self, iterations: int = 600000):
+        self.iterations = iterations
+
+    def params(self) -> Dict[str, Any]:
+        return {"iterations": self.iterations}
+
+    def encode(self, password: bytes, iterations: Optional[int] = None) -> str:
+        iterations = iterations or self.iterations
+        salt = secrets.token_bytes(16)
+        digest = hashlib.pbkdf2_hmac('sha256', password, salt, iterations)
+        return f"{self.prefix}{iterations}${_b64encode(salt)}${_b64encode(digest)}"
+
+    def _split(self, encoded: str):
+        iterations, salt, digest = self._payload(encoded).split('$')
+        return int(iterations), salt, digest
+
+    def verify(self, password: bytes, encoded: str) -> bool:
+        iterations, salt, digest = self._split(encoded)
+        computed = hashlib.pbkdf2_hmac('sha256', password, _b64decode(salt), iterations)
+        return hmac.compare_digest(computed, _b64decode(digest))
+
+    def decode_params(self, encoded: str) -> Dict[str, Any]:
+        return {"iterations": self._split(encoded)[0]}
+
+    def salt(self, encoded: str) -> Optional[str]:
+        return self._split(encoded)[1]
+
+
+HASHERS: Dict[str, PasswordHasher] = {}
+
+_preferred_algorithm = 'bcrypt'
+
+
+def register_hasher(hasher: PasswordHasher) -> None:
+    """
+    Add a backend to the registry
+
+    Args:
+        hasher (PasswordHasher): Backend instance
+    """
+    HASHERS[hasher.algorithm] = hasher
+
+
+def get_hasher(algorithm: Optional[str] = None) -> PasswordHasher:
+    """
+    Get backend by name
+
+    Args:
+        algorithm (str, optional): Algorithm name, defaults to the preferred one
+
+    Returns:
+        PasswordHasher: Backend instance
+
+    Raises:
+        ValueError: If no backend is registered under that name
+    """
+    name = algorithm or _preferred_algorithm
+    try:
+        return HASHERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown password hasher: {name}")
+
+
+def identify_hasher(encoded: str) -> Optional[PasswordHasher]:
+    """
+    Find the backend that produced a stored hash
+
+    Args:
+        encoded (str): Stored password hash
+
+    Returns:
+        PasswordHasher: Backend, or None if the format is not recognised
+    """
+    if not encoded:
+        return None
+    if _BCRYPT_NATIVE_RE.match(encoded):
+        # Untagged hash from before the registry existed
+        return HASHERS.get('bcrypt')
+    algorithm = encoded.split('$', 1)[0]
+    return HASHERS.get(algorithm)
+
+
+def get_preferred_hasher() -> PasswordHasher:
+    """Backend used for new hashes"""
+    return get_hasher(_preferred_algorithm)
+
+
+def set_preferred_hasher(algorithm: str) -> None:
+    """
+    Select the backend used for new hashes
+
+    Args:
+        algorithm (str): Registered algorithm name
+    """
+    global _preferred_algorithm
+    get_hasher(algorithm)
+    _preferred_algorithm = algorithm
+
+
+register_hasher(BcryptHasher())
+register_hasher(ScryptHasher())
+register_hasher(Pbkdf2Hasher())
@@ -0,0 +1,190 @@
+"""
+Bounded worker pool for CPU-heavy password hashing
+"""
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+from app.utils.password_utils import hash_password, verify_password, get_hashing_policy
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ('inline', 'thread', 'process')
+
+
+class HashingBusyError(RuntimeError):
+    """Raised when the hashing queue is full or a hashing job times out"""
+
+
+class HashingExecutor:
+    """
+    Runs bcrypt hashing/verification on a dedicated, bounded worker pool
+
+    Requests submit work and wait for the result with a timeout. At most
+    ``max_workers + queue_depth`` jobs may be in flight at once; anything
+    beyond that is rejected immediately with HashingBusyError instead of
+    piling up behind the request threads.
+    """
+
+    def __init__(self, kind: str = 'inline', max_workers: int = 2,
+                 queue_depth: int = 32, timeout: Optional[float] = 5.0):
+        self._lock = threading.Lock()
+        self._pool = None
+        self.configure(kind, max_workers, queue_depth, timeout)
+
+    def init_app(self, app) -> None:
+        """
+        Configure executor from Flask app config
+
+        Args:
+            app (Flask): Flask application
+        """
+        self.configure(
+            kind=app.config.get('HASHING_EXECUTOR', 'thread'),
+            max_workers=app.config.get('HASHING_WORKERS', 2),
+            queue_depth=app.config.get('HASHING_QUEUE_DEPTH', 32),
+            timeout=app.config.get('HASHING_TIMEOUT', 5.0),
+        )
+        app.extensions['hashing_executor'] = self
+
+    def configure(self, kind: str = 'inline', max_workers: int = 2,
+                  queue_depth: int = 32, timeout: Optional[float] = 5.0) -> None:
+        """
+        (Re)configure the executor, shutting down any existing pool
+
+        Args:
+            kind (str): 'inline', 'thread' or 'process'
+            max_workers (int): Number of pool workers
+            queue_depth (int): Jobs allowed to wait for a free worker
+            timeout (float): Seconds to wait for a result, None waits forever
+        """
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown hashing executor kind: {kind}")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if queue_depth < 0:
+            raise ValueError("queue_depth cannot be negative")
+
+        self.shutdown()
+        with self._lock:
+            self.kind = kind
+            self.max_workers = max_workers
+            self.queue_depth = queue_depth
+            self.timeout = timeout
+            self._slots = threading.BoundedSemaphore(max_workers + queue_depth)
+            self._in_flight = 0
+            self._completed = 0
+            self._rejected = 0
+            self._timed_out = 0
+
+    def _get_pool(self):
+        """Create the worker pool lazily on first use"""
+        with self._lock:
+            if self._pool is None:
+                if self.kind == 'process':
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix='hashing'
+                    )
+                logger.info(f"Started {self.kind} hashing pool with {self.max_workers} workers")
+            return self._pool
+
+    def _release_slot(self, slots: threading.BoundedSemaphore) -> None:
+        """
+        Give back a slot taken from slots
+
+        A job keeps the semaphore it acquired: after configure() swapped in
+        a new one, a job still running on the old pool must not release
+        (and overflow) the new semaphore or skew the new job counters.
+        """
+        with self._lock:
+            if slots is self._slots:
+                self._in_flight -= 1
+                self._completed += 1
+        slots.release()
+
+    def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a function on the hashing pool and wait for its result
+
+        Args:
+            fn (callable): Function to run (must be picklable for process pools)
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Any: Result of fn
+
+        Raises:
+            HashingBusyError: If the queue is full or the job times out
+        """
+        if self.kind == 'inline':
+            return fn(*args, **kwargs)
+
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            logger.warning("Hashing queue is full, rejecting job")
+            raise HashingBusyError("Hashing queue is full")
+
+        with self._lock:
+            self._in_flight += 1
+
+        try:
+            future = self._get_pool().submit(fn, *args, **kwargs)
+        except Exception:
+            self._release_slot(slots)
+            raise
+        future.add_done_callback(lambda _future: self._release_slot(slots))
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FuturesTimeoutError:
+            future.cancel()
+            with self._lock:
+                self._timed_out += 1
+            logger.warning(f"Hashing job timed out after {self.timeout}s")
+            raise HashingBusyError("Hashing job timed out")
+
+    def hash_password(self, password: str) -> str:
+        """Hash password on the pool with the current hashing policy"""
+        return self.run(hash_password, password, **get_hashing_policy())
+
+    def verify_password(self, password: str, password_hash: str) -> bool:
+        """Verify password on the pool"""
+        return self.run(verify_password, password, password_hash)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get executor statistics
+
+        Returns:
+            dict: Configuration and job counters
+        """
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "queue_depth": self.queue_depth,
+                "timeout": self.timeout,
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Shut down the worker pool if it was started"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+hashing_executor = HashingExecutor()
+atexit.register(hashing_executor.shutdown)
@@ -0,0 +1,144 @@
+"""
+In-memory cache of derived encryption keys
+"""
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DerivedKeyCache:
+    """
+    TTL + LRU cache for keys derived from a master secret
+
+    Entries are keyed by an HMAC fingerprint of the master secret (the secret
+    itself is never stored) plus the derivation parameters such as salt and
+    iteration count. Keys are held in bytearrays and zeroed when they expire,
+    are evicted or are invalidated.
+    """
+
+    def __init__(self, ttl: float = 300, max_entries: int = 1024, enabled: bool = False):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._fingerprint_key = secrets.token_bytes(32)
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, bytearray]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def init_app(self, app) -> None:
+        """
+        Configure cache from Flask app config
+
+        Args:
+            app (Flask): Flask application
+        """
+        self.clear()
+        self.enabled = app.config.get('ENCRYPTION_KEY_CACHE_ENABLED', False)
+        self.ttl = app.config.get('ENCRYPTION_KEY_CACHE_TTL', 300)
+        self.max_entries = app.config.get('ENCRYPTION_KEY_CACHE_MAX_ENTRIES', 1024)
+        app.extensions['key_cache'] = self
+
+    def fingerprint(self, master_secret: str) -> str:
+        """Process-local fingerprint of a master secret"""
+        return hmac.new(self._fingerprint_key, master_secret.encode(), hashlib.sha256).hexdigest()
+
+    def get(self, master_secret: str, params: Hashable) -> Optional[bytes]:
+        """
+        Look up a derived key
+
+        Args:
+            master_secret (str): Secret the key was derived from
+            params (hashable): Derivation parameters, e.g. (salt, iterations)
+
+        Returns:
+            bytes: Cached key, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        cache_key = (self.fingerprint(master_secret), params)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, key = entry
+            if expires_at <= time.monotonic():
+                self._drop(cache_key)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(cache_key)
+            self._hits += 1
+            return bytes(key)
+
+    def put(self, master_secret: str, params: Hashable, key: bytes) -> None:
+        """
+        Store a derived key
+
+        Args:
+            master_secret (str): Secret the key was derived from
+            params (hashable): Derivation parameters
+            key (bytes): Derived key
+        """
+        if not self.enabled:
+            return
+        cache_key = (self.fingerprint(master_secret), params)
+        with self._lock:
+            if cache_key in self._entries:
+                self._drop(cache_key)
+            self._entries[cache_key] = (time.monotonic() + self.ttl, bytearray(key))
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, master_secret: str) -> int:
+        """
+        Wipe every key derived from a master secret
+
+        Called when a user's credentials change.
+
+        Args:
+            master_secret (str): Old master secret
+
+        Returns:
+            int: Number of entries removed
+        """
+        fingerprint = self.fingerprint(master_secret)
+        with self._lock:
+            stale = [cache_key for cache_key in self._entries if cache_key[0] == fingerprint]
+            for cache_key in stale:
+                self._drop(cache_key)
+        if stale:
+            logger.debug(f"Invalidated {len(stale)} cached keys")
+        return len(stale)
+
+    def clear(self) -> None:
+        """Wipe all cached keys"""
+        with self._lock:
+            for cache_key in list(self._entries):
+                self._drop(cache_key)
+
+    def _drop(self, cache_key) -> None:
+        _, key = self._entries.pop(cache_key)
+        key[:] = bytes(len(key))
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache statistics"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+key_cache = DerivedKeyCache()
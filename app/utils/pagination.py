@@ -0,0 +1,52 @@
+"""
+Opaque cursors for keyset (seek) pagination
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Tuple
+
+
+def encode_cursor(sort: str, value: Any, row_id: int) -> str:
+    """
+    Encode the sort key of a row as a URL-safe cursor
+
+    Args:
+        sort (str): Sort order the cursor belongs to
+        value: Sort column value of the row (datetime or str)
+        row_id (int): Row ID, breaks ties between equal values
+
+    Returns:
+        str: Cursor token
+    """
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token: str, sort: str, is_datetime: bool = False) -> Tuple[Any, int]:
+    """
+    Decode a cursor made by encode_cursor
+
+    Args:
+        token (str): Cursor token
+        sort (str): Expected sort order
+        is_datetime (bool): Parse the value back into a datetime
+
+    Returns:
+        tuple: (value, row_id)
+
+    Raises:
+        ValueError: If the token is malformed or belongs to another sort order
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        cursor_sort, value, row_id = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort or not isinstance(row_id, int) or not isinstance(value, str):
+        raise ValueError("Cursor does not match sort order")
+    if is_datetime:
+        value = datetime.fromisoformat(value)
+    return value, row_id
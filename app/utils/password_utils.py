@@ -1,13 +1,17 @@
 """
 Password utilities for hashing and verification
 """
-import bcrypt
 import os
+import time
 import logging
-from typing import Optional
+from typing import Optional, Dict, Any
+from app.utils.hashers import get_hasher, identify_hasher, get_preferred_hasher, set_preferred_hasher
 
 logger = logging.getLogger(__name__)
 
+# bcrypt cost factor used when no explicit rounds are given (bcrypt library default)
+BCRYPT_DEFAULT_ROUNDS = 12
+
 def get_password_pepper() -> str:
     """
     Get pepper from environment variable
@@ -57,15 +61,17 @@ def add_pepper_to_password(password: str) -> str:
         logger.error(f"Error adding pepper to password: {e}")
         raise
 
-def hash_password(password: str) -> str:
+def hash_password(password: str, algorithm: Optional[str] = None, **params: Any) -> str:
     """
-    Hash password using bcrypt with salt and pepper
+    Hash password with salt and pepper using a registered hasher
     
     Args:
         password (str): Plain text password
+        algorithm (str, optional): Hasher name, defaults to the preferred hasher
+        **params: Hasher parameter overrides, e.g. rounds for bcrypt
         
     Returns:
-        str: Hashed password
+        str: Hash tagged with its algorithm and format version
         
     Raises:
         ValueError: If password is empty
@@ -78,25 +84,13 @@ def hash_password(password: str) -> str:
         # Add pepper to password
         peppered_password = add_pepper_to_password(password)
         
-        # Generate random salt
-        salt = bcrypt.gensalt()
-        
-        if is_development_environment():
-            logger.debug(f"Generated salt")
-            logger.debug(f"Salt: {salt}")
-            logger.debug(f"Salt length: {len(salt)} bytes")
-        
-        # Hash password
-        peppered_password_bytes = peppered_password.encode('utf-8')
-        hashed = bcrypt.hashpw(peppered_password_bytes, salt)
-        
-        # Store as string
-        password_hash = hashed.decode('utf-8')
+        hasher = get_hasher(algorithm)
+        password_hash = hasher.encode(peppered_password.encode('utf-8'), **params)
         
         if is_development_environment():
-            logger.debug(f"Password hashed successfully")
+            logger.debug(f"Password hashed successfully with {hasher.algorithm}")
             logger.debug(f"Hash length: {len(password_hash)}")
-            logger.debug(f"Salt in hash: {password_hash[:29]}")
+            logger.debug(f"Salt in hash: {hasher.salt(password_hash)}")
             
         return password_hash
         
@@ -119,15 +113,15 @@ def verify_password(password: str, password_hash: str) -> bool:
         return False
         
     try:
+        hasher = identify_hasher(password_hash)
+        if hasher is None:
+            logger.error("Unknown password hash format")
+            return False
+            
         # Add pepper to input password
         peppered_password = add_pepper_to_password(password)
         
-        # Convert to bytes
-        peppered_password_bytes = peppered_password.encode('utf-8')
-        stored_hash = password_hash.encode('utf-8')
-        
-        # Verify with bcrypt
-        is_valid = bcrypt.checkpw(peppered_password_bytes, stored_hash)
+        is_valid = hasher.verify(peppered_password.encode('utf-8'), password_hash)
         
         if is_development_environment():
             logger.debug(f"Password verification: {'SUCCESS' if is_valid else 'FAILED'}")
@@ -148,4 +142,141 @@ def extract_salt_from_hash(password_hash: str) -> Optional[str]:
     Returns:
         str: Salt from hash, or None if invalid
     """
-    return password_hash[:29] if password_hash else None 
\ No newline at end of file
+    hasher = identify_hasher(password_hash)
+    try:
+        return hasher.salt(password_hash) if hasher else None
+    except ValueError:
+        return None
+
+def get_hashing_policy() -> Dict[str, Any]:
+    """
+    Snapshot of the preferred hasher and its parameters
+    
+    Passed explicitly to hashing workers so process pools hash with the
+    same policy as the parent process.
+    
+    Returns:
+        dict: algorithm plus hasher parameters, usable as hash_password kwargs
+    """
+    hasher = get_preferred_hasher()
+    return dict(algorithm=hasher.algorithm, **hasher.params())
+
+def get_bcrypt_rounds() -> int:
+    """
+    Get bcrypt cost factor used for new hashes
+    
+    Returns:
+        int: bcrypt rounds
+    """
+    return get_hasher('bcrypt').rounds
+
+def set_bcrypt_rounds(rounds: int) -> None:
+    """
+    Set bcrypt cost factor used for new hashes
+    
+    Args:
+        rounds (int): bcrypt rounds (4-31)
+    """
+    if not 4 <= rounds <= 31:
+        raise ValueError("bcrypt rounds must be between 4 and 31")
+    get_hasher('bcrypt').configure(rounds=rounds)
+
+def get_hash_rounds(password_hash: str) -> Optional[int]:
+    """
+    Read the cost factor stored in a bcrypt hash
+    
+    Args:
+        password_hash (str): Password hash
+        
+    Returns:
+        int: bcrypt rounds, or None if the hash is not a bcrypt hash
+    """
+    hasher = identify_hasher(password_hash)
+    if hasher is None or hasher.algorithm != 'bcrypt':
+        return None
+    return hasher.decode_params(password_hash).get('rounds')
+
+def needs_rehash(password_hash: str) -> bool:
+    """
+    Check whether a stored hash should be recomputed
+    
+    True when the hash was made by another algorithm than the preferred one,
+    or with parameters weaker than the current policy. A hash stronger than
+    the policy is kept, so processes with different costs never downgrade
+    each other's hashes.
+    
+    Args:
+        password_hash (str): Password hash
+        
+    Returns:
+        bool: True if the hash should be recomputed
+    """
+    hasher = identify_hasher(password_hash)
+    if hasher is None:
+        return False
+    if hasher is not get_preferred_hasher():
+        return True
+    try:
+        return hasher.must_update(password_hash)
+    except ValueError:
+        return False
+
+def calibrate_bcrypt_rounds(target_ms: float = 150, min_rounds: int = 10, max_rounds: int = 16) -> int:
+    """
+    Find the highest bcrypt cost whose hash time fits the latency budget
+    
+    Each extra round doubles the work, so measuring stops as soon as the
+    next round would exceed the budget.
+    
+    Args:
+        target_ms (float): Latency budget for one hash in milliseconds
+        min_rounds (int): Security floor, returned even if it exceeds the budget
+        max_rounds (int): Upper bound
+        
+    Returns:
+        int: Calibrated bcrypt rounds
+    """
+    import bcrypt
+    sample = b"calibration-password"
+    rounds = min_rounds
+    while rounds < max_rounds:
+        started = time.perf_counter()
+        bcrypt.hashpw(sample, bcrypt.gensalt(rounds))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms * 2 > target_ms:
+            break
+        rounds += 1
+    logger.info(f"Calibrated bcrypt rounds: {rounds} (budget {target_ms} ms)")
+    return rounds
+
+def init_password_policy(app) -> None:
+    """
+    Apply password hashing policy from Flask app config
+    
+    PASSWORD_HASHER selects the hasher for new hashes. BCRYPT_ROUNDS pins the
+    bcrypt cost; otherwise, when BCRYPT_CALIBRATE is set, the cost is
+    calibrated against BCRYPT_TARGET_MS on the current machine. Prefer
+    pinning the value measured by `flask users calibrate-bcrypt`.
+    
+    Args:
+        app (Flask): Flask application
+    """
+    if app.config.get('BCRYPT_ROUNDS'):
+        rounds = int(app.config['BCRYPT_ROUNDS'])
+    elif app.config.get('BCRYPT_CALIBRATE') and app.config.get('PASSWORD_HASHER', 'bcrypt') == 'bcrypt':
+        rounds = calibrate_bcrypt_rounds(
+            target_ms=app.config.get('BCRYPT_TARGET_MS', 150),
+            min_rounds=app.config.get('BCRYPT_MIN_ROUNDS', 10),
+            max_rounds=app.config.get('BCRYPT_MAX_ROUNDS', 16),
+        )
+    else:
+        rounds = BCRYPT_DEFAULT_ROUNDS
+    set_bcrypt_rounds(rounds)
+
+    get_hasher('scrypt').configure(
+        n=app.config.get('SCRYPT_N'),
+        r=app.config.get('SCRYPT_R'),
+        p=app.config.get('SCRYPT_P'),
+    )
+    get_hasher('pbkdf2_sha256').configure(iterations=app.config.get('PBKDF2_HASHER_ITERATIONS'))
+    set_preferred_hasher(app.config.get('PASSWORD_HASHER', 'bcrypt'))
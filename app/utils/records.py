@@ -0,0 +1,159 @@
+"""
+Compact versioned AES-GCM record format
+
+Layout of a version 1 record (all integers big endian):
+
+    offset  size  field
+    0       1     version (0x01)
+    1       1     KDF id (0 = none, 1 = PBKDF2-HMAC-SHA256, 2 = PBKDF2-HMAC-SHA512)
+    2       4     KDF iterations (0 when no KDF)
+    6       1     salt length n
+    7       n     salt
+    7+n     12    nonce
+    19+n    ...   ciphertext followed by the 16 byte GCM tag
+
+The header (everything before the ciphertext) is authenticated as
+associated data, so KDF parameters cannot be tampered with. The KDF fields
+describe how the key was derived; a wrapped data key records the
+parameters of the vault key it was wrapped with and leaves the salt empty
+(the vault salt is stored on the user).
+"""
+import os
+import struct
+from typing import NamedTuple, Union
+
+# cryptography is imported on first use to keep application startup fast
+
+RECORD_VERSION = 1
+KDF_NONE = 0
+KDF_PBKDF2_SHA256 = 1
+KDF_PBKDF2_SHA512 = 2
+
+KDF_IDS = {
+    'pbkdf2_sha256': KDF_PBKDF2_SHA256,
+    'pbkdf2_sha512': KDF_PBKDF2_SHA512,
+}
+KDF_NAMES = {kdf_id: name for name, kdf_id in KDF_IDS.items()}
+
+NONCE_SIZE = 12
+KEY_SIZE = 32
+
+_FIXED = struct.Struct('>BBIB')
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+class RecordHeader(NamedTuple):
+    version: int
+    kdf_id: int
+    iterations: int
+    salt: bytes
+    nonce: memoryview
+    body_offset: int
+
+
+def is_record(data: Buffer) -> bool:
+    """
+    Check whether stored bytes are a record in this format
+
+    Fernet tokens start with 0x80, so the two formats never collide.
+
+    Args:
+        data (bytes): Stored bytes
+
+    Returns:
+        bool: True for a supported record version
+    """
+    return bool(data) and data[0] == RECORD_VERSION
+
+
+def parse_header(data: Buffer) -> RecordHeader:
+    """
+    Parse the header of a record without copying the ciphertext
+
+    Args:
+        data (bytes): Record bytes
+
+    Returns:
+        RecordHeader: Parsed header
+
+    Raises:
+        ValueError: If the record is truncated or has an unknown version
+    """
+    view = memoryview(data)
+    if len(view) < _FIXED.size:
+        raise ValueError("Record is truncated")
+    version, kdf_id, iterations, salt_length = _FIXED.unpack_from(view)
+    if version != RECORD_VERSION:
+        raise ValueError(f"Unsupported record version: {version}")
+    salt_end = _FIXED.size + salt_length
+    body_offset = salt_end + NONCE_SIZE
+    if len(view) < body_offset + 16:
+        raise ValueError("Record is truncated")
+    return RecordHeader(version, kdf_id, iterations, bytes(view[_FIXED.size:salt_end]),
+                        view[salt_end:body_offset], body_offset)
+
+
+def header_prefix(kdf_id: int, iterations: int) -> bytes:
+    """
+    First bytes of records written with the given KDF parameters
+
+    Used to find records with outdated parameters in SQL.
+
+    Args:
+        kdf_id (int): KDF id
+        iterations (int): KDF iteration count
+
+    Returns:
+        bytes: Version, KDF id and iterations
+    """
+    return _FIXED.pack(RECORD_VERSION, kdf_id, iterations, 0)[:-1]
+
+
+def seal(key: bytes, plaintext: bytes, kdf_id: int = KDF_NONE, iterations: int = 0, salt: bytes = b'') -> bytes:
+    """
+    Encrypt plaintext into a record
+
+    Args:
+        key (bytes): 32 byte AES key
+        plaintext (bytes): Data to encrypt
+        kdf_id (int): How the key was derived, stored for the reader
+        iterations (int): KDF iteration count
+        salt (bytes): KDF salt (at most 255 bytes)
+
+    Returns:
+        bytes: Record
+    """
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    if not plaintext:
+        raise ValueError("Plaintext cannot be empty")
+    nonce = os.urandom(NONCE_SIZE)
+    header = _FIXED.pack(RECORD_VERSION, kdf_id, iterations, len(salt)) + salt + nonce
+    return header + AESGCM(key).encrypt(nonce, plaintext, header)
+
+
+def open_record(key: bytes, data: Buffer, header: RecordHeader = None) -> bytes:
+    """
+    Decrypt a record
+
+    Args:
+        key (bytes): 32 byte AES key
+        data (bytes): Record bytes
+        header (RecordHeader, optional): Already parsed header
+
+    Returns:
+        bytes: Plaintext
+
+    Raises:
+        cryptography.exceptions.InvalidTag: If the key is wrong or the record was modified
+    """
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    view = memoryview(data)
+    header = header or parse_header(view)
+    return AESGCM(key).decrypt(header.nonce, view[header.body_offset:], view[:header.body_offset])
+
+
+def generate_key() -> bytes:
+    """New random 32 byte AES key"""
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    return AESGCM.generate_key(bit_length=KEY_SIZE * 8)
@@ -0,0 +1,126 @@
+"""
+Stand-in replication between two SQLite files for local read replica testing
+"""
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+
+def sqlite_path(uri: str) -> str:
+    """
+    File path of an SQLite database URI
+
+    Args:
+        uri (str): Database URI, e.g. sqlite:///primary.db
+
+    Returns:
+        str: Database file path
+
+    Raises:
+        ValueError: For non-SQLite or in-memory databases
+    """
+    url = make_url(uri)
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        raise ValueError(f"Not an SQLite database file: {uri}")
+    return url.database
+
+
+class SQLiteReplicator:
+    """
+    Copies the primary database file to the replica with the online backup API
+
+    Each sync() is a consistent snapshot of the primary; readers on the
+    replica keep working while it runs. The replica lags by up to the sync
+    interval, like asynchronous replication.
+    """
+
+    def __init__(self, primary_path: str, replica_path: str, interval: float = 1.0):
+        self.primary_path = primary_path
+        self.replica_path = replica_path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._syncs = 0
+        self._errors = 0
+        self._last_sync: Optional[float] = None
+        self._last_duration: Optional[float] = None
+
+    @classmethod
+    def from_app(cls, app, interval: float = 1.0) -> "SQLiteReplicator":
+        """
+        Replicator between the app's primary database and its replica bind
+
+        Args:
+            app (Flask): Flask application
+            interval (float): Seconds between syncs in the background loop
+
+        Returns:
+            SQLiteReplicator: Configured replicator
+        """
+        binds = app.config.get('SQLALCHEMY_BINDS') or {}
+        bind = app.config.get('DB_REPLICA_BIND', 'replica')
+        if bind not in binds:
+            raise ValueError("No replica bind configured (DATABASE_REPLICA_URL)")
+        replica = binds[bind]
+        replica_uri = replica['url'] if isinstance(replica, dict) else replica
+        return cls(sqlite_path(app.config['SQLALCHEMY_DATABASE_URI']), sqlite_path(str(replica_uri)), interval)
+
+    def sync(self) -> float:
+        """
+        Copy the primary to the replica once
+
+        Returns:
+            float: Seconds taken
+        """
+        start = time.perf_counter()
+        source = sqlite3.connect(self.primary_path)
+        target = sqlite3.connect(self.replica_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        duration = time.perf_counter() - start
+        self._syncs += 1
+        self._last_sync = time.time()
+        self._last_duration = duration
+        return duration
+
+    def start(self) -> None:
+        """Run sync() every interval seconds in a daemon thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sqlite-replicator', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background loop"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except sqlite3.Error as e:
+                self._errors += 1
+                logger.warning(f"Replica sync failed: {e}")
+            self._stop.wait(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        """Sync count, errors and time of the last sync"""
+        return {
+            "syncs": self._syncs,
+            "errors": self._errors,
+            "last_sync": self._last_sync,
+            "last_duration_ms": round(self._last_duration * 1000, 3) if self._last_duration is not None else None,
+        }
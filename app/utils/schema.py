@@ -0,0 +1,228 @@
+"""
+Schema helpers for evolving existing databases
+"""
+import hashlib
+import logging
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import inspect, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateColumn
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# One row (id = 1) with the fingerprint of the schema the database was last synced to
+schema_version = db.Table(
+    'schema_version',
+    db.Column('id', db.Integer, primary_key=True),
+    db.Column('fingerprint', db.String(64), nullable=False),
+    db.Column('updated_at', db.DateTime, nullable=False),
+)
+
+SCHEMA_CHECK_MODES = ('auto', 'always', 'skip')
+
+def add_missing_columns() -> List[str]:
+    """
+    Add nullable model columns that are missing from existing tables
+    
+    db.create_all() only creates missing tables, so databases created before
+    a column was introduced need an ALTER TABLE. Must run in an app context.
+    
+    Returns:
+        list: "table.column" names that were added
+    """
+    engine = db.engine
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    logger.error(f"Cannot add NOT NULL column {table.name}.{column.name} without a server default")
+                    continue
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                added.append(f"{table.name}.{column.name}")
+                logger.info(f"Added column {table.name}.{column.name}")
+    return added
+
+
+def upgrade_archived_services() -> bool:
+    """
+    Rebuild an archived_services table keyed by services.id
+
+    The first version used the original service id as primary key, which
+    breaks once SQLite hands a purged service's id to a new service. The old
+    rows move to the current layout with their id as service_id. Must run
+    before db.create_all().
+
+    Returns:
+        bool: True if the table was rebuilt
+    """
+    from app.models.archived_service import ArchivedService
+
+    engine = db.engine
+    inspector = inspect(engine)
+    if not inspector.has_table('archived_services'):
+        return False
+    existing = {column['name'] for column in inspector.get_columns('archived_services')}
+    if 'service_id' in existing:
+        return False
+
+    copied = ', '.join(name for name in ArchivedService.COPIED_COLUMNS[1:] if name in existing)
+    with engine.begin() as conn:
+        for index in inspector.get_indexes('archived_services'):
+            conn.execute(text(f"DROP INDEX {index['name']}"))
+        conn.execute(text("ALTER TABLE archived_services RENAME TO archived_services_old"))
+        ArchivedService.__table__.create(bind=conn)
+        conn.execute(text(f"INSERT INTO archived_services (service_id, {copied}, archived_at) "
+                          f"SELECT id, {copied}, archived_at FROM archived_services_old ORDER BY archived_at, id"))
+        conn.execute(text("DROP TABLE archived_services_old"))
+    logger.info("Rebuilt archived_services with its own primary key")
+    return True
+
+
+def create_missing_indexes() -> List[str]:
+    """
+    Create model indexes that are missing from existing tables
+    
+    Like columns, indexes declared after a table was created are skipped by
+    db.create_all(). Must run in an app context.
+    
+    Returns:
+        list: Names of the indexes that were created
+    """
+    engine = db.engine
+    inspector = inspect(engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            index.create(bind=engine)
+            created.append(index.name)
+            logger.info(f"Created index {index.name} on {table.name}")
+    return created
+
+
+def schema_fingerprint() -> str:
+    """
+    Hash of the declared schema: tables, columns, indexes and the search index DDL
+    
+    Changes whenever a model changes, so no version number has to be bumped
+    by hand. Must run in an app context.
+    
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    from app.utils.search import schema_statements
+    
+    dialect = db.engine.dialect
+    parts = []
+    for table in db.metadata.sorted_tables:
+        parts.append(f"table {table.name}")
+        for column in table.columns:
+            parts.append(f"  {column.name} {column.type.compile(dialect=dialect)} "
+                         f"nullable={column.nullable} default={column.server_default is not None}")
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            where = index.dialect_options['sqlite']['where']
+            parts.append(f"  index {index.name} {[column.name for column in index.columns]} "
+                         f"unique={index.unique} where={where}")
+    parts.extend(schema_statements())
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def stored_schema_fingerprint() -> Optional[str]:
+    """
+    Fingerprint recorded by the last schema sync, None for a new or unversioned database
+    
+    Returns:
+        str: Stored fingerprint or None
+    """
+    try:
+        with db.engine.connect() as conn:
+            return conn.execute(select(schema_version.c.fingerprint).where(schema_version.c.id == 1)).scalar()
+    except DBAPIError:
+        # No schema_version table yet
+        return None
+
+
+def sync_schema(fingerprint: Optional[str] = None) -> List[str]:
+    """
+    Bring the database up to the declared schema and record its fingerprint
+    
+    A new database only needs create_all; an existing one also gets the
+    columns and indexes added since it was created. Must run in an app context.
+    
+    Args:
+        fingerprint (str, optional): Precomputed schema_fingerprint()
+        
+    Returns:
+        list: "table.column" names that were added to existing tables
+    """
+    from app.utils.search import create_search_index
+    
+    engine = db.engine
+    new_database = not inspect(engine).get_table_names()
+    if not new_database:
+        upgrade_archived_services()
+    # Only the primary: a replica bind is filled by replication
+    db.create_all(bind_key=None)
+    added = []
+    if not new_database:
+        added = add_missing_columns()
+        create_missing_indexes()
+    create_search_index()
+    if 'users.total_services' in added:
+        # Counter columns start at 0 on existing databases
+        from app.services.counter_service import CounterService
+        CounterService.reconcile()
+    if 'services.deleted_at' in added:
+        # Before deleted_at, the retention job went by updated_at of deleted rows
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE services SET deleted_at = updated_at WHERE is_active = 0"))
+            conn.execute(text("DROP INDEX IF EXISTS ix_services_inactive_updated"))
+    
+    fingerprint = fingerprint or schema_fingerprint()
+    with engine.begin() as conn:
+        conn.execute(schema_version.delete())
+        conn.execute(schema_version.insert().values(id=1, fingerprint=fingerprint, updated_at=datetime.utcnow()))
+    logger.info(f"Database schema synced ({fingerprint[:12]})")
+    return added
+
+
+def ensure_schema(mode: str = 'auto') -> str:
+    """
+    Check the schema version at startup and sync only when it changed
+    
+    Args:
+        mode (str): 'auto' compares fingerprints, 'always' syncs on every
+            start (the old behaviour), 'skip' trusts the database as is
+            
+    Returns:
+        str: 'current', 'synced' or 'skipped'
+    """
+    from app.utils.search import detect_search_index
+    
+    if mode not in SCHEMA_CHECK_MODES:
+        raise ValueError(f"Unknown schema check mode: {mode}")
+    if mode == 'skip':
+        detect_search_index()
+        return 'skipped'
+    
+    fingerprint = schema_fingerprint()
+    if mode == 'auto' and stored_schema_fingerprint() == fingerprint:
+        detect_search_index()
+        return 'current'
+    sync_schema(fingerprint)
+    return 'synced'
+
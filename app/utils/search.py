@@ -0,0 +1,167 @@
+"""
+SQLite FTS5 full-text index over services
+"""
+import logging
+import re
+from typing import Optional
+
+from sqlalchemy import column, table, text
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'services_fts'
+# Indexed columns and their bm25 weights (a name match ranks highest)
+FTS_COLUMNS = (
+    ('service_name', 10.0),
+    ('service_url', 3.0),
+    ('service_username', 5.0),
+    ('notes', 1.0),
+)
+
+# Owner of the row, stored unindexed so a query can drop other users' matches
+# inside the FTS scan instead of after joining services
+OWNER_COLUMN = 'user_id'
+
+services_fts = table(FTS_TABLE, column('rowid'), column(OWNER_COLUMN))
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+_stored = [name for name, _ in FTS_COLUMNS] + [OWNER_COLUMN]
+_columns = ', '.join(_stored)
+_new_values = ', '.join(f'new.{name}' for name in _stored)
+_old_values = ', '.join(f'old.{name}' for name in _stored)
+
+# External-content table: the text lives in services, triggers keep the index in sync
+# (also for bulk UPDATE/DELETE statements that bypass the ORM)
+_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{', '.join(name for name, _ in FTS_COLUMNS)}, {OWNER_COLUMN} UNINDEXED, "
+    f"content='services', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS services_fts_ai AFTER INSERT ON services BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS services_fts_ad AFTER DELETE ON services BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS services_fts_au AFTER UPDATE OF {_columns} ON services BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+]
+
+_TRIGGERS = ('services_fts_ai', 'services_fts_ad', 'services_fts_au')
+
+_available: Optional[bool] = None
+
+
+def _drop_outdated_index(conn) -> bool:
+    """Drop an index created without the owner column; True if there is none left"""
+    columns = [row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({FTS_TABLE})")]
+    if not columns:
+        return True
+    if OWNER_COLUMN in columns:
+        return False
+    for trigger in _TRIGGERS:
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.exec_driver_sql(f"DROP TABLE {FTS_TABLE}")
+    logger.info("Dropped full-text index without owner column")
+    return True
+
+
+def create_search_index() -> bool:
+    """
+    Create the FTS5 table and sync triggers if the database supports them
+
+    A newly created index is filled from the existing services; an index
+    from before the owner column was added is rebuilt. Must run in an app
+    context.
+
+    Returns:
+        bool: True if full-text search is available
+    """
+    global _available
+    engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        _available = False
+        return False
+    try:
+        with engine.begin() as conn:
+            missing = _drop_outdated_index(conn)
+            for statement in _DDL:
+                conn.exec_driver_sql(statement)
+            if missing:
+                conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+                logger.info("Built full-text index over services")
+        _available = True
+    except Exception as e:
+        logger.warning(f"Full-text search unavailable, falling back to LIKE: {e}")
+        _available = False
+    return _available
+
+
+def detect_search_index() -> bool:
+    """
+    Check for an FTS5 index created by an earlier start, without changing the schema
+
+    Used at startup when the schema version is current. Must run in an app context.
+
+    Returns:
+        bool: True if full-text search is available
+    """
+    global _available
+    if db.engine.dialect.name != 'sqlite':
+        _available = False
+        return False
+    with db.engine.connect() as conn:
+        _available = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+        ).first() is not None
+    return _available
+
+
+def schema_statements() -> list:
+    """DDL of the index and its triggers, part of the schema fingerprint"""
+    return list(_DDL)
+
+
+def search_available() -> bool:
+    """True if create_search_index() set up the FTS5 index"""
+    return bool(_available)
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Turn user input into an FTS5 MATCH expression
+
+    Every word becomes a quoted prefix term and all of them must match, so
+    FTS5 operators in the input are never interpreted.
+
+    Args:
+        query (str): Search text
+
+    Returns:
+        str: MATCH expression, or None if the input has no words
+    """
+    tokens = _TOKEN.findall(query or '')
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def rank_expression():
+    """bm25 ranking of the current match, lower is better"""
+    weights = ', '.join(str(weight) for _, weight in FTS_COLUMNS)
+    return text(f"bm25({FTS_TABLE}, {weights})")
+
+
+def match_clause(match_query: str, user_id: int):
+    """WHERE clause for an expression from build_match_query(), limited to one user's rows"""
+    return text(f"{FTS_TABLE} MATCH :match_query AND {FTS_TABLE}.{OWNER_COLUMN} = :owner").bindparams(
+        match_query=match_query, owner=user_id
+    )
+
+
+def like_pattern(word: str) -> str:
+    """%word% for LIKE with %, _ and the escape character itself escaped (use escape='\\')"""
+    escaped = word.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
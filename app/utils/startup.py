@@ -0,0 +1,68 @@
+"""
+Timing of the application factory phases
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """
+    Records wall time of each named phase of create_app
+
+    The result is kept in app.extensions['startup_profile'] and shown by
+    /system/stats, so cold starts of workers can be compared across
+    releases (see benchmarks/startup.py).
+    """
+
+    def __init__(self):
+        self.phases: List[Tuple[str, float]] = []
+        self._started = time.perf_counter()
+        self.total = 0.0
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time a block as one phase
+
+        Args:
+            name (str): Phase name
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def finish(self, app) -> None:
+        """
+        Store the profile on the app and log it
+
+        Logged at INFO when STARTUP_PROFILE is enabled, otherwise at DEBUG.
+
+        Args:
+            app (Flask): Flask application
+        """
+        self.total = time.perf_counter() - self._started
+        app.extensions['startup_profile'] = self
+        level = logging.INFO if app.config.get('STARTUP_PROFILE', False) else logging.DEBUG
+        if logger.isEnabledFor(level):
+            logger.log(level, self.report())
+
+    def report(self) -> str:
+        """One line per phase with its share of the total"""
+        lines = [f"create_app took {self.total * 1000:.1f} ms"]
+        for name, seconds in self.phases:
+            share = seconds / self.total * 100 if self.total else 0
+            lines.append(f"  {name:<12} {seconds * 1000:8.1f} ms  {share:5.1f}%")
+        return "\n".join(lines)
+
+    def stats(self) -> Dict[str, Any]:
+        """Phase timings in milliseconds"""
+        return {
+            "total_ms": round(self.total * 1000, 3),
+            "phases": {name: round(seconds * 1000, 3) for name, seconds in self.phases},
+        }
@@ -0,0 +1,262 @@
+"""
+Failed-login throttling with sliding-window counters and exponential backoff
+"""
+import math
+import sqlite3
+import threading
+import time
+import logging
+import os
+from collections import OrderedDict
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ThrottleState:
+    """Counters for one key (username or client IP)"""
+
+    __slots__ = ('window_start', 'count', 'prev_count', 'locked_until')
+
+    def __init__(self, window_start: float = 0.0, count: int = 0, prev_count: int = 0, locked_until: float = 0.0):
+        self.window_start = window_start
+        self.count = count
+        self.prev_count = prev_count
+        self.locked_until = locked_until
+
+    def roll(self, now: float, window: float) -> None:
+        """Move the fixed windows forward so that 'count' covers now"""
+        if now - self.window_start >= 2 * window:
+            self.prev_count, self.count = 0, 0
+            self.window_start = now - (now % window)
+        elif now - self.window_start >= window:
+            self.prev_count, self.count = self.count, 0
+            self.window_start += window
+
+    def estimate(self, now: float, window: float) -> float:
+        """Sliding-window estimate: weighted previous window plus current window"""
+        elapsed = (now - self.window_start) / window
+        return self.prev_count * max(0.0, 1 - elapsed) + self.count
+
+
+class MemoryThrottleStore:
+    """Process-local store, evicting the least recently used keys beyond max_keys"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._states: "OrderedDict[str, ThrottleState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[ThrottleState]:
+        """Current state of a key, or None if it is not tracked"""
+        with self._lock:
+            return self._states.get(key)
+
+    def update(self, key: str, fn: Callable[[ThrottleState], Optional[ThrottleState]]) -> ThrottleState:
+        """
+        Atomically read, modify and write the state of a key
+
+        Args:
+            key (str): Throttle key
+            fn (callable): Receives the current state, returns it (or None to delete)
+
+        Returns:
+            ThrottleState: The state returned by fn (a fresh one if deleted)
+        """
+        with self._lock:
+            state = self._states.pop(key, None) or ThrottleState()
+            state = fn(state)
+            if state is None:
+                return ThrottleState()
+            self._states[key] = state
+            while len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+            return state
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+
+class SQLiteThrottleStore:
+    """SQLite-backed store shared by all workers on the same host"""
+
+    def __init__(self, path: str, max_keys: int = 100000):
+        self.path = path
+        self.max_keys = max_keys
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS login_throttle ("
+                " key TEXT PRIMARY KEY, window_start REAL, count INTEGER,"
+                " prev_count INTEGER, locked_until REAL, updated_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_login_throttle_updated ON login_throttle (updated_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[ThrottleState]:
+        """Current state of a key, or None if it is not tracked"""
+        row = self._connect().execute(
+            "SELECT window_start, count, prev_count, locked_until FROM login_throttle WHERE key = ?",
+            (key,)
+        ).fetchone()
+        return ThrottleState(*row) if row else None
+
+    def update(self, key: str, fn: Callable[[ThrottleState], Optional[ThrottleState]]) -> ThrottleState:
+        """Atomically read, modify and write the state of a key"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT window_start, count, prev_count, locked_until FROM login_throttle WHERE key = ?",
+                (key,)
+            ).fetchone()
+            state = fn(ThrottleState(*row) if row else ThrottleState())
+            if state is None:
+                conn.execute("DELETE FROM login_throttle WHERE key = ?", (key,))
+                state = ThrottleState()
+            else:
+                conn.execute(
+                    "INSERT OR REPLACE INTO login_throttle VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, state.window_start, state.count, state.prev_count, state.locked_until, time.time())
+                )
+                self._writes += 1
+                if self._writes % 1000 == 0:
+                    self._prune(conn)
+            conn.execute("COMMIT")
+            return state
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        """Keep only the most recently updated max_keys rows"""
+        conn.execute(
+            "DELETE FROM login_throttle WHERE updated_at < ("
+            " SELECT updated_at FROM login_throttle ORDER BY updated_at DESC LIMIT 1 OFFSET ?)",
+            (self.max_keys,)
+        )
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM login_throttle").fetchone()[0]
+
+
+class LoginThrottle:
+    """
+    Rejects login attempts for usernames and client IPs with too many recent failures
+
+    Failures are counted in a sliding window per key. Once a key reaches its
+    limit it is locked for ``backoff_base * 2 ** excess`` seconds (capped at
+    backoff_max), so every further failure doubles the wait. The check runs
+    before any password hashing happens.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.window = 900.0
+        self.user_limit = 5
+        self.ip_limit = 20
+        self.backoff_base = 1.0
+        self.backoff_max = 900.0
+        self.store = MemoryThrottleStore()
+        self._rejected = 0
+
+    def init_app(self, app) -> None:
+        """
+        Configure throttle from Flask app config
+
+        Args:
+            app (Flask): Flask application
+        """
+        self.enabled = app.config.get('LOGIN_THROTTLE_ENABLED', True)
+        self.window = float(app.config.get('LOGIN_THROTTLE_WINDOW', 900))
+        self.user_limit = app.config.get('LOGIN_THROTTLE_USER_LIMIT', 5)
+        self.ip_limit = app.config.get('LOGIN_THROTTLE_IP_LIMIT', 20)
+        self.backoff_base = float(app.config.get('LOGIN_THROTTLE_BACKOFF_BASE', 1))
+        self.backoff_max = float(app.config.get('LOGIN_THROTTLE_BACKOFF_MAX', 900))
+        max_keys = app.config.get('LOGIN_THROTTLE_MAX_KEYS', 100000)
+        if app.config.get('LOGIN_THROTTLE_STORE', 'memory') == 'sqlite':
+            path = app.config.get('LOGIN_THROTTLE_SQLITE_PATH') or os.path.join(app.instance_path, 'login_throttle.db')
+            self.store = SQLiteThrottleStore(path, max_keys=max_keys)
+        else:
+            self.store = MemoryThrottleStore(max_keys=max_keys)
+        self._rejected = 0
+        app.extensions['login_throttle'] = self
+
+    @staticmethod
+    def _keys(username: Optional[str], client_ip: Optional[str]):
+        if username:
+            yield f"user:{username.strip().lower()}"
+        if client_ip:
+            yield f"ip:{client_ip}"
+
+    def _limit(self, key: str) -> int:
+        return self.user_limit if key.startswith('user:') else self.ip_limit
+
+    def check(self, username: Optional[str], client_ip: Optional[str] = None) -> Optional[float]:
+        """
+        Check whether a login attempt may proceed
+
+        Args:
+            username (str): Submitted username
+            client_ip (str, optional): Client IP address
+
+        Returns:
+            float: Seconds until the next attempt is allowed, or None if allowed
+        """
+        if not self.enabled:
+            return None
+        now = time.time()
+        retry_after = 0.0
+        for key in self._keys(username, client_ip):
+            state = self.store.get(key)
+            if state is not None:
+                retry_after = max(retry_after, state.locked_until - now)
+        if retry_after > 0:
+            self._rejected += 1
+            return math.ceil(retry_after)
+        return None
+
+    def record_failure(self, username: Optional[str], client_ip: Optional[str] = None) -> None:
+        """Count a failed attempt and lock keys that went over their limit"""
+        if not self.enabled:
+            return
+        now = time.time()
+        for key in self._keys(username, client_ip):
+            limit = self._limit(key)
+
+            def fail(state: ThrottleState) -> ThrottleState:
+                state.roll(now, self.window)
+                state.count += 1
+                excess = state.estimate(now, self.window) - limit
+                if excess >= 0:
+                    delay = min(self.backoff_base * 2 ** min(excess, 32), self.backoff_max)
+                    state.locked_until = now + delay
+                return state
+
+            state = self.store.update(key, fail)
+            if state.locked_until > now:
+                logger.warning(f"Login throttled for {key} until {state.locked_until - now:.0f}s from now")
+
+    def reset(self, username: str) -> None:
+        """Clear the username counters after a successful login"""
+        if not self.enabled:
+            return
+        for key in self._keys(username, None):
+            self.store.update(key, lambda state: None)
+
+    def stats(self) -> dict:
+        """Throttle statistics"""
+        return {"enabled": self.enabled, "tracked_keys": len(self.store), "rejected": self._rejected}
+
+
+login_throttle = LoginThrottle()
@@ -0,0 +1,124 @@
+"""
+Process-local cache of slim current-user records
+"""
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class UserRecordCache:
+    """
+    TTL + LRU cache of user records by user ID
+
+    Holds the slim UserRecord projection only, never password hashes. Entries
+    are invalidated when the ORM updates or deletes a user (see the User
+    model events); other processes and bulk UPDATE statements are only
+    covered by the TTL. That includes deactivation, so with several worker
+    processes a deactivated user keeps access on the other workers for up to
+    ttl seconds; the cache is therefore off unless USER_CACHE_ENABLED is set.
+    """
+
+    def __init__(self, ttl: float = 60, max_entries: int = 10000, enabled: bool = False):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def init_app(self, app) -> None:
+        """
+        Configure cache from Flask app config
+
+        Args:
+            app (Flask): Flask application
+        """
+        self.clear()
+        with self._lock:
+            self._hits = self._misses = self._invalidations = 0
+        self.enabled = app.config.get('USER_CACHE_ENABLED', False)
+        self.ttl = app.config.get('USER_CACHE_TTL', 60)
+        self.max_entries = app.config.get('USER_CACHE_MAX_ENTRIES', 10000)
+        app.extensions['user_cache'] = self
+
+    def get(self, user_id: int) -> Optional[Any]:
+        """
+        Look up a user record
+
+        Args:
+            user_id (int): User ID
+
+        Returns:
+            UserRecord: Cached record, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, user_id: int, record: Any) -> None:
+        """
+        Store a user record
+
+        Args:
+            user_id (int): User ID
+            record (UserRecord): Record to cache
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._entries[user_id] = (time.monotonic() + self.ttl, record)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> bool:
+        """
+        Drop a user's record, e.g. after the user row changed
+
+        Args:
+            user_id (int): User ID
+
+        Returns:
+            bool: True if an entry was removed
+        """
+        with self._lock:
+            removed = self._entries.pop(user_id, None) is not None
+            if removed:
+                self._invalidations += 1
+        return removed
+
+    def clear(self) -> None:
+        """Drop all records"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache statistics"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+            }
+
+
+user_cache = UserRecordCache()
@@ -0,0 +1,195 @@
+"""
+Envelope encryption for a user's vault
+
+Each service password is encrypted with its own random data key. Data keys
+are wrapped with a per-user key-encryption key (KEK) derived once from the
+master secret and the user's vault salt, so reading N services costs one
+PBKDF2 run plus N cheap symmetric unwraps.
+
+Passwords and wrapped keys are stored as compact AES-GCM records (see
+app.utils.records). Every record carries the KDF algorithm and iteration
+count its key was derived with, so the policy for new writes can change
+without breaking old rows. Fernet tokens written by earlier versions are
+still readable and are rewritten lazily.
+"""
+import secrets
+import logging
+from typing import Dict, NamedTuple, Optional, Tuple
+from app.utils.encryption import EncryptionService, PBKDF2_ITERATIONS, DEFAULT_KDF_ALGORITHM, get_kdf_policy
+from app.utils import records
+
+logger = logging.getLogger(__name__)
+
+
+class StoredPassword(NamedTuple):
+    """Encrypted password columns of one Service row"""
+    ciphertext: Optional[str]
+    salt: Optional[str]
+    wrapped_key: Optional[bytes]
+    record: Optional[bytes]
+
+
+class VaultKey:
+    """Per-user key-encryption key"""
+
+    def __init__(self, master_password: str, salt: str):
+        """
+        Prepare the key-encryption key (derived on first use)
+
+        Args:
+            master_password (str): Master secret of the user
+            salt (str): User's vault salt
+        """
+        if not master_password:
+            raise ValueError("Master password cannot be empty")
+        if not salt:
+            raise ValueError("Vault salt cannot be empty")
+        self.master_password = master_password
+        self.salt = salt
+        self._keks: Dict[Tuple[str, int], EncryptionService] = {}
+
+    @staticmethod
+    def generate_salt() -> str:
+        """New random vault salt"""
+        return secrets.token_hex(16)
+
+    def _get_kek(self, algorithm: str = DEFAULT_KDF_ALGORITHM,
+                 iterations: int = PBKDF2_ITERATIONS) -> EncryptionService:
+        """KEK for one set of KDF parameters, derived once per instance"""
+        kek = self._keks.get((algorithm, iterations))
+        if kek is None:
+            kek = EncryptionService(self.master_password, salt=self.salt, iterations=iterations, algorithm=algorithm)
+            self._keks[(algorithm, iterations)] = kek
+        return kek
+
+    def wrap(self, data_key: bytes, kdf: Optional[Tuple[str, int]] = None) -> bytes:
+        """
+        Encrypt a data key under the KEK
+
+        Args:
+            data_key (bytes): Data key from generate_data_key
+            kdf (tuple, optional): (algorithm, iterations), defaults to the current policy
+
+        Returns:
+            bytes: Wrapped data key record
+        """
+        algorithm, iterations = kdf or get_kdf_policy()
+        kek = self._get_kek(algorithm, iterations)
+        return records.seal(kek.get_raw_key(), data_key, records.KDF_IDS[algorithm], iterations)
+
+    def unwrap(self, wrapped_key: bytes) -> bytes:
+        """
+        Decrypt a wrapped data key (record or legacy Fernet token)
+
+        Args:
+            wrapped_key (bytes): Wrapped data key
+
+        Returns:
+            bytes: Data key
+        """
+        if not records.is_record(wrapped_key):
+            return self._get_kek().decrypt_bytes(wrapped_key)
+        header = records.parse_header(wrapped_key)
+        if header.kdf_id == records.KDF_NONE:
+            # Wrapped before the KEK parameters were recorded
+            kek = self._get_kek()
+        else:
+            kek = self._get_kek(_kdf_name(header.kdf_id), header.iterations)
+        return records.open_record(kek.get_raw_key(), wrapped_key, header)
+
+
+def _kdf_name(kdf_id: int) -> str:
+    try:
+        return records.KDF_NAMES[kdf_id]
+    except KeyError:
+        raise ValueError(f"Unsupported KDF id: {kdf_id}")
+
+
+def generate_data_key() -> bytes:
+    """New random per-service data key"""
+    return records.generate_key()
+
+
+def seal_password(password: str, master_password: str, vault_key: Optional[VaultKey] = None,
+                  kdf: Optional[Tuple[str, int]] = None) -> StoredPassword:
+    """
+    Encrypt a password into the current storage format
+
+    Args:
+        password (str): Plain text password
+        master_password (str): Master password, used when there is no vault key
+        vault_key (VaultKey, optional): Owner's vault key
+        kdf (tuple, optional): (algorithm, iterations), defaults to the current policy
+
+    Returns:
+        StoredPassword: Column values (legacy text columns left empty)
+    """
+    if not password:
+        raise ValueError("Plaintext cannot be empty")
+    if vault_key is not None:
+        data_key = generate_data_key()
+        return StoredPassword("", "", vault_key.wrap(data_key, kdf), records.seal(data_key, password.encode()))
+
+    # No vault: the record carries its own KDF parameters and salt
+    algorithm, iterations = kdf or get_kdf_policy()
+    salt = secrets.token_bytes(16)
+    key = EncryptionService(master_password, salt=salt.hex(), iterations=iterations, algorithm=algorithm).get_raw_key()
+    record = records.seal(key, password.encode(), records.KDF_IDS[algorithm], iterations, salt)
+    return StoredPassword("", "", None, record)
+
+
+def needs_own_kdf(stored: StoredPassword) -> bool:
+    """True if decrypting the row needs its own PBKDF2 run instead of the vault key"""
+    if stored.wrapped_key:
+        return False
+    if stored.record:
+        return records.parse_header(stored.record).kdf_id != records.KDF_NONE
+    return bool(stored.ciphertext and stored.salt)
+
+
+def is_current_format(stored: StoredPassword) -> bool:
+    """True if the row uses vault-wrapped AES-GCM records with the current KDF policy"""
+    if not (stored.record and stored.wrapped_key and records.is_record(stored.wrapped_key)):
+        return False
+    algorithm, iterations = get_kdf_policy()
+    header = records.parse_header(stored.wrapped_key)
+    return (header.kdf_id, header.iterations) == (records.KDF_IDS[algorithm], iterations)
+
+
+def decrypt_stored_password(stored: StoredPassword, master_password: str,
+                            vault_key: Optional[VaultKey] = None) -> str:
+    """
+    Decrypt a password in any supported storage format
+
+    Args:
+        stored (StoredPassword): Encrypted columns
+        master_password (str): Master password
+        vault_key (VaultKey, optional): Owner's vault key, required for enveloped rows
+
+    Returns:
+        str: Decrypted password
+
+    Raises:
+        ValueError: If nothing is stored or the vault key is missing
+        Exception: If decryption fails
+    """
+    if stored.wrapped_key:
+        if vault_key is None:
+            raise ValueError("Vault key required for enveloped password")
+        data_key = vault_key.unwrap(stored.wrapped_key)
+        if stored.record:
+            return records.open_record(data_key, stored.record).decode()
+        # Fernet data key written before the record format existed
+        from cryptography.fernet import Fernet
+        return Fernet(data_key).decrypt(stored.ciphertext.encode()).decode()
+
+    if stored.record:
+        header = records.parse_header(stored.record)
+        key = EncryptionService(master_password, salt=header.salt.hex(), iterations=header.iterations,
+                                algorithm=_kdf_name(header.kdf_id)).get_raw_key()
+        return records.open_record(key, stored.record, header).decode()
+
+    if stored.ciphertext and stored.salt:
+        return EncryptionService(master_password, salt=stored.salt).decrypt(stored.ciphertext)
+
+    raise ValueError("No encrypted password stored")
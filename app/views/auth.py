@@ -3,6 +3,7 @@ Authentication views
 """
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from app.services.auth_service import AuthService
+from app.utils.admission import crypto_heavy
 from functools import wraps
 
 auth_bp = Blueprint('auth', __name__)
@@ -35,13 +36,14 @@ def index():
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
 @redirect_if_authenticated
+@crypto_heavy(methods=['POST'])
 def login():
     """Login page"""
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
         
-        success, error_message = AuthService.login_user(username, password)
+        success, error_message = AuthService.login_user(username, password, request.remote_addr)
         
         if success:
             flash('Đăng nhập thành công!', 'success')
@@ -53,6 +55,7 @@ def login():
 
 @auth_bp.route('/register', methods=['GET', 'POST'])
 @redirect_if_authenticated
+@crypto_heavy(methods=['POST'])
 def register():
     """Register page"""
     if request.method == 'POST':
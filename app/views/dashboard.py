@@ -12,15 +12,22 @@ dashboard_bp = Blueprint('dashboard', __name__)
 @login_required
 def index():
     """Dashboard main page"""
-    user = AuthService.get_current_user()
+    user = AuthService.get_current_user_record()
     if not user:
         flash('Vui lòng đăng nhập.', 'error')
         return redirect(url_for('auth.login'))
     
-    # Get user services
-    services = PasswordService.get_user_services(user.id)
+    # Get one page of user services (?after=<cursor> / ?before=<cursor>)
+    before = request.args.get('before')
+    page = PasswordService.get_user_services_page(
+        user.id,
+        cursor=before or request.args.get('after'),
+        direction='prev' if before else 'next',
+        limit=request.args.get('per_page', type=int),
+        sort=request.args.get('sort', 'created'),
+    )
     
-    return render_template('dashboard/index.html', user=user, services=services)
+    return render_template('dashboard/index.html', user=user, services=page['items'], page=page)
 
 @dashboard_bp.route('/profile')
 @login_required
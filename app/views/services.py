@@ -1,15 +1,37 @@
 """
 Service management views
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import (
+    Blueprint, Response, render_template, request, redirect, url_for, flash, jsonify, current_app, stream_with_context
+)
 from app.services.auth_service import AuthService
 from app.services.password_service import PasswordService
+from app.services.export_service import ExportService, EXPORT_FORMATS
 from app.views.auth import login_required
+from app.utils.admission import admission_controller, crypto_heavy
 
 services_bp = Blueprint('services', __name__)
 
+@services_bp.route('/services/search')
+@login_required
+def search_services():
+    """Search the user's services (?q=..., &format=json for JSON)"""
+    user = AuthService.get_current_user_record()
+    if not user:
+        flash('Vui lòng đăng nhập.', 'error')
+        return redirect(url_for('auth.login'))
+    
+    query = request.args.get('q', '').strip()
+    results = PasswordService.search_services(user.id, query, limit=request.args.get('limit', type=int))
+    
+    if request.args.get('format') == 'json':
+        return jsonify({"query": query, "results": [row.to_summary_dict() for row in results]})
+    
+    return render_template('services/search.html', user=user, query=query, results=results)
+
 @services_bp.route('/add_service', methods=['POST'])
 @login_required
+@crypto_heavy()
 def add_service():
     """Add new service"""
     user = AuthService.get_current_user()
@@ -42,6 +64,7 @@ def add_service():
 
 @services_bp.route('/edit_service/<int:service_id>', methods=['GET', 'POST'])
 @login_required
+@crypto_heavy(methods=['POST'])
 def edit_service(service_id):
     """Edit service"""
     user = AuthService.get_current_user()
@@ -49,7 +72,8 @@ def edit_service(service_id):
         flash('Vui lòng đăng nhập.', 'error')
         return redirect(url_for('auth.login'))
     
-    service = PasswordService.get_service(service_id, user.id)
+    # The form is filled from, and saved over, the primary copy
+    service = PasswordService.get_service_for_update(service_id, user.id)
     if not service:
         flash('Dịch vụ không tồn tại.', 'error')
         return redirect(url_for('dashboard.index'))
@@ -82,6 +106,7 @@ def edit_service(service_id):
 
 @services_bp.route('/service/<int:service_id>')
 @login_required
+@crypto_heavy()
 def service_detail(service_id):
     """Service detail page"""
     user = AuthService.get_current_user()
@@ -112,7 +137,7 @@ def service_detail(service_id):
 @login_required
 def delete_service(service_id):
     """Delete service (soft delete)"""
-    user = AuthService.get_current_user()
+    user = AuthService.get_current_user_record()
     if not user:
         flash('Vui lòng đăng nhập.', 'error')
         return redirect(url_for('auth.login'))
@@ -124,4 +149,118 @@ def delete_service(service_id):
     else:
         flash(error_message, 'error')
     
-    return redirect(url_for('dashboard.index')) 
\ No newline at end of file
+    return redirect(url_for('dashboard.index'))
+
+def _bulk_service_ids():
+    """Service IDs from a JSON body {"ids": [...]} or repeated service_ids form fields (None if invalid)"""
+    if request.is_json:
+        raw = (request.get_json(silent=True) or {}).get('ids')
+    else:
+        raw = request.form.getlist('service_ids')
+    if not isinstance(raw, list):
+        return None
+    try:
+        return [int(service_id) for service_id in raw]
+    except (TypeError, ValueError):
+        return None
+
+def _bulk_update(action):
+    """Run a bulk delete/restore for the current user and answer with JSON or a flash message"""
+    user = AuthService.get_current_user_record()
+    if not user:
+        flash('Vui lòng đăng nhập.', 'error')
+        return redirect(url_for('auth.login'))
+    
+    service_ids = _bulk_service_ids()
+    limit = current_app.config.get('SERVICES_BULK_MAX', 1000)
+    if not service_ids or len(service_ids) > limit:
+        message = f"Cần danh sách từ 1 đến {limit} mã dịch vụ."
+        if request.is_json:
+            return jsonify({"error": message}), 400
+        flash(message, 'error')
+        return redirect(url_for('dashboard.index'))
+    
+    method = PasswordService.delete_services if action == 'delete' else PasswordService.restore_services
+    results, error_message = method(user.id, service_ids)
+    changed = sum(1 for status in results.values() if status in ('deleted', 'restored'))
+    
+    if request.is_json:
+        if error_message:
+            return jsonify({"error": error_message}), 500
+        return jsonify({
+            "changed": changed,
+            "results": [{"id": service_id, "status": status} for service_id, status in results.items()]
+        })
+    
+    if error_message:
+        flash(error_message, 'error')
+    elif action == 'delete':
+        flash(f'Đã ẩn {changed} dịch vụ khỏi danh sách (xóa mềm).', 'success')
+    else:
+        flash(f'Đã khôi phục {changed} dịch vụ.', 'success')
+    return redirect(url_for('dashboard.index'))
+
+@services_bp.route('/services/bulk_delete', methods=['POST'])
+@login_required
+def bulk_delete_services():
+    """Soft delete several services (JSON {"ids": [...]} or form service_ids)"""
+    return _bulk_update('delete')
+
+@services_bp.route('/services/bulk_restore', methods=['POST'])
+@login_required
+def bulk_restore_services():
+    """Restore several soft-deleted services (JSON {"ids": [...]} or form service_ids)"""
+    return _bulk_update('restore')
+
+@services_bp.route('/services/export', methods=['POST'])
+@login_required
+def export_services():
+    """
+    Download all active services with their passwords (form: format=ndjson|csv, password, passphrase)
+    
+    The account password has to be entered again. The file is streamed
+    while rows are read and decrypted, encrypted as a whole with the
+    passphrase; a cleartext download needs EXPORT_ALLOW_CLEARTEXT.
+    """
+    user = AuthService.get_current_user()
+    if not user:
+        flash('Vui lòng đăng nhập.', 'error')
+        return redirect(url_for('auth.login'))
+    
+    export_format = request.form.get('format', 'ndjson')
+    passphrase = request.form.get('passphrase', '')
+    min_length = current_app.config.get('EXPORT_MIN_PASSPHRASE_LENGTH', 12)
+    error_message = None
+    if export_format not in EXPORT_FORMATS:
+        error_message = 'Định dạng xuất không hợp lệ.'
+    elif not passphrase and not current_app.config.get('EXPORT_ALLOW_CLEARTEXT', False):
+        error_message = 'Vui lòng nhập mật khẩu bảo vệ tệp xuất.'
+    elif passphrase and len(passphrase) < min_length:
+        error_message = f'Mật khẩu bảo vệ tệp xuất phải có ít nhất {min_length} ký tự.'
+    else:
+        _, error_message = AuthService.confirm_password(
+            user, request.form.get('password', ''), request.remote_addr
+        )
+    if error_message:
+        flash(error_message, 'error')
+        return redirect(url_for('dashboard.index'))
+    
+    # Decryption runs for the whole download, so the admission slot is held until the stream closes
+    if admission_controller.enabled and not admission_controller.acquire():
+        return admission_controller.overloaded_response()
+    try:
+        chunks = ExportService.stream_export(user.id, user.password_hash, export_format, passphrase or None)
+        response = Response(
+            stream_with_context(chunks),
+            mimetype='application/octet-stream' if passphrase else EXPORT_FORMATS[export_format],
+        )
+    except Exception:
+        if admission_controller.enabled:
+            admission_controller.release()
+        raise
+    if admission_controller.enabled:
+        response.call_on_close(admission_controller.release)
+    filename = ExportService.filename(export_format, encrypted=bool(passphrase))
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
@@ -0,0 +1,34 @@
+"""
+System views
+"""
+import hmac
+from flask import Blueprint, jsonify, current_app, abort, request
+from app import db
+from app.utils.db_profile import pool_stats
+
+system_bp = Blueprint('system', __name__)
+
+@system_bp.route('/system/stats')
+def stats():
+    """
+    Capacity statistics: admission control, hashing pool, login throttling, caches and DB pool
+    
+    Off unless SYSTEM_STATS_ENABLED is set, and then only for requests
+    sending SYSTEM_STATS_TOKEN as "Authorization: Bearer <token>".
+    """
+    token = current_app.config.get('SYSTEM_STATS_TOKEN')
+    if not current_app.config.get('SYSTEM_STATS_ENABLED', False) or not token:
+        abort(404)
+    scheme, _, supplied = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(supplied.encode(), token.encode()):
+        abort(401)
+    
+    extensions = ('admission_controller', 'hashing_executor', 'login_throttle', 'key_cache', 'batch_decryptor',
+                  'user_cache', 'db_router', 'rekey_scheduler', 'startup_profile')
+    data = {
+        name: current_app.extensions[name].stats()
+        for name in extensions
+        if name in current_app.extensions
+    }
+    data['database'] = pool_stats(db.engine)
+    return jsonify(data)
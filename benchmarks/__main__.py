@@ -0,0 +1,47 @@
+"""
+Run the crypto benchmarks
+
+    python -m benchmarks --output bench.json [--baseline old.json] [--quick]
+"""
+import argparse
+import sys
+
+from benchmarks import crypto
+from benchmarks.runner import run_suite, check_thresholds, compare_baseline, load_json, write_json
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Crypto hot-path benchmarks")
+    parser.add_argument("--output", default="bench_output.json", help="Where to write JSON results")
+    parser.add_argument("--thresholds", default=crypto.default_thresholds_path(),
+                        help="JSON file with absolute limits per case")
+    parser.add_argument("--baseline", help="Previous results to compare throughput with")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Allowed throughput drop vs baseline (0.2 = 20%%)")
+    parser.add_argument("--max-workers", type=int, help="Largest process count for scaling runs")
+    parser.add_argument("--no-scaling", action="store_true", help="Skip multi-process scaling runs")
+    parser.add_argument("--quick", action="store_true", help="Fewer settings and iterations")
+    args = parser.parse_args(argv)
+
+    results = run_suite(
+        crypto.CASES,
+        crypto.build_plan(quick=args.quick),
+        crypto.case_id,
+        scaling_worker=None if args.no_scaling else crypto.run_case_ops,
+        scaling_ops=2 if args.quick else 5,
+        max_workers=args.max_workers,
+    )
+    write_json(args.output, results)
+    print(f"Results written to {args.output}")
+
+    failures = check_thresholds(results, load_json(args.thresholds)) if args.thresholds else []
+    if args.baseline:
+        failures += compare_baseline(results, load_json(args.baseline), args.max_regression)
+
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Benchmarks for the password hashing and encryption hot paths
+"""
+import os
+from typing import Any, Callable, Dict, List
+
+from app.utils.password_utils import hash_password, verify_password, BCRYPT_DEFAULT_ROUNDS
+from app.utils.encryption import EncryptionService, PBKDF2_ITERATIONS, DEFAULT_KDF_ALGORITHM
+
+SAMPLE_PASSWORD = "Benchmark-Passw0rd!"
+SAMPLE_SECRET = "service-secret-value-1234567890"
+
+
+def _hash_password_case(algorithm: str, **params: Any) -> Callable[[], Any]:
+    return lambda: hash_password(SAMPLE_PASSWORD, algorithm=algorithm, **params)
+
+
+def _verify_password_case(algorithm: str, **params: Any) -> Callable[[], Any]:
+    stored = hash_password(SAMPLE_PASSWORD, algorithm=algorithm, **params)
+    return lambda: verify_password(SAMPLE_PASSWORD, stored)
+
+
+def _derive_key_case(iterations: int) -> Callable[[], Any]:
+    encryptor = EncryptionService(SAMPLE_PASSWORD, iterations=iterations)
+    return encryptor._derive_key
+
+
+def _encrypt_case(iterations: int) -> Callable[[], Any]:
+    encryptor = EncryptionService(SAMPLE_PASSWORD, iterations=iterations)
+    return lambda: encryptor.encrypt(SAMPLE_SECRET)
+
+
+def _decrypt_case(iterations: int) -> Callable[[], Any]:
+    encryptor = EncryptionService(SAMPLE_PASSWORD, iterations=iterations)
+    token = encryptor.encrypt(SAMPLE_SECRET)
+    return lambda: encryptor.decrypt(token)
+
+
+def _service_password_case(algorithm: str, iterations: int) -> Callable[[], Any]:
+    from app.models.service import Service
+    from app.utils.vault import seal_password
+
+    # Record with its own KDF parameters: every read pays the full derivation
+    stored = seal_password(SAMPLE_SECRET, SAMPLE_PASSWORD, kdf=(algorithm, iterations))
+    service = Service(service_name="bench", service_username="bench",
+                      service_password_encrypted="", encryption_salt="", password_record=stored.record)
+    return lambda: service.get_service_password(SAMPLE_PASSWORD)
+
+
+CASES: Dict[str, Callable[..., Callable[[], Any]]] = {
+    "hash_password": _hash_password_case,
+    "verify_password": _verify_password_case,
+    "derive_key": _derive_key_case,
+    "encrypt": _encrypt_case,
+    "decrypt": _decrypt_case,
+    "service_get_password": _service_password_case,
+}
+
+
+def build_plan(quick: bool = False) -> List[Dict[str, Any]]:
+    """
+    List of (case, params, iterations) to run
+
+    Args:
+        quick (bool): Use cheaper settings suitable for CI smoke runs
+
+    Returns:
+        list: Benchmark plan entries
+    """
+    hasher_settings = [{"algorithm": "bcrypt", "rounds": r}
+                       for r in ([BCRYPT_DEFAULT_ROUNDS] if quick else [10, 11, BCRYPT_DEFAULT_ROUNDS, 13])]
+    hasher_settings += [{"algorithm": "scrypt", "n": n, "r": 8, "p": 1}
+                        for n in ([2 ** 15] if quick else [2 ** 14, 2 ** 15, 2 ** 16])]
+    hasher_settings += [{"algorithm": "pbkdf2_sha256", "iterations": n}
+                        for n in ([600000] if quick else [310000, 600000, 1000000])]
+    kdf_iterations = [PBKDF2_ITERATIONS] if quick else [50000, PBKDF2_ITERATIONS, 200000, 600000]
+    # Decrypt latency of a service record under each candidate KDF policy
+    kdf_policies = [(DEFAULT_KDF_ALGORITHM, PBKDF2_ITERATIONS)]
+    if not quick:
+        kdf_policies = [(DEFAULT_KDF_ALGORITHM, n) for n in kdf_iterations] + [("pbkdf2_sha512", PBKDF2_ITERATIONS)]
+    slow_ops = 3 if quick else 10
+    fast_ops = 200 if quick else 2000
+
+    plan = []
+    for params in hasher_settings:
+        plan.append({"case": "hash_password", "params": params, "iterations": slow_ops})
+        plan.append({"case": "verify_password", "params": params, "iterations": slow_ops})
+    for n in kdf_iterations:
+        plan.append({"case": "derive_key", "params": {"iterations": n}, "iterations": slow_ops * 2})
+    plan.append({"case": "encrypt", "params": {"iterations": PBKDF2_ITERATIONS}, "iterations": fast_ops})
+    plan.append({"case": "decrypt", "params": {"iterations": PBKDF2_ITERATIONS}, "iterations": fast_ops})
+    for algorithm, n in kdf_policies:
+        plan.append({"case": "service_get_password", "params": {"algorithm": algorithm, "iterations": n},
+                     "iterations": slow_ops * 2})
+    return plan
+
+
+def case_id(case: str, params: Dict[str, Any]) -> str:
+    """Stable name used as the key in results and threshold files"""
+    args = ",".join(f"{k}={v}" for k, v in sorted(params.items()))
+    return f"{case}[{args}]"
+
+
+def run_case_ops(case: str, params: Dict[str, Any], ops: int) -> int:
+    """
+    Build a case and run it a number of times (process pool worker)
+
+    Args:
+        case (str): Case name in CASES
+        params (dict): Case parameters
+        ops (int): Number of operations
+
+    Returns:
+        int: Number of operations performed
+    """
+    fn = CASES[case](**params)
+    for _ in range(ops):
+        fn()
+    return ops
+
+
+def default_thresholds_path() -> str:
+    return os.path.join(os.path.dirname(__file__), "thresholds.json")
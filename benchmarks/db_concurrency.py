@@ -0,0 +1,157 @@
+"""
+Concurrent read/write throughput of SQLite with and without the engine profile
+
+    python -m benchmarks.db_concurrency --output db_bench.json [--readers 4] [--writers 2] [--duration 5]
+
+Each reader and writer is a separate process with its own connection to
+the same database file, like several gunicorn workers. The 'default'
+profile is SQLite's rollback journal with no PRAGMAs; 'tuned' applies
+the PRAGMAs from Config (WAL, synchronous, busy_timeout, mmap, cache).
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import create_engine, insert
+
+from benchmarks.runner import environment_info, write_json
+
+USERS = 200
+SERVICES_PER_USER = 50
+
+
+def create_database(path: str) -> None:
+    """Create the app schema in a database file and seed services"""
+    from app import db
+    from app.models.user import User
+    from app.models.service import Service
+
+    engine = create_engine(f"sqlite:///{path}")
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "password_hash": "x",
+             "is_active": True}
+            for i in range(1, USERS + 1)
+        ])
+        conn.execute(insert(Service), [
+            {"user_id": u, "service_name": f"svc{n}", "service_username": "u", "service_password_encrypted": "",
+             "encryption_salt": "", "password_record": os.urandom(80), "is_active": True}
+            for u in range(1, USERS + 1) for n in range(SERVICES_PER_USER)
+        ])
+    engine.dispose()
+
+
+def _run_worker(path: str, role: str, pragmas: List[Tuple[str, Any]], duration: float, seed: int) -> Dict[str, Any]:
+    """Run reads or writes for a fixed time (process pool worker)"""
+    from app.utils.db_profile import apply_pragmas
+
+    # isolation_level=None: explicit BEGIN/COMMIT like SQLAlchemy transactions
+    conn = sqlite3.connect(path, isolation_level=None)
+    apply_pragmas(conn, pragmas)
+    rng = random.Random(seed)
+    ops = errors = 0
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        user_id = rng.randint(1, USERS)
+        start = time.perf_counter()
+        try:
+            if role == 'read':
+                conn.execute("SELECT id, service_name, password_record FROM services "
+                             "WHERE user_id = ? AND is_active = 1", (user_id,)).fetchall()
+            else:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("UPDATE services SET password_record = ?, updated_at = CURRENT_TIMESTAMP "
+                             "WHERE user_id = ? AND service_name = ?",
+                             (os.urandom(80), user_id, f"svc{rng.randrange(SERVICES_PER_USER)}"))
+                conn.execute("COMMIT")
+            ops += 1
+            latencies.append(time.perf_counter() - start)
+        except sqlite3.OperationalError:
+            # "database is locked"
+            errors += 1
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+    conn.close()
+    return {"role": role, "ops": ops, "errors": errors, "latencies": latencies}
+
+
+def run_profile(name: str, pragmas: List[Tuple[str, Any]], readers: int, writers: int,
+                duration: float) -> Dict[str, Any]:
+    """
+    Measure one profile on a fresh database
+
+    Args:
+        name (str): Profile name for output
+        pragmas (list): PRAGMAs applied to every connection
+        readers (int): Reader processes
+        writers (int): Writer processes
+        duration (float): Seconds to run
+
+    Returns:
+        dict: Throughput, p99 latency and lock errors per role
+    """
+    from benchmarks.harness import percentile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"{name}.db")
+        create_database(path)
+        if pragmas:
+            # journal_mode=WAL is persistent; set it once before the workers start
+            with sqlite3.connect(path) as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+        roles = ['read'] * readers + ['write'] * writers
+        with ProcessPoolExecutor(max_workers=len(roles)) as pool:
+            futures = [pool.submit(_run_worker, path, role, pragmas, duration, seed)
+                       for seed, role in enumerate(roles)]
+            outcomes = [future.result() for future in futures]
+
+    result: Dict[str, Any] = {"profile": name, "pragmas": dict(pragmas)}
+    for role in ('read', 'write'):
+        mine = [o for o in outcomes if o["role"] == role]
+        latencies = [latency for o in mine for latency in o["latencies"]]
+        ops = sum(o["ops"] for o in mine)
+        result[role] = {
+            "workers": len(mine),
+            "ops_per_sec": round(ops / duration, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "locked_errors": sum(o["errors"] for o in mine),
+        }
+    return result
+
+
+def main(argv=None) -> int:
+    from app.config.config import Config
+    from app.utils.db_profile import sqlite_pragmas
+
+    parser = argparse.ArgumentParser(description="SQLite concurrency benchmark")
+    parser.add_argument("--output", default="db_bench_output.json", help="Where to write JSON results")
+    parser.add_argument("--readers", type=int, default=4, help="Reader processes")
+    parser.add_argument("--writers", type=int, default=2, help="Writer processes")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per profile")
+    args = parser.parse_args(argv)
+
+    tuned = [(name, value) for name, value in sqlite_pragmas(vars(Config)) if name != 'journal_mode']
+    results = {"meta": environment_info(), "profiles": {}}
+    for name, pragmas in (("default", []), ("tuned", tuned)):
+        print(f"running {name} profile: {args.readers} readers, {args.writers} writers, {args.duration}s")
+        result = run_profile(name, pragmas, args.readers, args.writers, args.duration)
+        results["profiles"][name] = result
+        for role in ('read', 'write'):
+            r = result[role]
+            print(f"  {role:5} {r['ops_per_sec']:>10} ops/s  p99 {r['p99_ms']} ms  locked {r['locked_errors']}")
+
+    write_json(args.output, results)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
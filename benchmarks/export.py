@@ -0,0 +1,111 @@
+"""
+Memory and time to first byte of the vault export
+
+    python -m benchmarks.export --output export_bench.json [--sizes 10 1000 10000 100000]
+
+'list' builds the export from get_user_services(include_passwords=True)
+and serializes it at once; 'stream' is ExportService.stream_export. Peak
+memory is measured with tracemalloc around each export.
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict
+
+from sqlalchemy import insert, select
+
+from benchmarks.runner import environment_info, write_json
+
+
+def seed(user_id: int, master_password: str, count: int) -> None:
+    """Give the user count services that share one encrypted password record"""
+    from app import db
+    from app.models.service import Service
+    from app.services.password_service import PasswordService
+
+    PasswordService.add_service(user_id, {
+        'service_name': 'svc0', 'service_username': 'bench', 'service_password': 'secret-password'
+    }, master_password)
+    template = db.session.execute(
+        select(Service).where(Service.user_id == user_id).options(Service.with_secrets())
+    ).scalar_one()
+    secrets = {column: getattr(template, column) for column in (
+        'service_password_encrypted', 'encryption_salt', 'wrapped_data_key', 'password_record')}
+    rows = [dict(secrets, user_id=user_id, service_name=f"svc{n}", service_username='bench',
+                 service_url=f"https://svc{n}.example.com", notes='x' * 64, is_active=True)
+            for n in range(1, count)]
+    for start in range(0, len(rows), 10000):
+        db.session.execute(insert(Service), rows[start:start + 10000])
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def measure_export(fn) -> Dict[str, Any]:
+    """Run one export, returning bytes, time to first byte and peak traced memory"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    first_byte = None
+    size = 0
+    for chunk in fn():
+        if first_byte is None:
+            first_byte = time.perf_counter() - started
+        size += len(chunk)
+    total = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"bytes": size, "first_byte_ms": round(first_byte * 1000, 3), "total_ms": round(total * 1000, 3),
+            "peak_kib": round(peak / 1024, 1)}
+
+
+def run_size(count: int) -> Dict[str, Any]:
+    """Measure both strategies for a vault of count services"""
+    import json
+    from app import create_app, db
+    from app.models.user import User
+    from app.services.export_service import ExportService
+    from app.services.password_service import PasswordService
+
+    app = create_app('testing')
+    with app.app_context():
+        user = User(username="bench", email="bench@example.com")
+        user.set_password("Pass1234")
+        db.session.add(user)
+        db.session.commit()
+        user_id, master = user.id, user.password_hash
+        seed(user_id, master, count)
+
+        def as_list():
+            services = PasswordService.get_user_services(user_id, include_passwords=True, master_password=master)
+            yield "".join(json.dumps(s, ensure_ascii=False) + "\n" for s in services).encode('utf-8')
+
+        results = {}
+        for name, fn in (("list", as_list), ("stream", lambda: ExportService.stream_export(user_id, master))):
+            db.session.expunge_all()
+            results[name] = measure_export(fn)
+        db.session.remove()
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Vault export benchmark")
+    parser.add_argument("--output", default="export_bench_output.json", help="Where to write JSON results")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000], help="Vault sizes")
+    args = parser.parse_args(argv)
+
+    results = {"meta": environment_info(), "sizes": {}}
+    for count in args.sizes:
+        print(f"running {count} services")
+        result = run_size(count)
+        results["sizes"][str(count)] = result
+        for name, r in result.items():
+            print(f"  {name:6} peak {r['peak_kib']:>10} KiB  first byte {r['first_byte_ms']:>9} ms  "
+                  f"total {r['total_ms']} ms")
+
+    write_json(args.output, results)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
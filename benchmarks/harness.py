@@ -0,0 +1,120 @@
+"""
+Timing helpers shared by the benchmark suites
+"""
+import math
+import os
+import time
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of a list of samples
+
+    Args:
+        samples (list): Measured values
+        pct (float): Percentile between 0 and 100
+
+    Returns:
+        float: Percentile value
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def measure(fn: Callable[[], Any], iterations: int, warmup: int = 1) -> Dict[str, float]:
+    """
+    Time a zero-argument callable on the current thread
+
+    Args:
+        fn (callable): Operation to measure
+        iterations (int): Number of timed calls
+        warmup (int): Number of untimed calls made first
+
+    Returns:
+        dict: ops_per_sec, mean/p50/p99 latency in milliseconds
+    """
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "iterations": iterations,
+        "ops_per_sec": iterations / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": percentile(samples, 50),
+        "p99_ms": percentile(samples, 99),
+    }
+
+
+def measure_scaling(worker: Callable[..., Any], args: tuple, ops_per_worker: int,
+                    worker_counts: List[int]) -> List[Dict[str, float]]:
+    """
+    Measure aggregate throughput with 1..N worker processes
+
+    Args:
+        worker (callable): Picklable function run as worker(*args, ops_per_worker)
+        args (tuple): Arguments identifying the case to run
+        ops_per_worker (int): Operations each worker performs
+        worker_counts (list): Process counts to try
+
+    Returns:
+        list: One entry per worker count with total ops/sec and speedup
+    """
+    results = []
+    baseline: Optional[float] = None
+    for workers in worker_counts:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Start the processes before timing
+            list(pool.map(_noop, range(workers)))
+            started = time.perf_counter()
+            futures = [pool.submit(worker, *args, ops_per_worker) for _ in range(workers)]
+            for future in futures:
+                future.result()
+            elapsed = time.perf_counter() - started
+
+        ops_per_sec = workers * ops_per_worker / elapsed if elapsed else 0.0
+        if baseline is None:
+            baseline = ops_per_sec
+        results.append({
+            "workers": workers,
+            "ops_per_sec": ops_per_sec,
+            "speedup": ops_per_sec / baseline if baseline else 0.0,
+        })
+    return results
+
+
+def default_worker_counts(max_workers: Optional[int] = None) -> List[int]:
+    """
+    Powers of two up to the CPU count, always including the CPU count itself
+
+    Args:
+        max_workers (int, optional): Upper bound, defaults to os.cpu_count()
+
+    Returns:
+        list: Worker counts to benchmark
+    """
+    limit = max_workers or os.cpu_count() or 1
+    counts = []
+    n = 1
+    while n < limit:
+        counts.append(n)
+        n *= 2
+    counts.append(limit)
+    return counts
+
+
+def _noop(_):
+    return None
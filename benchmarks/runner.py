@@ -0,0 +1,119 @@
+"""
+Benchmark runner: collects results, writes JSON and checks regressions
+"""
+import json
+import os
+import platform
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.harness import measure, measure_scaling, default_worker_counts
+
+
+def run_suite(cases: Dict[str, Callable[..., Callable[[], Any]]], plan: List[Dict[str, Any]],
+              case_id: Callable[[str, Dict[str, Any]], str],
+              scaling_worker: Optional[Callable[..., Any]] = None,
+              scaling_ops: int = 5, max_workers: Optional[int] = None,
+              log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """
+    Run every entry of a benchmark plan
+
+    Args:
+        cases (dict): Case name -> factory returning a zero-argument callable
+        plan (list): Entries with 'case', 'params', 'iterations' and optional 'scaling'
+        case_id (callable): Builds the result key from case name and params
+        scaling_worker (callable, optional): Picklable worker for multi-process scaling
+        scaling_ops (int): Operations per worker process in scaling runs
+        max_workers (int, optional): Largest process count for scaling runs
+        log (callable): Progress output
+
+    Returns:
+        dict: Results document with 'meta' and 'cases'
+    """
+    results: Dict[str, Any] = {"meta": environment_info(), "cases": {}}
+    scaled = set()
+    for entry in plan:
+        name = case_id(entry["case"], entry["params"])
+        log(f"running {name} x{entry['iterations']}")
+        fn = cases[entry["case"]](**entry["params"])
+        result = {"case": entry["case"], "params": entry["params"]}
+        result.update(measure(fn, entry["iterations"]))
+
+        # Scaling is measured once per primitive, on its first parameter set
+        if scaling_worker and entry.get("scaling", True) and entry["case"] not in scaled:
+            scaled.add(entry["case"])
+            result["scaling"] = measure_scaling(
+                scaling_worker, (entry["case"], entry["params"]),
+                scaling_ops, default_worker_counts(max_workers)
+            )
+        results["cases"][name] = result
+        log(f"  {result['ops_per_sec']:.1f} ops/s  p50 {result['p50_ms']:.2f} ms  p99 {result['p99_ms']:.2f} ms")
+    return results
+
+
+def environment_info() -> Dict[str, Any]:
+    """Describe the machine the benchmark ran on"""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def check_thresholds(results: Dict[str, Any], thresholds: Dict[str, Dict[str, float]]) -> List[str]:
+    """
+    Compare results with absolute limits
+
+    Supported limits per case: min_ops_per_sec, max_p50_ms, max_p99_ms.
+
+    Returns:
+        list: Human readable failures, empty when everything passed
+    """
+    failures = []
+    for name, limits in thresholds.items():
+        result = results["cases"].get(name)
+        if result is None:
+            continue
+        if "min_ops_per_sec" in limits and result["ops_per_sec"] < limits["min_ops_per_sec"]:
+            failures.append(f"{name}: {result['ops_per_sec']:.1f} ops/s < {limits['min_ops_per_sec']}")
+        for metric in ("p50_ms", "p99_ms"):
+            limit = limits.get(f"max_{metric}")
+            if limit is not None and result[metric] > limit:
+                failures.append(f"{name}: {metric} {result[metric]:.2f} > {limit}")
+    return failures
+
+
+def compare_baseline(results: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """
+    Compare throughput with a previous results file
+
+    Args:
+        results (dict): Current results
+        baseline (dict): Previous results document
+        max_regression (float): Allowed relative slowdown, e.g. 0.2 for 20%
+
+    Returns:
+        list: Human readable failures
+    """
+    failures = []
+    for name, result in results["cases"].items():
+        previous = baseline.get("cases", {}).get(name)
+        if not previous or not previous.get("ops_per_sec"):
+            continue
+        change = result["ops_per_sec"] / previous["ops_per_sec"] - 1
+        if change < -max_regression:
+            failures.append(f"{name}: throughput {change:+.1%} vs baseline")
+    return failures
+
+
+def load_json(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def write_json(path: str, data: Dict[str, Any]) -> None:
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=2, sort_keys=True)
+        fh.write("\n")
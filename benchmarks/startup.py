@@ -0,0 +1,87 @@
+"""
+Cold start time of create_app, per phase
+
+    python -m benchmarks.startup --output startup_bench.json [--runs 5]
+
+Every run is a fresh interpreter (like a new gunicorn worker) against the
+same database file, which the first run creates. 'always' syncs the schema
+on every start as before; 'auto' only compares the stored schema version.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List
+
+from benchmarks.runner import environment_info, write_json
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app('development')
+finished = time.perf_counter()
+profile = app.extensions['startup_profile'].stats()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (finished - imported) * 1000,
+    "phases": profile["phases"],
+    "schema_status": app.extensions['schema_status'],
+    "crypto_loaded": any(name.startswith(('cryptography', 'bcrypt')) for name in sys.modules),
+}))
+"""
+
+
+def cold_start(database_url: str, schema_check: str) -> Dict[str, Any]:
+    """Run create_app once in a new interpreter and return its timings"""
+    env = dict(os.environ, DATABASE_URL=database_url, SCHEMA_CHECK=schema_check, PYTHONPATH=ROOT)
+    output = subprocess.run([sys.executable, "-c", _CHILD], env=env, cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Median of each timing over the runs"""
+    phases = {name: round(statistics.median(run["phases"][name] for run in runs), 3)
+              for name in runs[0]["phases"]}
+    return {
+        "runs": len(runs),
+        "import_ms": round(statistics.median(run["import_ms"] for run in runs), 3),
+        "create_app_ms": round(statistics.median(run["create_app_ms"] for run in runs), 3),
+        "phases_ms": phases,
+        "schema_status": sorted({run["schema_status"] for run in runs}),
+        "crypto_loaded": any(run["crypto_loaded"] for run in runs),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Application startup benchmark")
+    parser.add_argument("--output", default="startup_bench_output.json", help="Where to write JSON results")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per mode")
+    args = parser.parse_args(argv)
+
+    results = {"meta": environment_info(), "modes": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+        # Create the database once so every measured run starts against an existing schema
+        cold_start(database_url, 'always')
+        for mode in ('always', 'auto'):
+            print(f"running SCHEMA_CHECK={mode} x{args.runs}")
+            result = summarize([cold_start(database_url, mode) for _ in range(args.runs)])
+            results["modes"][mode] = result
+            print(f"  import {result['import_ms']} ms  create_app {result['create_app_ms']} ms  "
+                  f"schema {result['phases_ms'].get('schema')} ms")
+
+    write_json(args.output, results)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
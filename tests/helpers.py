@@ -0,0 +1,42 @@
+"""
+Shared setup for tests that need users with stored services
+
+Plain functions rather than pytest fixtures, so the test files keep running
+on their own with `python tests/test_x.py`. Call them inside an app context.
+"""
+from typing import Any, List
+
+from app import db
+from app.models.user import User
+from app.models.service import Service
+from app.services.password_service import PasswordService
+
+PASSWORD = "Pass1234"
+
+
+def create_user(name: str, password: str = PASSWORD) -> User:
+    """Commit a user named name with email name@example.com"""
+    user = User(username=name, email=f"{name}@example.com")
+    user.set_password(password)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def add_service(user: User, name: str, **fields: Any) -> None:
+    """Add one service through PasswordService; fields override the defaults"""
+    data = {'service_name': name, 'service_username': user.username, 'service_password': 'secret'}
+    data.update(fields)
+    PasswordService.add_service(user.id, data, user.password_hash)
+
+
+def add_services(user: User, count: int, **fields: Any) -> List[int]:
+    """
+    Add services svc0..svc{count-1} with passwords secret0..secret{count-1}
+
+    Returns:
+        list: IDs of all the user's services in id order
+    """
+    for i in range(count):
+        add_service(user, f'svc{i}', service_password=f'secret{i}', **fields)
+    return [service.id for service in Service.query.filter_by(user_id=user.id).order_by(Service.id)]
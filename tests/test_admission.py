@@ -0,0 +1,75 @@
+import sys
+import os
+import threading
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import Flask
+from app import create_app
+from app.config.config import TestingConfig
+from app.utils.admission import AdmissionController
+
+def _app(controller, release):
+    app = Flask(__name__)
+
+    @app.route('/heavy')
+    @controller.limit()
+    def heavy():
+        release.wait(5)
+        return 'ok'
+
+    @app.route('/cheap')
+    def cheap():
+        return 'ok'
+
+    return app
+
+def test_saturated_view_is_shed_with_retry_after():
+    controller = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=0.1, retry_after=7)
+    release = threading.Event()
+    app = _app(controller, release)
+
+    # Một request chậm giữ slot duy nhất
+    worker = threading.Thread(target=lambda: app.test_client().get('/heavy'))
+    worker.start()
+    while controller.stats()["active"] == 0:
+        pass
+    try:
+        response = app.test_client().get('/heavy')
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '7'
+        assert app.test_client().get('/cheap').status_code == 200
+        assert controller.stats()["shed_queue_full"] == 1
+    finally:
+        release.set()
+        worker.join()
+    assert controller.stats()["active"] == 0
+
+def test_queued_request_times_out():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+    assert controller.acquire() == True
+    assert controller.acquire() == False
+    assert controller.stats()["shed_timeout"] == 1
+    controller.release()
+    assert controller.acquire() == True
+
+def test_system_stats_require_token(monkeypatch):
+    # Mặc định tắt
+    assert create_app('testing').test_client().get('/system/stats').status_code == 404
+
+    monkeypatch.setattr(TestingConfig, 'SYSTEM_STATS_ENABLED', True)
+    # Bật nhưng chưa cấu hình token thì vẫn không phục vụ
+    assert create_app('testing').test_client().get('/system/stats').status_code == 404
+
+    monkeypatch.setattr(TestingConfig, 'SYSTEM_STATS_TOKEN', 'stats-token')
+    client = create_app('testing').test_client()
+    assert client.get('/system/stats').status_code == 401
+    assert client.get('/system/stats', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = client.get('/system/stats', headers={'Authorization': 'Bearer stats-token'})
+    assert response.status_code == 200
+    assert 'admission_controller' in response.get_json()
+
+if __name__ == "__main__":
+    # test_system_stats_require_token dùng fixture monkeypatch nên chạy qua pytest
+    if pytest.main([__file__, "-q"]) == 0:
+        print("✅ Tất cả kiểm tra admission control đều thành công")
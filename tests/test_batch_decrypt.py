@@ -0,0 +1,123 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import logging
+import threading
+import pytest
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from cryptography.fernet import Fernet
+from app import create_app
+from app.utils.batch_decrypt import BatchDecryptor
+from app.utils.encryption import EncryptionService
+from app.utils.vault import VaultKey, StoredPassword, seal_password
+
+MASTER = "master-secret"
+
+def _records():
+    vault_key = VaultKey(MASTER, VaultKey.generate_salt())
+    records = []
+    for i in range(6):
+        if i % 3 == 0:
+            records.append(seal_password(f"secret{i}", MASTER, vault_key))
+        elif i % 3 == 1:
+            records.append(seal_password(f"secret{i}", MASTER, kdf=("pbkdf2_sha512", 1000)))
+        else:
+            # Định dạng Fernet cũ với salt riêng cho từng dòng
+            encryptor = EncryptionService(MASTER)
+            records.append(StoredPassword(encryptor.encrypt(f"secret{i}"), encryptor.get_salt(), None, None))
+    # Khóa dữ liệu Fernet bọc bằng token Fernet (định dạng vault đầu tiên)
+    data_key = Fernet.generate_key()
+    records.append(StoredPassword(Fernet(data_key).encrypt(b"secret6").decode(), "",
+                                  vault_key._get_kek().encrypt_bytes(data_key), None))
+    # Bản ghi hỏng: sai salt
+    records.append(StoredPassword(records[2].ciphertext, "0" * 32, None, None))
+    return records, vault_key
+
+def _check(decryptor):
+    records, vault_key = _records()
+    try:
+        results = decryptor.decrypt(records, MASTER, vault_key)
+    finally:
+        decryptor.shutdown()
+    assert results == [f"secret{i}" for i in range(7)] + [None]
+
+def test_thread_pool_keeps_input_order():
+    _check(BatchDecryptor(kind='thread', max_workers=3, threshold=2))
+
+def test_process_pool_keeps_input_order():
+    _check(BatchDecryptor(kind='process', max_workers=2, threshold=2))
+
+def test_inline():
+    _check(BatchDecryptor(kind='inline'))
+
+class _BrokenPool:
+    """Pool whose workers died: every future fails with BrokenProcessPool"""
+    def __init__(self):
+        self.shut_down = False
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+def test_broken_pool_falls_back_inline():
+    decryptor = BatchDecryptor(kind='process', max_workers=2, threshold=2)
+    pool = decryptor._pool = _BrokenPool()
+    _check(decryptor)
+    # Pool hỏng bị loại bỏ để lô sau tạo pool mới
+    assert pool.shut_down
+    assert decryptor.stats()["broken_pools"] == 1
+
+def test_timeout_returns_none_for_slow_chunks():
+    release = threading.Event()
+
+    class _StuckPool(_BrokenPool):
+        def submit(self, fn, *args):
+            future = Future()
+
+            def finish():
+                release.wait(5)
+                if future.set_running_or_notify_cancel():
+                    future.set_result([])
+            threading.Thread(target=finish).start()
+            return future
+
+    records, vault_key = _records()
+    decryptor = BatchDecryptor(kind='thread', max_workers=2, threshold=2, timeout=0.05)
+    decryptor._pool = _StuckPool()
+    try:
+        results = decryptor.decrypt(records, MASTER, vault_key)
+    finally:
+        release.set()
+    # Bản ghi vault giải mã trực tiếp, bản ghi cũ quá hạn trả về None
+    assert results[0] == "secret0" and results[3] == "secret3"
+    assert results[1] is None and results[2] is None
+    assert decryptor.stats()["timeouts"] == 2
+
+@pytest.mark.parametrize("kind", ["inline", "thread", "process"])
+def test_failed_legacy_record_is_logged(kind, caplog):
+    # Lỗi từ worker được trả về tiến trình cha và ghi log kèm chỉ số gốc
+    with caplog.at_level(logging.ERROR, logger="app.utils.batch_decrypt"):
+        _check(BatchDecryptor(kind=kind, max_workers=2, threshold=2))
+    messages = [r.getMessage() for r in caplog.records if r.name == "app.utils.batch_decrypt"]
+    assert len(messages) == 1 and messages[0].startswith("Error decrypting record 7: InvalidToken")
+
+def test_defaults_to_thread_pool():
+    app = create_app('testing')
+    assert app.config['DECRYPT_EXECUTOR'] == 'thread'
+    assert app.extensions['batch_decryptor'].stats()["timeout"] == app.config['DECRYPT_TIMEOUT']
+
+if __name__ == "__main__":
+    test_thread_pool_keeps_input_order()
+    test_process_pool_keeps_input_order()
+    test_inline()
+    test_broken_pool_falls_back_inline()
+    test_timeout_returns_none_for_slow_chunks()
+    test_defaults_to_thread_pool()
+    pytest.main([__file__, "-q", "-k", "failed_legacy_record_is_logged"])
+    print("✅ Tất cả kiểm tra giải mã hàng loạt đều thành công")
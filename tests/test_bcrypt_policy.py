@@ -0,0 +1,71 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.models.user import User
+from app.models.service import Service
+from app.services.auth_service import AuthService
+from app.utils.password_utils import (
+    hash_password, get_hash_rounds, needs_rehash, calibrate_bcrypt_rounds, set_bcrypt_rounds
+)
+
+def test_hash_rounds_and_needs_rehash():
+    set_bcrypt_rounds(5)
+    try:
+        assert get_hash_rounds(hash_password("MySecret123", rounds=4)) == 4
+        assert needs_rehash(hash_password("MySecret123", rounds=4)) == True
+        assert needs_rehash(hash_password("MySecret123", rounds=5)) == False
+        # Hash mạnh hơn chính sách hiện tại không bị hạ cấp
+        assert needs_rehash(hash_password("MySecret123", rounds=6)) == False
+        assert get_hash_rounds("not-a-bcrypt-hash") is None
+    finally:
+        set_bcrypt_rounds(4)
+
+def test_calibration_respects_bounds():
+    # Ngân sách rất nhỏ: phải trả về mức sàn
+    assert calibrate_bcrypt_rounds(target_ms=0.001, min_rounds=4, max_rounds=8) == 4
+    rounds = calibrate_bcrypt_rounds(target_ms=10000, min_rounds=4, max_rounds=6)
+    assert rounds == 6
+
+def test_login_upgrades_weak_hash_and_keeps_services_readable():
+    app = create_app('testing')
+    with app.test_request_context():
+        user = User(username="alice", email="alice@example.com")
+        user.password_hash = hash_password("MyPass123", rounds=4)
+        db.session.add(user)
+        db.session.commit()
+
+        service = Service(user_id=user.id, service_name="GitHub", service_username="alice")
+        service.set_service_password("ghp_secret", user.password_hash)
+        db.session.add(service)
+        db.session.commit()
+
+        set_bcrypt_rounds(5)
+        try:
+            success, _ = AuthService.login_user("alice", "MyPass123")
+            assert success == True
+            assert get_hash_rounds(user.password_hash) == 5
+            assert service.get_service_password(user.password_hash) == "ghp_secret"
+        finally:
+            set_bcrypt_rounds(4)
+
+def test_calibration_is_opt_in_and_cli_pins_rounds(tmp_path):
+    from app.config.config import Config
+    assert Config.BCRYPT_CALIBRATE == False
+    env_file = tmp_path / ".env"
+    env_file.write_text("SECRET_KEY=x\nBCRYPT_ROUNDS=9\n", encoding="utf-8")
+    app = create_app('testing')
+    result = app.test_cli_runner().invoke(args=['users', 'calibrate-bcrypt', '--target-ms', '10000',
+                                                '--min-rounds', '4', '--max-rounds', '5',
+                                                '--env-file', str(env_file)])
+    assert result.exit_code == 0
+    assert env_file.read_text(encoding="utf-8").splitlines() == ["SECRET_KEY=x", "BCRYPT_ROUNDS=5"]
+
+if __name__ == "__main__":
+    test_hash_rounds_and_needs_rehash()
+    test_calibration_respects_bounds()
+    test_login_upgrades_weak_hash_and_keeps_services_readable()
+    import tempfile, pathlib
+    test_calibration_is_opt_in_and_cli_pins_rounds(pathlib.Path(tempfile.mkdtemp()))
+    print("✅ Tất cả kiểm tra bcrypt policy đều thành công")
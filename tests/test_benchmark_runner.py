@@ -0,0 +1,36 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.harness import percentile, default_worker_counts
+from benchmarks.runner import check_thresholds, compare_baseline
+
+def _results(ops_per_sec, p99_ms):
+    return {"cases": {"decrypt[iterations=100000]": {"ops_per_sec": ops_per_sec, "p50_ms": 1.0, "p99_ms": p99_ms}}}
+
+def test_percentile():
+    samples = list(range(1, 101))
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 99) == 99
+    assert percentile([], 99) == 0.0
+
+def test_default_worker_counts():
+    assert default_worker_counts(6) == [1, 2, 4, 6]
+    assert default_worker_counts(1) == [1]
+
+def test_thresholds_detect_regression():
+    limits = {"decrypt[iterations=100000]": {"min_ops_per_sec": 1000, "max_p99_ms": 5}}
+    assert check_thresholds(_results(2000, 2.0), limits) == []
+    assert len(check_thresholds(_results(500, 9.0), limits)) == 2
+
+def test_baseline_comparison():
+    baseline = _results(1000, 1.0)
+    assert compare_baseline(_results(900, 1.0), baseline, 0.2) == []
+    assert len(compare_baseline(_results(700, 1.0), baseline, 0.2)) == 1
+
+if __name__ == "__main__":
+    test_percentile()
+    test_default_worker_counts()
+    test_thresholds_detect_regression()
+    test_baseline_comparison()
+    print("✅ Tất cả kiểm tra benchmark runner đều thành công")
@@ -0,0 +1,79 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+from app import create_app, db
+from app.models.service import Service
+from app.services.password_service import PasswordService
+from tests.helpers import create_user, add_services
+
+def test_bulk_delete_and_restore_with_per_id_results():
+    app = create_app('testing')
+    with app.app_context():
+        owner, other = create_user("hanh"), create_user("khoa")
+        ids = add_services(owner, 4)
+        foreign = add_services(other, 1)
+        PasswordService.delete_service(ids[0], owner.id)
+
+        results, error = PasswordService.delete_services(owner.id, ids + foreign + [9999])
+        assert error is None
+        assert results == {ids[0]: 'unchanged', ids[1]: 'deleted', ids[2]: 'deleted', ids[3]: 'deleted',
+                           foreign[0]: 'not_found', 9999: 'not_found'}
+        # Dịch vụ của người khác không bị ảnh hưởng
+        assert db.session.get(Service, foreign[0]).is_active
+        db.session.refresh(owner)
+        assert (owner.total_services, owner.active_services) == (4, 0)
+
+        results, error = PasswordService.restore_services(owner.id, ids[:2])
+        assert results == {ids[0]: 'restored', ids[1]: 'restored'}
+        db.session.refresh(owner)
+        assert owner.active_services == 2
+        assert [row['id'] for row in PasswordService.get_user_services(owner.id)] == ids[:2]
+        # Chỉ mục tìm kiếm theo dõi trạng thái mới
+        assert {row.id for row in PasswordService.search_services(owner.id, 'svc')} == set(ids[:2])
+
+def test_one_update_per_batch():
+    app = create_app('testing')
+    app.config['SERVICES_BULK_BATCH_SIZE'] = 10
+    with app.app_context():
+        user = create_user("lam")
+        ids = add_services(user, 25)
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        results, _ = PasswordService.delete_services(user.id, ids)
+        assert set(results.values()) == {'deleted'}
+        updates = [s for s in statements if s.startswith('UPDATE services')]
+        # 25 ID, lô 10 => 3 câu UPDATE thay vì 25
+        assert len(updates) == 3
+
+def test_bulk_endpoints_json_and_form():
+    app = create_app('testing')
+    client = app.test_client()
+    with app.app_context():
+        user = create_user("mai")
+        ids = add_services(user, 3)
+        user_id = user.id
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+
+    data = client.post('/services/bulk_delete', json={"ids": ids[:2]}).get_json()
+    assert data["changed"] == 2
+    assert [r["status"] for r in data["results"]] == ['deleted', 'deleted']
+
+    response = client.post('/services/bulk_restore', data={'service_ids': [str(ids[0])]})
+    assert response.status_code == 302
+    with app.app_context():
+        assert db.session.get(Service, ids[0]).is_active
+
+    assert client.post('/services/bulk_delete', json={"ids": ["x"]}).status_code == 400
+    assert client.post('/services/bulk_delete', json={"ids": []}).status_code == 400
+    app.config['SERVICES_BULK_MAX'] = 2
+    assert client.post('/services/bulk_delete', json={"ids": ids}).status_code == 400
+
+if __name__ == "__main__":
+    test_bulk_delete_and_restore_with_per_id_results()
+    test_one_update_per_batch()
+    test_bulk_endpoints_json_and_form()
+    print("✅ Tất cả kiểm tra thao tác hàng loạt đều thành công")
@@ -0,0 +1,58 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+from app import create_app, db
+from app.models.service import Service
+from app.services.password_service import PasswordService
+from app.services.counter_service import CounterService
+from tests.helpers import create_user, add_services
+
+def test_counters_follow_add_and_delete():
+    app = create_app('testing')
+    with app.app_context():
+        user = create_user("cuong")
+        add_services(user, 3)
+        service_id = Service.query.first().id
+        assert PasswordService.delete_service(service_id, user.id) == (True, None)
+        # Xóa lần hai không được trừ thêm
+        PasswordService.delete_service(service_id, user.id)
+        db.session.refresh(user)
+        assert (user.total_services, user.active_services) == (3, 2)
+
+def test_profile_stats_do_not_query_services():
+    app = create_app('testing')
+    with app.app_context():
+        user = create_user("cuong")
+        add_services(user, 2)
+        db.session.refresh(user)
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            stats = user.to_dict(include_stats=True)["stats"]
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        assert (stats["total_services"], stats["active_services"]) == (2, 2)
+        assert statements == []
+
+def test_reconcile_fixes_drift():
+    app = create_app('testing')
+    with app.app_context():
+        first, second = create_user("a"), create_user("b")
+        add_services(first, 2)
+        # Dòng được thêm trực tiếp, bỏ qua bộ đếm
+        db.session.add(Service(user_id=second.id, service_name="x", service_username="b",
+                               service_password_encrypted="", encryption_salt="", is_active=False))
+        db.session.commit()
+        assert CounterService.reconcile(batch_size=1) == 1
+        assert (second.total_services, second.active_services) == (1, 0)
+        assert (first.total_services, first.active_services) == (2, 2)
+        assert CounterService.reconcile() == 0
+
+if __name__ == "__main__":
+    test_counters_follow_add_and_delete()
+    test_profile_stats_do_not_query_services()
+    test_reconcile_fixes_drift()
+    print("✅ Tất cả kiểm tra bộ đếm dịch vụ đều thành công")
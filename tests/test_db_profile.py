@@ -0,0 +1,69 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+from app import create_app, db
+from app.config.config import TestingConfig
+from app.utils.db_profile import sqlite_engine_options, sqlite_pragmas
+
+def _file_app(monkeypatch, tmp_path):
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'app.db'}")
+    return create_app('testing')
+
+def test_pragmas_applied_to_file_database(monkeypatch, tmp_path):
+    app = _file_app(monkeypatch, tmp_path)
+    with app.app_context():
+        conn = db.session.connection()
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == 'wal'
+        # NORMAL = 1
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -65536
+        assert isinstance(db.engine.pool, QueuePool)
+        assert db.engine.pool.size() == app.config['SQLALCHEMY_ENGINE_OPTIONS']['pool_size']
+
+def test_pragmas_can_be_disabled(monkeypatch, tmp_path):
+    monkeypatch.setattr(TestingConfig, 'SQLITE_PRAGMAS_ENABLED', False, raising=False)
+    app = _file_app(monkeypatch, tmp_path)
+    with app.app_context():
+        assert db.session.execute(text("PRAGMA journal_mode")).scalar() == 'delete'
+
+def test_memory_database_drops_pool_sizing():
+    options = sqlite_engine_options('sqlite:///:memory:', {'pool_size': 5, 'max_overflow': 10,
+                                                           'pool_timeout': 30, 'pool_pre_ping': True})
+    assert options == {'pool_pre_ping': True}
+    # Cơ sở dữ liệu dạng file giữ nguyên cấu hình pool
+    assert sqlite_engine_options('sqlite:///app.db', {'pool_size': 5}) == {'pool_size': 5}
+    # Ứng dụng test (in-memory) vẫn khởi tạo được
+    app = create_app('testing')
+    with app.app_context():
+        assert db.session.execute(text("SELECT 1")).scalar() == 1
+
+def test_pragma_profile_from_config():
+    pragmas = dict(sqlite_pragmas({'SQLITE_SYNCHRONOUS': 'FULL', 'SQLITE_FOREIGN_KEYS': False}))
+    assert pragmas['synchronous'] == 'FULL'
+    assert pragmas['foreign_keys'] == 'OFF'
+    assert pragmas['journal_mode'] == 'WAL'
+
+def test_stats_include_database_pool(monkeypatch, tmp_path):
+    monkeypatch.setattr(TestingConfig, 'SYSTEM_STATS_ENABLED', True)
+    monkeypatch.setattr(TestingConfig, 'SYSTEM_STATS_TOKEN', 'stats-token')
+    app = _file_app(monkeypatch, tmp_path)
+    data = app.test_client().get('/system/stats', headers={'Authorization': 'Bearer stats-token'}).get_json()
+    assert data['database']['pool'] == 'QueuePool'
+    assert data['database']['checked_out'] == 0
+
+def test_concurrency_benchmark_smoke():
+    from benchmarks.db_concurrency import run_profile
+    result = run_profile('tuned', [('busy_timeout', 5000)], readers=1, writers=1, duration=0.3)
+    assert result['read']['ops_per_sec'] > 0
+    assert result['write']['ops_per_sec'] > 0
+
+if __name__ == "__main__":
+    import pytest
+    # Các test dùng fixture monkeypatch/tmp_path nên chạy qua pytest
+    if pytest.main([__file__, "-q"]) == 0:
+        print("✅ Tất cả kiểm tra cấu hình SQLite đều thành công")
@@ -0,0 +1,116 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from sqlalchemy import text
+from app import create_app, db
+from app.config.config import TestingConfig
+from app.models.user import User
+from app.services.password_service import PasswordService
+from app.utils.replication import SQLiteReplicator, sqlite_path
+
+@pytest.fixture(autouse=True)
+def _forget_replica_metadata():
+    yield
+    # db dùng chung giữa các app: bỏ metadata của bind replica để các test sau không bị ảnh hưởng
+    db.metadatas.pop('replica', None)
+
+def _replica_app(monkeypatch, tmp_path, sticky=5):
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'primary.db'}")
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_BINDS', {'replica': f"sqlite:///{tmp_path / 'replica.db'}"})
+    monkeypatch.setattr(TestingConfig, 'DB_REPLICA_STICKY_SECONDS', sticky, raising=False)
+    app = create_app('testing')
+    replicator = SQLiteReplicator.from_app(app)
+    with app.app_context():
+        user = User(username="dung", email="dung@example.com")
+        user.set_password("Pass1234")
+        db.session.add(user)
+        db.session.commit()
+        user_id, master = user.id, user.password_hash
+    replicator.sync()
+    return app, replicator, user_id, master
+
+def _add(user_id, master, name):
+    return PasswordService.add_service(user_id, {
+        'service_name': name, 'service_username': 'dung', 'service_password': 'secret'
+    }, master)
+
+def test_reads_go_to_replica_until_synced(monkeypatch, tmp_path):
+    app, replicator, user_id, master = _replica_app(monkeypatch, tmp_path)
+    with app.app_context():
+        assert _add(user_id, master, 'github') == (True, None)
+    with app.app_context():
+        # Bản sao chưa đồng bộ nên chưa thấy dịch vụ mới
+        assert PasswordService.get_user_services(user_id) == []
+    replicator.sync()
+    with app.app_context():
+        assert [s['service_name'] for s in PasswordService.get_user_services(user_id)] == ['github']
+        assert app.extensions['db_router'].stats()['replica_reads'] == 2
+
+def test_same_context_reads_its_own_writes(monkeypatch, tmp_path):
+    app, replicator, user_id, master = _replica_app(monkeypatch, tmp_path)
+    with app.app_context():
+        _add(user_id, master, 'gitlab')
+        page = PasswordService.get_user_services_page(user_id)
+        assert [row.service_name for row in page['items']] == ['gitlab']
+        assert app.extensions['db_router'].stats()['primary_reads_after_write'] == 1
+
+@pytest.mark.parametrize("sticky, visible", [(5, True), (0, False)])
+def test_redirect_after_write_sticks_to_primary(monkeypatch, tmp_path, sticky, visible):
+    app, replicator, user_id, master = _replica_app(monkeypatch, tmp_path, sticky)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    response = client.post('/add_service', data={
+        'service_name': 'bitbucket', 'service_username': 'dung', 'service_password': 'secret'
+    })
+    assert response.status_code == 302
+    # Yêu cầu kế tiếp (sau redirect) chỉ thấy dữ liệu mới khi còn trong thời gian "dính" primary
+    assert (b'bitbucket' in client.get('/dashboard').data) is visible
+
+def test_write_paths_read_the_primary(monkeypatch, tmp_path):
+    app, replicator, user_id, master = _replica_app(monkeypatch, tmp_path, sticky=0)
+    with app.app_context():
+        _add(user_id, master, 'gitea')
+        service_id = PasswordService.get_user_services_page(user_id)['items'][0].id
+    with app.app_context():
+        # Bản sao còn trễ: get_service không thấy, get_service_for_update đọc từ primary
+        assert PasswordService.get_service(service_id, user_id) is None
+        assert PasswordService.get_service_for_update(service_id, user_id).service_name == 'gitea'
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    assert b'gitea' in client.get(f'/edit_service/{service_id}').data
+    assert client.post(f'/delete_service/{service_id}').status_code == 302
+    with app.app_context():
+        assert PasswordService.get_service_for_update(service_id, user_id) is None
+        assert PasswordService.get_service_for_update(service_id, user_id, include_inactive=True) is not None
+        assert app.extensions['db_router'].stats()['replica_reads'] == 1
+
+def test_replica_connections_are_read_only(monkeypatch, tmp_path):
+    app, replicator, user_id, master = _replica_app(monkeypatch, tmp_path)
+    with app.app_context():
+        with db.engines['replica'].connect() as conn:
+            with pytest.raises(Exception):
+                conn.execute(text("DELETE FROM services"))
+
+def test_without_replica_everything_uses_primary():
+    app = create_app('testing')
+    with app.app_context():
+        assert app.extensions['db_router'].stats()['replica_bind'] is None
+        user = User(username="em", email="em@example.com")
+        user.set_password("Pass1234")
+        db.session.add(user)
+        db.session.commit()
+        assert PasswordService.get_user_services(user.id) == []
+
+def test_sqlite_path_rejects_memory_database():
+    assert sqlite_path('sqlite:////tmp/app.db') == '/tmp/app.db'
+    with pytest.raises(ValueError):
+        sqlite_path('sqlite:///:memory:')
+
+if __name__ == "__main__":
+    # Các test dùng fixture monkeypatch/tmp_path nên chạy qua pytest
+    if pytest.main([__file__, "-q"]) == 0:
+        print("✅ Tất cả kiểm tra định tuyến đọc/ghi đều thành công")
@@ -0,0 +1,163 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import csv
+import io
+import json
+import pytest
+from cryptography.exceptions import InvalidTag
+from app import create_app, db
+from app.config.config import TestingConfig
+from app.services.password_service import PasswordService
+from app.services.export_service import ExportService
+from tests.helpers import create_user, add_services
+from app.utils.archive_crypto import KDF_IDS, decrypt_stream, encrypt_stream
+from app.utils.key_cache import key_cache
+
+PASSPHRASE = "correct horse battery"
+
+def _seed(count=5):
+    user = create_user("lan")
+    ids = add_services(user, count, notes='dòng 1\ndòng 2, "trích dẫn"')
+    PasswordService.delete_services(user.id, ids[:1])
+    return user
+
+def _login(client):
+    return client.post('/login', data={'username': 'lan', 'password': 'Pass1234'})
+
+def test_ndjson_streams_one_chunk_per_batch():
+    app = create_app('testing')
+    with app.app_context():
+        user = _seed()
+        chunks = list(ExportService.stream_export(user.id, user.password_hash, 'ndjson', batch_size=2))
+        # 4 dịch vụ còn hoạt động, mỗi lô 2 dịch vụ
+        assert len(chunks) == 2
+        rows = [json.loads(line) for line in b"".join(chunks).decode('utf-8').splitlines()]
+        assert [row["service_name"] for row in rows] == ['svc1', 'svc2', 'svc3', 'svc4']
+        assert rows[0]["service_password"] == 'secret1'
+        assert "password_error" not in rows[0]
+        # Các đối tượng đã được bỏ khỏi session sau mỗi lô
+        assert not any(type(obj).__name__ == 'Service' for obj in db.session.identity_map.values())
+
+def test_csv_header_first_and_round_trip():
+    app = create_app('testing')
+    with app.app_context():
+        user = _seed()
+        chunks = ExportService.stream_export(user.id, user.password_hash, 'csv')
+        header = next(chunks)
+        assert header.decode('utf-8').startswith('id,service_name,')
+        rows = list(csv.DictReader(io.StringIO((header + b"".join(chunks)).decode('utf-8'))))
+        assert len(rows) == 4
+        assert rows[-1]["notes"] == 'dòng 1\ndòng 2, "trích dẫn"'
+        assert rows[-1]["service_password"] == 'secret4'
+        with pytest.raises(ValueError):
+            ExportService.stream_export(user.id, user.password_hash, 'xml')
+
+def test_encrypted_archive_round_trip_and_tamper():
+    plaintext = os.urandom(200_000)
+    chunks = list(encrypt_stream([plaintext[:1000], plaintext[1000:]], PASSPHRASE, segment_size=64 * 1024,
+                                 kdf=('scrypt', 2 ** 14)))
+    # Header trước, sau đó 3 đoạn đầy và 1 đoạn cuối
+    assert len(chunks) == 5
+    archive = b"".join(chunks)
+    assert b"".join(decrypt_stream(io.BytesIO(archive), PASSPHRASE)) == plaintext
+
+    with pytest.raises(InvalidTag):
+        list(decrypt_stream(io.BytesIO(archive), "wrong passphrase"))
+    with pytest.raises(ValueError):
+        list(decrypt_stream(io.BytesIO(archive[:-100]), PASSPHRASE))
+    tampered = bytearray(archive)
+    tampered[5] ^= 1
+    with pytest.raises(Exception):
+        list(decrypt_stream(io.BytesIO(bytes(tampered)), PASSPHRASE))
+    # Bỏ đoạn cuối: tệp bị cắt cụt phải bị phát hiện
+    with pytest.raises(ValueError):
+        list(decrypt_stream(io.BytesIO(b"".join(chunks[:-1])), PASSPHRASE))
+
+def test_archive_kdf_is_separate_and_strong(monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'ENCRYPTION_KEY_CACHE_ENABLED', True, raising=False)
+    app = create_app('testing')
+    with app.app_context():
+        header = next(encrypt_stream([b"x"], PASSPHRASE))
+        # scrypt với N lấy từ EXPORT_SCRYPT_N, không dùng KDF của bản ghi dịch vụ
+        assert header[4] == KDF_IDS['scrypt']
+        assert int.from_bytes(header[5:9], 'big') == app.config['EXPORT_SCRYPT_N']
+        archive = b"".join(encrypt_stream([b"abc"], PASSPHRASE, kdf=('pbkdf2_sha256', 600000)))
+        assert b"".join(decrypt_stream(io.BytesIO(archive), PASSPHRASE)) == b"abc"
+        # Khóa của tệp xuất không được đưa vào bộ nhớ đệm khóa
+        assert (key_cache.stats()["entries"], key_cache.stats()["misses"]) == (0, 0)
+    for kdf in (('pbkdf2_sha256', 100000), ('scrypt', 2 ** 10), ('scrypt', 3 * 2 ** 14), ('md5', 1)):
+        with pytest.raises(ValueError):
+            next(encrypt_stream([b"x"], PASSPHRASE, kdf=kdf))
+
+def test_export_endpoint(monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'EXPORT_ALLOW_CLEARTEXT', True)
+    app = create_app('testing')
+    with app.app_context():
+        _seed()
+    client = app.test_client()
+    _login(client)
+
+    # Khe admission được giữ đến khi luồng tải xuống đóng lại
+    with client.post('/services/export', data={'format': 'csv', 'password': 'Pass1234'}) as response:
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype == 'text/csv'
+        assert 'vault-export.csv' in response.headers['Content-Disposition']
+        assert len(list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))) == 4
+        assert app.extensions['admission_controller'].stats()["active"] == 1
+    assert app.extensions['admission_controller'].stats()["active"] == 0
+
+    with client.post('/services/export', data={'format': 'ndjson', 'password': 'Pass1234',
+                                                'passphrase': PASSPHRASE}) as response:
+        assert response.mimetype == 'application/octet-stream'
+        lines = b"".join(decrypt_stream(io.BytesIO(response.get_data()), PASSPHRASE)).splitlines()
+        assert len(lines) == 4
+
+    assert client.post('/services/export', data={'format': 'ndjson', 'password': 'Pass1234',
+                                                 'passphrase': 'short'}).status_code == 302
+    assert client.post('/services/export', data={'format': 'xml', 'password': 'Pass1234'}).status_code == 302
+
+def test_export_requires_password_and_passphrase():
+    app = create_app('testing')
+    with app.app_context():
+        _seed()
+    client = app.test_client()
+    _login(client)
+
+    # Không còn xuất qua GET, mật khẩu không được nằm trong URL
+    assert client.get('/services/export?format=csv').status_code == 405
+    # Mặc định bắt buộc có mật khẩu bảo vệ tệp
+    response = client.post('/services/export', data={'format': 'csv', 'password': 'Pass1234'})
+    assert response.status_code == 302
+    # Phải nhập lại đúng mật khẩu tài khoản
+    response = client.post('/services/export', data={'format': 'csv', 'passphrase': PASSPHRASE,
+                                                     'password': 'Sai12345'}, follow_redirects=True)
+    assert 'Mật khẩu không đúng.' in response.get_data(as_text=True)
+    with client.post('/services/export', data={'format': 'csv', 'passphrase': PASSPHRASE,
+                                                'password': 'Pass1234'}) as response:
+        assert response.status_code == 200
+        assert response.mimetype == 'application/octet-stream'
+        assert 'vault-export.csv.enc' in response.headers['Content-Disposition']
+        response.get_data()
+
+def test_export_cli(tmp_path):
+    app = create_app('testing')
+    with app.app_context():
+        _seed()
+    runner = app.test_cli_runner()
+    path = tmp_path / "vault.enc"
+    result = runner.invoke(args=['vault', 'export', 'lan', '--encrypt', '-o', str(path)],
+                           input=f"{PASSPHRASE}\n{PASSPHRASE}\n")
+    assert result.exit_code == 0, result.output
+    result = runner.invoke(args=['vault', 'decrypt-export', str(path)], input=f"{PASSPHRASE}\n")
+    assert result.exit_code == 0
+    assert result.output.count('"service_name"') == 4
+    result = runner.invoke(args=['vault', 'decrypt-export', str(path)], input="wrong passphrase\n")
+    assert result.exit_code != 0
+
+if __name__ == "__main__":
+    # Các test dùng fixture tmp_path nên chạy qua pytest
+    if pytest.main([__file__, "-q"]) == 0:
+        print("✅ Tất cả kiểm tra xuất dữ liệu đều thành công")
@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import bcrypt
+import pytest
+from app.utils.hashers import PasswordHasher, get_hasher, identify_hasher, set_preferred_hasher
+from app.utils.password_utils import (
+    hash_password, verify_password, needs_rehash, extract_salt_from_hash, add_pepper_to_password
+)
+
+FAST_PARAMS = {
+    "bcrypt": {"rounds": 4},
+    "scrypt": {"n": 2 ** 10, "r": 8, "p": 1},
+    "pbkdf2_sha256": {"iterations": 1000},
+}
+
+def test_every_backend_round_trips_with_prefix():
+    for algorithm, params in FAST_PARAMS.items():
+        hashed = hash_password("MySecret123", algorithm=algorithm, **params)
+        assert hashed.startswith(f"{algorithm}$1$")
+        assert identify_hasher(hashed).algorithm == algorithm
+        assert verify_password("MySecret123", hashed) == True
+        assert verify_password("WrongPass", hashed) == False
+        assert extract_salt_from_hash(hashed)
+
+def test_legacy_untagged_bcrypt_hash_still_verifies():
+    peppered = add_pepper_to_password("MySecret123").encode('utf-8')
+    legacy = bcrypt.hashpw(peppered, bcrypt.gensalt(4)).decode('utf-8')
+    assert identify_hasher(legacy).algorithm == "bcrypt"
+    assert verify_password("MySecret123", legacy) == True
+    assert extract_salt_from_hash(legacy) == legacy[:29]
+
+def test_needs_rehash_when_preferred_algorithm_changes():
+    hashed = hash_password("MySecret123", algorithm="bcrypt", rounds=4)
+    scrypt = get_hasher("scrypt")
+    old_n = scrypt.n
+    scrypt.configure(n=2 ** 10)
+    set_preferred_hasher("scrypt")
+    try:
+        assert needs_rehash(hashed) == True
+        assert needs_rehash(hash_password("MySecret123")) == False
+        assert needs_rehash(hash_password("MySecret123", n=2 ** 9)) == True
+    finally:
+        set_preferred_hasher("bcrypt")
+        scrypt.configure(n=old_n)
+
+def test_incomplete_backend_cannot_be_instantiated():
+    class HalfHasher(PasswordHasher):
+        algorithm = "half"
+
+        def params(self):
+            return {}
+
+    # Thiếu encode/verify/decode_params thì báo lỗi ngay khi tạo, không phải lúc băm
+    with pytest.raises(TypeError):
+        HalfHasher()
+    with pytest.raises(TypeError):
+        PasswordHasher()
+
+if __name__ == "__main__":
+    test_every_backend_round_trips_with_prefix()
+    test_legacy_untagged_bcrypt_hash_still_verifies()
+    test_needs_rehash_when_preferred_algorithm_changes()
+    test_incomplete_backend_cannot_be_instantiated()
+    print("✅ Tất cả kiểm tra password hashers đều thành công")
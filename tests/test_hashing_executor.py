@@ -0,0 +1,78 @@
+import sys
+import os
+import threading
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from app.utils.hashing_executor import HashingExecutor, HashingBusyError
+
+def test_thread_executor_hashes_and_verifies():
+    executor = HashingExecutor(kind='thread', max_workers=2, queue_depth=2, timeout=10)
+    try:
+        hashed = executor.hash_password("MySecret123")
+        assert executor.verify_password("MySecret123", hashed) == True
+        assert executor.verify_password("WrongPass", hashed) == False
+        assert executor.stats()["completed"] == 3
+    finally:
+        executor.shutdown(wait=True)
+
+def test_full_queue_is_rejected():
+    executor = HashingExecutor(kind='thread', max_workers=1, queue_depth=0, timeout=10)
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_job():
+        started.set()
+        release.wait(5)
+        return True
+
+    # Chiếm worker duy nhất bằng một job chậm
+    worker = threading.Thread(target=executor.run, args=(slow_job,))
+    worker.start()
+    started.wait(5)
+    try:
+        with pytest.raises(HashingBusyError):
+            executor.run(lambda: True)
+        assert executor.stats()["rejected"] == 1
+    finally:
+        release.set()
+        worker.join()
+        executor.shutdown(wait=True)
+
+def test_slow_job_times_out():
+    executor = HashingExecutor(kind='thread', max_workers=1, queue_depth=1, timeout=0.05)
+    release = threading.Event()
+    try:
+        with pytest.raises(HashingBusyError):
+            executor.run(release.wait, 5)
+        assert executor.stats()["timed_out"] == 1
+    finally:
+        release.set()
+        executor.shutdown(wait=True)
+
+def test_reconfigure_keeps_jobs_on_their_own_slots():
+    executor = HashingExecutor(kind='thread', max_workers=1, queue_depth=0, timeout=5)
+    started, release = threading.Event(), threading.Event()
+    worker = threading.Thread(target=executor.run, args=(lambda: (started.set(), release.wait(5)),))
+    worker.start()
+    try:
+        assert started.wait(5)
+        executor.configure(kind='thread', max_workers=1, queue_depth=0, timeout=5)
+    finally:
+        release.set()
+        worker.join()
+    # Job cũ trả slot về semaphore cũ, không làm tràn semaphore mới
+    stats = executor.stats()
+    assert stats["in_flight"] == 0 and stats["completed"] == 0
+    assert executor._slots.acquire(blocking=False)
+    assert not executor._slots.acquire(blocking=False)
+    executor._slots.release()
+    assert executor.run(lambda: 42) == 42
+    executor.shutdown(wait=True)
+
+if __name__ == "__main__":
+    test_thread_executor_hashes_and_verifies()
+    test_full_queue_is_rejected()
+    test_slow_job_times_out()
+    test_reconfigure_keeps_jobs_on_their_own_slots()
+    print("✅ Tất cả kiểm tra hashing executor đều thành công")
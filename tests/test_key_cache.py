@@ -0,0 +1,45 @@
+import sys
+import os
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.key_cache import DerivedKeyCache, key_cache
+from app.utils.encryption import EncryptionService
+
+def test_cache_hit_expiry_and_eviction():
+    cache = DerivedKeyCache(ttl=0.05, max_entries=2, enabled=True)
+    cache.put("secret", ("salt1", 1000), b"k1")
+    assert cache.get("secret", ("salt1", 1000)) == b"k1"
+    assert cache.get("other", ("salt1", 1000)) is None
+
+    cache.put("secret", ("salt2", 1000), b"k2")
+    cache.put("secret", ("salt3", 1000), b"k3")
+    assert cache.stats()["entries"] == 2
+
+    time.sleep(0.06)
+    assert cache.get("secret", ("salt3", 1000)) is None
+
+def test_invalidate_wipes_key_material():
+    cache = DerivedKeyCache(enabled=True)
+    cache.put("secret", ("salt", 1000), b"key-material")
+    stored = next(iter(cache._entries.values()))[1]
+    assert cache.invalidate("secret") == 1
+    assert stored == bytearray(len(b"key-material"))
+    assert cache.get("secret", ("salt", 1000)) is None
+
+def test_encryption_service_uses_cache():
+    key_cache.enabled = True
+    try:
+        token = EncryptionService("master", salt="abc").encrypt("hello")
+        hits = key_cache.stats()["hits"]
+        assert EncryptionService("master", salt="abc").decrypt(token) == "hello"
+        assert key_cache.stats()["hits"] == hits + 1
+    finally:
+        key_cache.enabled = False
+        key_cache.clear()
+
+if __name__ == "__main__":
+    test_cache_hit_expiry_and_eviction()
+    test_invalidate_wipes_key_material()
+    test_encryption_service_uses_cache()
+    print("✅ Tất cả kiểm tra key cache đều thành công")
@@ -0,0 +1,69 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.models.user import User
+from app.services.auth_service import AuthService
+from app.utils.throttle import LoginThrottle, MemoryThrottleStore, SQLiteThrottleStore
+
+def _throttle(store=None, user_limit=3):
+    throttle = LoginThrottle()
+    throttle.enabled = True
+    throttle.user_limit = user_limit
+    throttle.ip_limit = 100
+    if store is not None:
+        throttle.store = store
+    return throttle
+
+def test_lock_after_limit_with_growing_backoff():
+    throttle = _throttle()
+    for _ in range(2):
+        throttle.record_failure("alice", "10.0.0.1")
+    assert throttle.check("alice", "10.0.0.1") is None
+
+    throttle.record_failure("alice", "10.0.0.1")
+    first = throttle.check("alice", "10.0.0.1")
+    throttle.record_failure("alice", "10.0.0.1")
+    second = throttle.check("Alice", "10.0.0.2")
+    assert first >= 1
+    assert second > first
+
+    throttle.reset("alice")
+    assert throttle.check("alice", "10.0.0.2") is None
+
+def test_memory_store_is_bounded():
+    throttle = _throttle(MemoryThrottleStore(max_keys=10))
+    for i in range(100):
+        throttle.record_failure(f"user{i}", None)
+    assert len(throttle.store) == 10
+
+def test_sqlite_store_is_shared(tmp_path):
+    path = str(tmp_path / "throttle.db")
+    first = _throttle(SQLiteThrottleStore(path), user_limit=2)
+    second = _throttle(SQLiteThrottleStore(path), user_limit=2)
+    first.record_failure("bob")
+    second.record_failure("bob")
+    assert first.check("bob") is not None
+
+def test_throttled_login_skips_password_check(monkeypatch):
+    app = create_app('testing')
+    with app.test_request_context():
+        user = User(username="carol", email="carol@example.com")
+        user.set_password("Pass1234")
+        db.session.add(user)
+        db.session.commit()
+
+        for _ in range(app.config['LOGIN_THROTTLE_USER_LIMIT']):
+            AuthService.login_user("carol", "wrong", "10.0.0.9")
+
+        calls = []
+        monkeypatch.setattr(User, "verify_password", lambda self, password: calls.append(password))
+        success, error_message = AuthService.login_user("carol", "Pass1234", "10.0.0.9")
+        assert success == False
+        assert calls == []
+
+if __name__ == "__main__":
+    test_lock_after_limit_with_growing_backoff()
+    test_memory_store_is_bounded()
+    print("✅ Tất cả kiểm tra giới hạn đăng nhập đều thành công")
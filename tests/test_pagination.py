@@ -0,0 +1,84 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.models.service import Service
+from app.services.password_service import PasswordService
+from tests.helpers import create_user
+
+def _seed(count=7):
+    user = create_user("duy")
+    now = datetime.utcnow()
+    for i in range(count):
+        # Hai dịch vụ có cùng created_at để kiểm tra phân định bằng id
+        created = now - timedelta(minutes=i // 2)
+        db.session.add(Service(user_id=user.id, service_name=f"svc{(i * 3) % count}", service_username="duy",
+                               service_password_encrypted="", encryption_salt="", created_at=created))
+    db.session.add(Service(user_id=user.id, service_name="deleted", service_username="duy",
+                           service_password_encrypted="", encryption_salt="", is_active=False))
+    db.session.commit()
+    return user
+
+def _walk(user_id, sort):
+    pages = []
+    page = PasswordService.get_user_services_page(user_id, limit=3, sort=sort)
+    pages.append(page)
+    while page["next_cursor"]:
+        page = PasswordService.get_user_services_page(user_id, page["next_cursor"], limit=3, sort=sort)
+        pages.append(page)
+    return pages
+
+def test_forward_pages_cover_all_rows_in_order():
+    app = create_app('testing')
+    with app.app_context():
+        user = _seed()
+        expected = Service.query.filter_by(user_id=user.id, is_active=True).order_by(
+            Service.created_at.desc(), Service.id.desc()).all()
+        pages = _walk(user.id, "created")
+        assert [len(p["items"]) for p in pages] == [3, 3, 1]
+        assert [s.id for p in pages for s in p["items"]] == [s.id for s in expected]
+        assert pages[0]["prev_cursor"] is None and pages[-1]["next_cursor"] is None
+
+        names = [s.service_name for p in _walk(user.id, "name") for s in p["items"]]
+        assert names == sorted(names) and "deleted" not in names
+
+def test_prev_cursor_returns_previous_page():
+    app = create_app('testing')
+    with app.app_context():
+        user = _seed()
+        pages = _walk(user.id, "created")
+        back = PasswordService.get_user_services_page(user.id, pages[2]["prev_cursor"], direction='prev', limit=3)
+        assert back["items"] == pages[1]["items"]
+        first = PasswordService.get_user_services_page(user.id, back["prev_cursor"], direction='prev', limit=3)
+        assert first["items"] == pages[0]["items"] and first["prev_cursor"] is None
+
+def test_limits_and_bad_cursor():
+    app = create_app('testing')
+    with app.app_context():
+        user = _seed()
+        app.config['SERVICES_PAGE_SIZE_MAX'] = 5
+        assert PasswordService.get_user_services_page(user.id, limit=1000)["limit"] == 5
+        # Cursor hỏng hoặc của thứ tự khác: quay về trang đầu
+        name_cursor = PasswordService.get_user_services_page(user.id, limit=2, sort="name")["next_cursor"]
+        for cursor in ("garbage", name_cursor):
+            page = PasswordService.get_user_services_page(user.id, cursor, limit=2)
+            assert page["prev_cursor"] is None and len(page["items"]) == 2
+
+def test_dashboard_renders_page_links():
+    app = create_app('testing')
+    with app.app_context():
+        user = _seed()
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = user.id
+        html = client.get('/dashboard?per_page=3').get_data(as_text=True)
+        assert "Trang sau" in html and "Trang trước" not in html
+
+if __name__ == "__main__":
+    test_forward_pages_cover_all_rows_in_order()
+    test_prev_cursor_returns_previous_page()
+    test_limits_and_bad_cursor()
+    test_dashboard_renders_page_links()
+    print("✅ Tất cả kiểm tra phân trang đều thành công")
@@ -0,0 +1,39 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.models.user import User
+from app.services.provisioning_service import ProvisioningService
+
+def test_import_users_reports_duplicates_and_missing_fields(tmp_path):
+    app = create_app('testing')
+    path = tmp_path / "users.csv"
+    path.write_text(
+        "username,email,password\n"
+        "an,an@example.com,Pass1234\n"
+        "binh,binh@example.com,Pass1234\n"
+        "an,an2@example.com,Pass1234\n"
+        "existing,new@example.com,Pass1234\n"
+        "chi,,Pass1234\n",
+        encoding="utf-8",
+    )
+    with app.app_context():
+        user = User(username="existing", email="existing@example.com", password_hash="x")
+        db.session.add(user)
+        db.session.commit()
+
+        report = ProvisioningService.import_users(
+            ProvisioningService.read_users(str(path)), batch_size=2, workers=2
+        )
+
+        assert report["imported"] == 2
+        assert report["failed"] == 3
+        assert [error["line"] for error in report["errors"]] == [4, 5, 6]
+        imported = User.find_by_username("binh")
+        assert imported.verify_password("Pass1234", rehash=False) == True
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_import_users_reports_duplicates_and_missing_fields(pathlib.Path(tempfile.mkdtemp()))
+    print("✅ Tất cả kiểm tra import người dùng đều thành công")
@@ -0,0 +1,124 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from datetime import datetime, timedelta
+from sqlalchemy import event, insert, text
+from app import create_app, db
+from app.models.user import User
+from app.models.service import Service
+from app.services.password_service import PasswordService
+from app.services.rekey_service import RekeyService
+from app.services.vault_service import VaultService
+from app.services.retention_service import RetentionService
+from app.utils.schema import create_missing_indexes
+
+USERS = 2000
+SERVICES_PER_USER = 25
+
+_app = None
+
+def _seeded_app():
+    # Dữ liệu đủ lớn để bộ lập kế hoạch truy vấn chọn giống như trên production
+    global _app
+    if _app is not None:
+        return _app
+    _app = create_app('testing')
+    with _app.app_context():
+        now = datetime.utcnow()
+        db.session.execute(insert(User), [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "password_hash": "x",
+             "is_active": True, "created_at": now}
+            for i in range(1, USERS + 1)
+        ])
+        db.session.execute(insert(Service), [
+            {"user_id": u, "service_name": f"svc{n}", "service_username": "u",
+             "service_password_encrypted": "", "encryption_salt": "", "is_active": n % 5 != 0,
+             "created_at": now - timedelta(minutes=n)}
+            for u in range(1, USERS + 1) for n in range(SERVICES_PER_USER)
+        ])
+        db.session.commit()
+        db.session.execute(text("ANALYZE"))
+    return _app
+
+def _captured_selects(fn):
+    statements = []
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+    event.listen(db.engine, "before_cursor_execute", before)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before)
+    db.session.rollback()
+    return statements
+
+def _partial_indexes():
+    return {index.name for table in db.metadata.sorted_tables for index in table.indexes
+            if index.dialect_options['sqlite']['where'] is not None}
+
+def _is_bad_step(step, partial):
+    # Quét một partial index chỉ đọc các dòng thỏa điều kiện, không phải quét toàn bảng
+    if "TEMP B-TREE" in step:
+        return True
+    return step.startswith("SCAN") and step.split(" INDEX ")[-1] not in partial
+
+def _bad_plans(fn):
+    # Trả về các câu truy vấn quét toàn bảng hoặc phải sắp xếp bằng B-tree tạm
+    bad = []
+    partial = _partial_indexes()
+    with db.engine.connect() as conn:
+        for statement, parameters in _captured_selects(fn):
+            plan = [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+            if any(_is_bad_step(step, partial) for step in plan):
+                bad.append((statement, plan))
+    return bad
+
+def test_service_queries_use_indexes():
+    with _seeded_app().app_context():
+        user = db.session.get(User, USERS // 2)
+        assert _bad_plans(lambda: PasswordService.get_user_services(user.id)) == []
+        assert _bad_plans(lambda: PasswordService.get_service(user.id * SERVICES_PER_USER, user.id)) == []
+        assert _bad_plans(lambda: user.to_dict(include_services=True, include_stats=True)) == []
+
+def test_service_pages_use_indexes():
+    with _seeded_app().app_context():
+        for sort in ("created", "name"):
+            page = PasswordService.get_user_services_page(9, limit=5, sort=sort)
+            cursor = page["next_cursor"]
+            assert _bad_plans(lambda: PasswordService.get_user_services_page(9, limit=5, sort=sort)) == []
+            assert _bad_plans(lambda: PasswordService.get_user_services_page(9, cursor, limit=5, sort=sort)) == []
+            assert _bad_plans(lambda: PasswordService.get_user_services_page(
+                9, cursor, direction='prev', limit=5, sort=sort)) == []
+
+def test_user_lookups_use_indexes():
+    with _seeded_app().app_context():
+        assert _bad_plans(lambda: User.find_by_username("user42")) == []
+        assert _bad_plans(lambda: User.find_by_email("user42@example.com")) == []
+
+def test_maintenance_queries_use_indexes():
+    with _seeded_app().app_context():
+        user = db.session.get(User, 7)
+        assert _bad_plans(RekeyService.pending_user_ids) == []
+        assert _bad_plans(lambda: VaultService.migrate_user(user)) == []
+        assert _bad_plans(lambda: RetentionService.purge_deleted(days=30, dry_run=True)) == []
+        assert _bad_plans(lambda: RetentionService.purge_deleted(days=30)) == []
+
+def test_indexes_added_to_existing_database():
+    app = create_app('testing')
+    with app.app_context():
+        # Cơ sở dữ liệu cũ được tạo trước khi có các index này
+        db.session.execute(text("DROP INDEX ix_services_user_active"))
+        db.session.execute(text("DROP INDEX ix_users_rekey_pending"))
+        db.session.commit()
+        assert sorted(create_missing_indexes()) == ["ix_services_user_active", "ix_users_rekey_pending"]
+        assert create_missing_indexes() == []
+
+if __name__ == "__main__":
+    test_service_queries_use_indexes()
+    test_service_pages_use_indexes()
+    test_user_lookups_use_indexes()
+    test_maintenance_queries_use_indexes()
+    test_indexes_added_to_existing_database()
+    print("✅ Tất cả kiểm tra kế hoạch truy vấn đều thành công")
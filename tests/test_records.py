@@ -0,0 +1,118 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from cryptography.exceptions import InvalidTag
+from app import create_app, db
+from app.models.user import User
+from app.models.service import Service
+from app.services.password_service import PasswordService
+from app.services.vault_service import VaultService
+from app.utils import records
+from app.utils.encryption import EncryptionService, set_kdf_policy, get_kdf_policy
+from app.utils.vault import VaultKey, seal_password, decrypt_stored_password, is_current_format
+
+def test_seal_and_open_roundtrip():
+    key = records.generate_key()
+    record = records.seal(key, b"secret", records.KDF_PBKDF2_SHA256, 1000, b"s" * 16)
+    header = records.parse_header(record)
+    assert (header.version, header.kdf_id, header.iterations, header.salt) == (1, 1, 1000, b"s" * 16)
+    assert records.open_record(key, record) == b"secret"
+    # Nhỏ hơn nhiều so với token Fernet base64 + salt hex
+    assert len(record) < len(EncryptionService("m").encrypt("secret"))
+
+def test_tampered_header_is_rejected():
+    key = records.generate_key()
+    record = bytearray(records.seal(key, b"secret", records.KDF_PBKDF2_SHA256, 1000, b"s" * 16))
+    record[3] ^= 1  # đổi số vòng lặp KDF
+    with pytest.raises(InvalidTag):
+        records.open_record(key, bytes(record))
+
+def test_fernet_tokens_are_not_records():
+    assert not records.is_record(EncryptionService("m").encrypt_bytes(b"x"))
+    with pytest.raises(ValueError):
+        records.parse_header(b"\x01\x00")
+
+def _legacy_service(user):
+    # Dòng được tạo trước khi có định dạng bản ghi
+    encryptor = EncryptionService(user.password_hash)
+    service = Service(user_id=user.id, service_name="old", service_username="an",
+                      service_password_encrypted=encryptor.encrypt("legacy-secret"),
+                      encryption_salt=encryptor.get_salt())
+    db.session.add(service)
+    db.session.commit()
+    return service
+
+def _user():
+    user = User(username="an", email="an@example.com")
+    user.set_password("Pass1234")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+def test_legacy_row_is_rewritten_on_access():
+    app = create_app('testing')
+    with app.app_context():
+        user = _user()
+        service = _legacy_service(user)
+        assert PasswordService.get_service_password(service.id, user.id, user.password_hash) == "legacy-secret"
+        db.session.refresh(service)
+        assert service.service_password_encrypted == "" and service.encryption_salt == ""
+        assert records.is_record(service.password_record) and records.is_record(service.wrapped_data_key)
+        assert PasswordService.get_service_password(service.id, user.id, user.password_hash) == "legacy-secret"
+
+def test_background_sweep_converts_old_rows():
+    app = create_app('testing')
+    with app.app_context():
+        user = _user()
+        service_id, master = _legacy_service(user).id, user.password_hash
+        assert VaultService.migrate_all() == {"users": 1, "migrated": 1, "failed": 0}
+        assert VaultService.migrate_all() == {"users": 0, "migrated": 0, "failed": 0}
+        service = db.session.get(Service, service_id)
+        assert records.is_record(service.password_record)
+        assert service.get_service_password(master) == "legacy-secret"
+
+def test_kdf_policy_change_keeps_old_records_readable():
+    vault_key = VaultKey("master", VaultKey.generate_salt())
+    old_policy = get_kdf_policy()
+    old = seal_password("secret", "master", vault_key)
+    own_kdf = seal_password("secret", "master")
+    try:
+        set_kdf_policy("pbkdf2_sha512", 20000)
+        assert not is_current_format(old)
+        assert decrypt_stored_password(old, "master", VaultKey("master", vault_key.salt)) == "secret"
+        assert decrypt_stored_password(own_kdf, "master") == "secret"
+        new = seal_password("secret", "master", vault_key)
+        header = records.parse_header(new.wrapped_key)
+        assert (header.kdf_id, header.iterations) == (records.KDF_PBKDF2_SHA512, 20000)
+        assert is_current_format(new)
+    finally:
+        set_kdf_policy(*old_policy)
+
+def test_sweep_upgrades_records_with_old_kdf_policy():
+    app = create_app('testing')
+    with app.app_context():
+        user = _user()
+        PasswordService.add_service(user.id, {
+            'service_name': 'svc', 'service_username': 'an', 'service_password': 'secret'
+        }, user.password_hash)
+        master = user.password_hash
+        assert VaultService.migrate_all()["migrated"] == 0
+        try:
+            set_kdf_policy("pbkdf2_sha256", 50000)
+            assert VaultService.migrate_all() == {"users": 1, "migrated": 1, "failed": 0}
+            service = Service.query.one()
+            assert records.parse_header(service.wrapped_data_key).iterations == 50000
+            assert service.get_service_password(master) == "secret"
+        finally:
+            set_kdf_policy("pbkdf2_sha256", 100000)
+
+if __name__ == "__main__":
+    test_seal_and_open_roundtrip()
+    test_tampered_header_is_rejected()
+    test_fernet_tokens_are_not_records()
+    test_legacy_row_is_rewritten_on_access()
+    test_background_sweep_converts_old_rows()
+    test_kdf_policy_change_keeps_old_records_readable()
+    print("✅ Tất cả kiểm tra định dạng bản ghi đều thành công")
@@ -0,0 +1,210 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from app import create_app, db
+from app.models.user import User
+from app.models.service import Service
+from app.models.rekey_job import RekeyJob
+from app.services.password_service import PasswordService
+from app.services.rekey_service import RekeyService
+from app.utils.encryption import EncryptionService
+
+def _user_with_services(count=5):
+    user = User(username="binh", email="binh@example.com")
+    user.set_password("Pass1234")
+    db.session.add(user)
+    db.session.commit()
+    for i in range(count):
+        PasswordService.add_service(user.id, {
+            'service_name': f'svc{i}', 'service_username': 'binh', 'service_password': f'secret{i}'
+        }, user.password_hash)
+    # Một dòng Fernet cũ với salt riêng
+    encryptor = EncryptionService(user.password_hash)
+    db.session.add(Service(user_id=user.id, service_name="old", service_username="binh",
+                           service_password_encrypted=encryptor.encrypt("legacy"),
+                           encryption_salt=encryptor.get_salt()))
+    db.session.commit()
+    return user
+
+def _passwords(user):
+    return [s["service_password"] for s in
+            PasswordService.get_user_services(user.id, include_passwords=True, master_password=user.password_hash)]
+
+def test_password_change_keeps_services_readable_until_rekeyed():
+    app = create_app('testing')
+    with app.app_context():
+        user = _user_with_services()
+        expected = _passwords(user)
+        user.set_password("NewPass5678")
+        db.session.commit()
+        assert user.rekey_pending
+        # Đọc qua secret cũ trong lúc chờ mã hóa lại
+        assert _passwords(user) == expected
+
+        result = RekeyService.rekey_user(user.id, batch_size=2)
+        assert (result["processed"], result["failed"], result["status"]) == (6, 0, "done")
+        assert not user.rekey_pending
+        assert _passwords(user) == expected
+
+def test_password_change_while_rekey_pending_completes_it_first():
+    app = create_app('testing')
+    with app.app_context():
+        user = _user_with_services(3)
+        expected = _passwords(user)
+        user.set_password("NewPass5678")
+        db.session.commit()
+        # Đổi mật khẩu lần nữa khi lần trước chưa mã hóa lại xong: không còn báo lỗi
+        user.set_password("Another999")
+        db.session.commit()
+        assert user.verify_password("Another999", rehash=False)
+        assert user.rekey_pending
+        assert _passwords(user) == expected
+        assert RekeyService.rekey_user(user.id)["status"] == "done"
+        assert _passwords(user) == expected
+
+def test_unreadable_rows_are_abandoned_after_max_attempts():
+    app = create_app('testing')
+    app.config['REKEY_MAX_ATTEMPTS'] = 2
+    with app.app_context():
+        user = _user_with_services(2)
+        # Dòng được mã hóa bằng một secret khác: không đọc được bằng secret cũ lẫn mới
+        stranger = EncryptionService("not-the-master-secret")
+        db.session.add(Service(user_id=user.id, service_name="lost", service_username="binh",
+                               service_password_encrypted=stranger.encrypt("x"),
+                               encryption_salt=stranger.get_salt()))
+        db.session.commit()
+        lost_id = Service.query.filter_by(service_name="lost").one().id
+        user.set_password("NewPass5678")
+        db.session.commit()
+
+        first = RekeyService.rekey_user(user.id)
+        assert (first["status"], first["failed"], first["failed_ids"]) == ("failed", 1, [lost_id])
+        assert user.rekey_pending and user.rekey_job.attempts == 1
+
+        second = RekeyService.rekey_user(user.id)
+        assert (second["status"], second["failed_ids"]) == ("abandoned", [lost_id])
+        assert not user.rekey_pending
+        assert user.previous_password_hash is None
+
+def test_abandon_flag_and_cli_output():
+    app = create_app('testing')
+    with app.app_context():
+        user = _user_with_services(1)
+        stranger = EncryptionService("not-the-master-secret")
+        db.session.add(Service(user_id=user.id, service_name="lost", service_username="binh",
+                               service_password_encrypted=stranger.encrypt("x"),
+                               encryption_salt=stranger.get_salt()))
+        user.set_password("NewPass5678")
+        db.session.commit()
+    result = app.test_cli_runner().invoke(args=['vault', 'rekey', '--abandon'])
+    assert result.exit_code == 0
+    assert "abandoned" in result.output and "unreadable services" in result.output
+
+def test_login_with_outdated_hash_rekeys_and_checks_services_cheaply():
+    from sqlalchemy import inspect
+    from app.services.auth_service import AuthService
+    from app.utils.password_utils import set_bcrypt_rounds
+    app = create_app('testing')
+    with app.test_request_context():
+        user = _user_with_services(2)
+        expected = _passwords(user)
+        db.session.expire_all()
+        # Hash hiện tại dùng cost 4, chính sách mới là 5
+        set_bcrypt_rounds(5)
+        try:
+            success, _ = AuthService.login_user("binh", "Pass1234")
+        finally:
+            set_bcrypt_rounds(4)
+        assert success
+        user = db.session.get(User, user.id)
+        # REKEY_MODE = 'inline' khi test: mã hóa lại ngay trong lần đăng nhập
+        assert not user.rekey_pending
+        assert user.rekey_job.status == "done"
+        assert app.extensions['rekey_scheduler'].stats()["scheduled"] == 1
+        # begin_rekey chỉ kiểm tra sự tồn tại, không nạp toàn bộ danh sách dịch vụ
+        assert 'services' not in inspect(user).dict
+        assert _passwords(user) == expected
+
+def test_dry_run_writes_nothing():
+    app = create_app('testing')
+    with app.app_context():
+        user = _user_with_services(3)
+        user.set_password("NewPass5678")
+        db.session.commit()
+        before = [s.password_record for s in Service.query.order_by(Service.id)]
+
+        progress = []
+        totals = RekeyService.rekey_all(dry_run=True, progress=lambda *args: progress.append(args))
+        assert totals["processed"] == 4 and totals["results"][0]["status"] == "dry-run"
+        assert progress[-1] == (user.id, 4, 4)
+        assert [s.password_record for s in Service.query.order_by(Service.id)] == before
+        assert user.rekey_pending
+
+def test_resume_after_interrupted_batch(monkeypatch):
+    app = create_app('testing')
+    with app.app_context():
+        user = _user_with_services(4)
+        user_id = user.id
+        user.set_password("NewPass5678")
+        db.session.commit()
+        expected_ids = [s.id for s in Service.query.order_by(Service.id)]
+
+        # Giả lập sự cố ở lô thứ hai
+        original = Service.reencrypt_password
+        calls = []
+        def flaky(self, *args):
+            calls.append(self.id)
+            if len(calls) == 3:
+                raise RuntimeError("crash")
+            return original(self, *args)
+        monkeypatch.setattr(Service, "reencrypt_password", flaky)
+        with pytest.raises(RuntimeError):
+            RekeyService.rekey_user(user_id, batch_size=2)
+        job = db.session.get(RekeyJob, user_id)
+        assert (job.status, job.last_service_id, job.processed) == ("running", expected_ids[1], 2)
+
+        monkeypatch.setattr(Service, "reencrypt_password", original)
+        result = RekeyService.rekey_user(user_id, batch_size=2)
+        assert (result["processed"], result["skipped"], result["status"]) == (5, 0, "done")
+        assert db.session.get(User, user_id).rekey_pending == False
+
+def test_row_edited_during_rekey_is_not_overwritten(monkeypatch):
+    from sqlalchemy import update
+    app = create_app('testing')
+    with app.app_context():
+        user = _user_with_services(2)
+        user_id = user.id
+        user.set_password("NewPass5678")
+        db.session.commit()
+        new_master, new_vault_key = user.password_hash, user.get_vault_key(user.password_hash)
+        ids = [s.id for s in Service.query.order_by(Service.id)]
+        # Một dòng vault và dòng Fernet cũ được sửa sau khi lô đã được đọc
+        edited = {ids[0]: "sửa lúc đang re-key", ids[-1]: "legacy đã sửa"}
+
+        original = Service.reencrypt_password
+        def edit_then_reencrypt(self, *args):
+            values = original(self, *args)
+            password = edited.pop(self.id, None)
+            if password is not None:
+                # Như một request khác ghi vào: đối tượng trong session vẫn giữ giá trị cũ
+                db.session.execute(update(Service).where(Service.id == self.id).values(
+                    **Service.encrypt_password_columns(password, new_master, new_vault_key)
+                ).execution_options(synchronize_session=False))
+            return values
+        monkeypatch.setattr(Service, "reencrypt_password", edit_then_reencrypt)
+
+        result = RekeyService.rekey_user(user_id, batch_size=10)
+        assert (result["processed"], result["skipped"], result["failed"]) == (1, 2, 0)
+        db.session.expire_all()
+        assert _passwords(db.session.get(User, user_id)) == ["sửa lúc đang re-key", "secret1", "legacy đã sửa"]
+
+if __name__ == "__main__":
+    test_password_change_keeps_services_readable_until_rekeyed()
+    test_password_change_while_rekey_pending_completes_it_first()
+    test_unreadable_rows_are_abandoned_after_max_attempts()
+    test_abandon_flag_and_cli_output()
+    test_login_with_outdated_hash_rekeys_and_checks_services_cheaply()
+    test_dry_run_writes_nothing()
+    print("✅ Tất cả kiểm tra mã hóa lại đều thành công")
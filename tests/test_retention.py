@@ -0,0 +1,121 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import base64
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import text, update
+from app import create_app, db
+from app.models.service import Service
+from app.models.archived_service import ArchivedService
+from app.services.password_service import PasswordService
+from app.services.counter_service import CounterService
+from app.services.retention_service import RetentionService
+from tests.helpers import create_user, add_service, add_services
+
+def _seed():
+    user = create_user("nam")
+    ids = add_services(user, 5)
+    PasswordService.delete_services(user.id, ids[:3])
+    # Hai dịch vụ đã bị xóa mềm từ 40 ngày trước, một dịch vụ mới bị xóa hôm nay
+    db.session.execute(update(Service).where(Service.id.in_(ids[:2])).values(
+        deleted_at=datetime.utcnow() - timedelta(days=40)))
+    db.session.commit()
+    return user, ids
+
+def test_purge_archives_to_table_in_chunks():
+    app = create_app('testing')
+    with app.app_context():
+        user, ids = _seed()
+        records = {s.id: bytes(s.password_record) for s in Service.query.options(Service.with_secrets())}
+
+        report = RetentionService.purge_deleted(days=30, chunk_size=1)
+        assert (report["purged"], report["archived"], report["chunks"]) == (2, 2, 2)
+        assert report["bytes"] > 0
+        assert "free_bytes" in report
+
+        assert sorted(s.id for s in Service.query) == ids[2:]
+        archived = ArchivedService.query.order_by(ArchivedService.id).all()
+        assert [a.service_id for a in archived] == ids[:2]
+        assert bytes(archived[0].password_record) == records[ids[0]]
+
+        db.session.refresh(user)
+        assert (user.total_services, user.active_services) == (3, 2)
+        assert CounterService.reconcile() == 0
+        # Chỉ mục FTS vẫn khớp với bảng services sau khi xóa
+        db.session.execute(text("INSERT INTO services_fts(services_fts) VALUES('integrity-check')"))
+        assert {row.id for row in PasswordService.search_services(user.id, 'svc')} == set(ids[3:])
+
+        assert RetentionService.purge_deleted(days=30)["purged"] == 0
+
+def test_purge_goes_by_deletion_time():
+    app = create_app('testing')
+    with app.app_context():
+        user, ids = _seed()
+        deleted = db.session.get(Service, ids[0])
+        assert deleted.deleted_at is not None
+        # Re-key hoặc nâng cấp định dạng cập nhật updated_at nhưng không đổi thời điểm xóa
+        db.session.execute(update(Service).where(Service.id.in_(ids[:2])).values(
+            service_password_encrypted=''))
+        assert db.session.get(Service, ids[0]).updated_at > deleted.deleted_at
+        assert RetentionService.purge_deleted(days=30, dry_run=True)["purged"] == 2
+
+        # Khôi phục xóa deleted_at, xóa lại thì tính từ thời điểm mới
+        PasswordService.restore_services(user.id, [ids[1]])
+        assert db.session.get(Service, ids[1]).deleted_at is None
+        assert PasswordService.delete_service(ids[1], user.id) == (True, None)
+        assert RetentionService.purge_deleted(days=30, dry_run=True)["purged"] == 1
+        assert RetentionService.purge_deleted(days=30)["purged"] == 1
+        assert ArchivedService.query.one().deleted_at is not None
+
+def test_reused_service_id_is_archived_again():
+    app = create_app('testing')
+    with app.app_context():
+        user, ids = _seed()
+        RetentionService.purge_deleted(days=30)
+        # SQLite cấp lại id lớn nhất đã bị xóa cho dịch vụ mới
+        for _ in range(2):
+            add_service(user, 'tạm')
+            service_id = db.session.execute(db.select(db.func.max(Service.id))).scalar()
+            PasswordService.delete_services(user.id, [service_id])
+            db.session.execute(update(Service).where(Service.id == service_id).values(
+                deleted_at=datetime.utcnow() - timedelta(days=40)))
+            db.session.commit()
+            assert RetentionService.purge_deleted(days=30)["purged"] == 1
+        archived = ArchivedService.query.filter_by(service_id=service_id).all()
+        assert len(archived) == 2
+
+def test_dry_run_and_file_archive(tmp_path):
+    app = create_app('testing')
+    with app.app_context():
+        user, ids = _seed()
+        dry = RetentionService.purge_deleted(days=30, dry_run=True)
+        assert dry["purged"] == 2 and dry["bytes"] > 0
+        assert Service.query.count() == 5
+
+        path = tmp_path / "archive.jsonl"
+        report = RetentionService.purge_deleted(days=30, archive='file', archive_path=str(path))
+        assert report["purged"] == 2
+        assert report["bytes"] == dry["bytes"]
+        lines = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+        assert [line["service_id"] for line in lines] == ids[:2]
+        assert base64.b64decode(lines[0]["password_record"])
+        assert ArchivedService.query.count() == 0
+
+def test_purge_cli_dry_run():
+    app = create_app('testing')
+    with app.app_context():
+        _seed()
+    result = app.test_cli_runner().invoke(args=['services', 'purge', '--days', '30', '--dry-run'])
+    assert result.exit_code == 0
+    assert "2 services" in result.output
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_purge_archives_to_table_in_chunks()
+    test_purge_goes_by_deletion_time()
+    test_reused_service_id_is_archived_again()
+    test_dry_run_and_file_archive(pathlib.Path(tempfile.mkdtemp()))
+    test_purge_cli_dry_run()
+    print("✅ Tất cả kiểm tra dọn dẹp dịch vụ đã xóa đều thành công")
@@ -0,0 +1,140 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import pytest
+from sqlalchemy import insert, text, update
+from app import create_app, db
+from app.models.service import Service
+from app.services.password_service import PasswordService
+from app.utils import search
+from app.utils.search import build_match_query, create_search_index, like_pattern, search_available
+from tests.helpers import create_user, add_service
+
+def _names(user_id, query):
+    return [row.service_name for row in PasswordService.search_services(user_id, query)]
+
+def test_match_query_escapes_operators():
+    assert build_match_query('git "hub" OR x*') == '"git"* "hub"* "OR"* "x"*'
+    assert build_match_query('  ') is None
+
+def test_prefix_ranked_and_scoped_search():
+    app = create_app('testing')
+    with app.app_context():
+        assert search_available()
+        user, other = create_user("giang"), create_user("hoa")
+        add_service(user, "GitHub", service_url="github.com")
+        add_service(user, "Ngân hàng", service_url="vcb.com.vn", notes="tiết kiệm")
+        add_service(user, "Blog", service_url="blog.example.com", notes="github pages")
+        add_service(other, "GitHub", service_url="github.com")
+        # Khớp ở tên xếp trước khớp ở ghi chú; không thấy dịch vụ của người khác
+        assert _names(user.id, "git") == ["GitHub", "Blog"]
+        # Không phân biệt dấu tiếng Việt
+        assert _names(user.id, "tiet kiem") == ["Ngân hàng"]
+        assert _names(user.id, "") == []
+
+def test_index_follows_updates_and_soft_deletes():
+    app = create_app('testing')
+    with app.app_context():
+        user = create_user("giang")
+        add_service(user, "Dropbox")
+        service = Service.query.one()
+        PasswordService.update_service(service.id, user.id, {
+            'service_name': 'Box', 'service_username': user.username
+        }, user.password_hash)
+        assert _names(user.id, "drop") == [] and _names(user.id, "box") == ["Box"]
+        # Câu lệnh UPDATE hàng loạt không đi qua ORM vẫn được trigger xử lý
+        db.session.execute(update(Service).values(service_name="Renamed"))
+        db.session.commit()
+        assert _names(user.id, "renamed") == ["Renamed"]
+        PasswordService.delete_service(service.id, user.id)
+        assert _names(user.id, "renamed") == []
+
+def test_search_is_fast_on_large_vault():
+    app = create_app('testing')
+    with app.app_context():
+        user = create_user("giang")
+        db.session.execute(insert(Service), [
+            {"user_id": user.id, "service_name": f"service {i}", "service_url": f"https://site{i}.example.com",
+             "service_username": f"login{i}", "service_password_encrypted": "", "encryption_salt": "",
+             "notes": "ghi chú", "is_active": True}
+            for i in range(20000)
+        ])
+        db.session.commit()
+        start = time.perf_counter()
+        results = _names(user.id, "site19999")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        assert results == ["service 19999"]
+        assert elapsed_ms < 50
+
+def test_other_users_rows_are_filtered_in_the_index():
+    app = create_app('testing')
+    with app.app_context():
+        user, other = create_user("giang"), create_user("hoa")
+        add_service(user, "site 1")
+        # Người dùng khác có rất nhiều dịch vụ khớp cùng từ khóa
+        db.session.execute(insert(Service), [
+            {"user_id": other.id, "service_name": f"site {i}", "service_username": "hoa",
+             "service_password_encrypted": "", "encryption_salt": "", "is_active": True}
+            for i in range(20000)
+        ])
+        db.session.commit()
+        start = time.perf_counter()
+        results = _names(user.id, "site")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        assert results == ["site 1"]
+        assert elapsed_ms < 100
+        # Chủ sở hữu được lọc ngay trong bảng FTS, không chỉ sau khi nối với services
+        owners = db.session.execute(text(
+            "SELECT count(*) FROM services_fts WHERE services_fts MATCH '\"site\"*' AND user_id = :id"
+        ), {"id": user.id}).scalar()
+        assert owners == 1
+
+def test_like_fallback_escapes_wildcards(monkeypatch):
+    app = create_app('testing')
+    with app.app_context():
+        user = create_user("giang")
+        add_service(user, "100% cotton")
+        add_service(user, "1000 cotton")
+        add_service(user, "a_b")
+        add_service(user, "axb")
+        monkeypatch.setattr(search, '_available', False)
+        assert like_pattern('5%_\\') == '%5\\%\\_\\\\%'
+        assert _names(user.id, "100%") == ["100% cotton"]
+        assert _names(user.id, "a_b") == ["a_b"]
+
+def test_index_without_owner_column_is_rebuilt():
+    app = create_app('testing')
+    with app.app_context():
+        user = create_user("giang")
+        add_service(user, "GitHub")
+        with db.engine.begin() as conn:
+            for trigger in ('services_fts_ai', 'services_fts_ad', 'services_fts_au'):
+                conn.exec_driver_sql(f"DROP TRIGGER {trigger}")
+            conn.exec_driver_sql("DROP TABLE services_fts")
+            conn.exec_driver_sql(
+                "CREATE VIRTUAL TABLE services_fts USING fts5(service_name, service_url, service_username, notes, "
+                "content='services', content_rowid='id')")
+        assert create_search_index()
+        with db.engine.connect() as conn:
+            columns = [row[1] for row in conn.exec_driver_sql("PRAGMA table_info(services_fts)")]
+        assert columns[-1] == 'user_id'
+        assert _names(user.id, "git") == ["GitHub"]
+
+def test_search_endpoint_json():
+    app = create_app('testing')
+    with app.app_context():
+        user = create_user("giang")
+        add_service(user, "GitHub")
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = user.id
+        data = client.get('/services/search?q=git&format=json').get_json()
+        assert [r["service_name"] for r in data["results"]] == ["GitHub"]
+        assert "GitHub" in client.get('/services/search?q=git').get_data(as_text=True)
+
+if __name__ == "__main__":
+    # Có test dùng fixture monkeypatch nên chạy qua pytest
+    if pytest.main([__file__, "-q"]) == 0:
+        print("✅ Tất cả kiểm tra tìm kiếm đều thành công")
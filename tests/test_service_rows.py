@@ -0,0 +1,83 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+from app import create_app, db
+from app.models.user import User
+from app.models.service import Service, ServiceRow
+from app.services.password_service import PasswordService
+
+def _user_with_services(count=4):
+    user = User(username="em", email="em@example.com")
+    user.set_password("Pass1234")
+    db.session.add(user)
+    db.session.commit()
+    user_id = user.id
+    for i in range(count):
+        PasswordService.add_service(user_id, {
+            'service_name': f'svc{i}', 'service_username': 'em', 'service_password': f'secret{i}', 'notes': f'note{i}'
+        }, user.password_hash)
+    db.session.expunge_all()
+    return db.session.get(User, user_id)
+
+def _count_selects(fn):
+    statements = []
+    def before(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", before)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before)
+    return result, statements
+
+def test_list_views_project_slim_rows():
+    app = create_app('testing')
+    with app.app_context():
+        user_id = _user_with_services().id
+        db.session.expunge_all()
+        page, statements = _count_selects(lambda: PasswordService.get_user_services_page(user_id))
+        assert all(isinstance(item, ServiceRow) for item in page["items"])
+        assert len(statements) == 1
+        assert "password_record" not in statements[0] and "service_password_encrypted" not in statements[0]
+        # Không có đối tượng ORM nào được đưa vào identity map
+        assert not any(isinstance(obj, Service) for obj in db.session.identity_map.values())
+
+        listing = PasswordService.get_user_services(user_id)
+        full = db.session.get(Service, listing[0]["id"]).to_dict()
+        # Ghi chú chỉ được đọc ở trang chi tiết
+        assert "notes" not in statements[0]
+        assert listing[0] == {key: value for key, value in full.items() if key != "notes"}
+
+def test_decrypting_listing_loads_secrets_in_one_query():
+    app = create_app('testing')
+    with app.app_context():
+        user = _user_with_services()
+        user_id, master = user.id, user.password_hash
+        db.session.expunge_all()
+        services, statements = _count_selects(
+            lambda: PasswordService.get_user_services(user_id, include_passwords=True, master_password=master))
+        assert [s["service_password"] for s in services] == [f"secret{i}" for i in range(4)]
+        assert "notes" not in statements[-1]
+        # Một truy vấn dịch vụ và một truy vấn người dùng, không có N+1
+        assert len(statements) == 2
+
+def test_listing_keys_match_with_and_without_passwords():
+    app = create_app('testing')
+    with app.app_context():
+        user = _user_with_services(count=1)
+        user_id, master = user.id, user.password_hash
+        plain = PasswordService.get_user_services(user_id)
+        decrypted = PasswordService.get_user_services(user_id, include_passwords=True, master_password=master)
+        # Cùng một bộ khóa, chỉ thêm mật khẩu khi giải mã
+        assert set(decrypted[0]) - {"service_password"} == set(plain[0])
+        assert {key: value for key, value in decrypted[0].items() if key != "service_password"} == plain[0]
+        assert set(user.to_dict(include_services=True)["services"][0]) == set(plain[0])
+
+if __name__ == "__main__":
+    test_list_views_project_slim_rows()
+    test_decrypting_listing_loads_secrets_in_one_query()
+    test_listing_keys_match_with_and_without_passwords()
+    print("✅ Tất cả kiểm tra bản ghi dịch vụ rút gọn đều thành công")
@@ -0,0 +1,119 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import subprocess
+import pytest
+from sqlalchemy import text
+from app import create_app, db
+from app.config.config import TestingConfig
+from app.utils import schema
+from app.utils.schema import schema_fingerprint, stored_schema_fingerprint
+
+def _file_app(monkeypatch, tmp_path):
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'app.db'}")
+    return create_app('testing')
+
+def test_second_start_skips_schema_sync(monkeypatch, tmp_path):
+    app = _file_app(monkeypatch, tmp_path)
+    assert app.extensions['schema_status'] == 'synced'
+    with app.app_context():
+        assert stored_schema_fingerprint() == schema_fingerprint()
+
+    # Lần khởi động thứ hai chỉ so sánh phiên bản schema, không gọi create_all
+    calls = []
+    monkeypatch.setattr(schema, 'sync_schema', lambda *args: calls.append(args))
+    app = _file_app(monkeypatch, tmp_path)
+    assert app.extensions['schema_status'] == 'current'
+    assert calls == []
+    with app.app_context():
+        from app.utils.search import search_available
+        assert search_available()
+
+def test_changed_or_missing_version_syncs(monkeypatch, tmp_path):
+    app = _file_app(monkeypatch, tmp_path)
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(text("UPDATE schema_version SET fingerprint = 'old'"))
+    assert _file_app(monkeypatch, tmp_path).extensions['schema_status'] == 'synced'
+
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(text("DROP TABLE schema_version"))
+    assert _file_app(monkeypatch, tmp_path).extensions['schema_status'] == 'synced'
+
+    monkeypatch.setattr(TestingConfig, 'SCHEMA_CHECK', 'always')
+    assert _file_app(monkeypatch, tmp_path).extensions['schema_status'] == 'synced'
+    monkeypatch.setattr(TestingConfig, 'SCHEMA_CHECK', 'invalid')
+    with pytest.raises(ValueError):
+        _file_app(monkeypatch, tmp_path)
+
+def test_schema_cli(monkeypatch, tmp_path):
+    app = _file_app(monkeypatch, tmp_path)
+    runner = app.test_cli_runner()
+    assert "up to date" in runner.invoke(args=['schema', 'status']).output
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(text("DELETE FROM schema_version"))
+    assert "out of date" in runner.invoke(args=['schema', 'status']).output
+    result = runner.invoke(args=['schema', 'upgrade'])
+    assert result.exit_code == 0
+    assert "up to date" in runner.invoke(args=['schema', 'status']).output
+
+def test_old_archive_table_is_rebuilt(monkeypatch, tmp_path):
+    app = _file_app(monkeypatch, tmp_path)
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(text("DROP TABLE archived_services"))
+            # Bố cục cũ: khóa chính là id gốc của dịch vụ
+            conn.execute(text(
+                "CREATE TABLE archived_services (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, "
+                "service_name VARCHAR(100) NOT NULL, service_url VARCHAR(255), "
+                "service_username VARCHAR(100) NOT NULL, service_password_encrypted TEXT NOT NULL, "
+                "encryption_salt VARCHAR(32) NOT NULL, wrapped_data_key BLOB, password_record BLOB, "
+                "notes TEXT, created_at DATETIME NOT NULL, updated_at DATETIME, archived_at DATETIME NOT NULL)"))
+            conn.execute(text("CREATE INDEX ix_archived_services_user_id ON archived_services (user_id)"))
+            conn.execute(text(
+                "INSERT INTO archived_services VALUES (7, 1, 'svc', NULL, 'an', 'x', 's', NULL, NULL, NULL, "
+                "'2024-01-01 00:00:00', NULL, '2024-02-01 00:00:00')"))
+        schema.sync_schema()
+        row = db.session.execute(text("SELECT id, service_id, service_name FROM archived_services")).one()
+        assert tuple(row) == (1, 7, 'svc')
+
+def test_deleted_at_is_backfilled(monkeypatch, tmp_path):
+    app = _file_app(monkeypatch, tmp_path)
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_services_deleted"))
+            conn.execute(text("ALTER TABLE services DROP COLUMN deleted_at"))
+            conn.execute(text("INSERT INTO users (id, username, email, password_hash, is_active, created_at) "
+                              "VALUES (1, 'an', 'an@example.com', 'x', 1, '2024-01-01 00:00:00')"))
+            conn.execute(text(
+                "INSERT INTO services (user_id, service_name, service_username, service_password_encrypted, "
+                "encryption_salt, is_active, created_at, updated_at) "
+                "VALUES (1, 'svc', 'an', 'x', 's', 0, '2024-01-01 00:00:00', '2024-03-01 00:00:00')"))
+        assert 'services.deleted_at' in schema.sync_schema()
+        # Dịch vụ đã xóa mềm trước khi có cột lấy thời điểm từ updated_at
+        assert db.session.execute(text("SELECT deleted_at FROM services")).scalar() == '2024-03-01 00:00:00'
+
+def test_startup_profile_in_stats(monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'SYSTEM_STATS_ENABLED', True)
+    monkeypatch.setattr(TestingConfig, 'SYSTEM_STATS_TOKEN', 'stats-token')
+    app = create_app('testing')
+    response = app.test_client().get('/system/stats', headers={'Authorization': 'Bearer stats-token'})
+    profile = response.get_json()['startup_profile']
+    assert {'config', 'database', 'models', 'blueprints', 'schema'} <= set(profile['phases'])
+    assert profile['total_ms'] >= sum(profile['phases'].values())
+
+def test_crypto_modules_are_imported_lazily():
+    # Chạy trong tiến trình mới vì các test khác đã nạp cryptography và bcrypt
+    code = ("import sys; from app import create_app; create_app('testing'); "
+            "print([m for m in sys.modules if m.startswith(('cryptography', 'bcrypt'))])")
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    output = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == '[]'
+
+if __name__ == "__main__":
+    # Các test dùng fixture monkeypatch/tmp_path nên chạy qua pytest
+    if pytest.main([__file__, "-q"]) == 0:
+        print("✅ Tất cả kiểm tra khởi động ứng dụng đều thành công")
@@ -0,0 +1,120 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+from app import create_app, db
+from app.models.user import User
+from app.services.auth_service import AuthService
+from app.utils.user_cache import user_cache
+
+def _setup(**config):
+    app = create_app('testing')
+    app.config.update(config)
+    user_cache.init_app(app)
+    with app.app_context():
+        user = User(username="giang", email="giang@example.com")
+        user.set_password("Pass1234")
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+    return app, user_id
+
+def _count_user_queries(app):
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+    return lambda: sum(1 for s in statements if 'FROM users' in s)
+
+def test_current_user_memoized_per_request():
+    app, user_id = _setup(USER_CACHE_ENABLED=True)
+    queries = _count_user_queries(app)
+    with app.test_request_context():
+        from flask import session
+        session['user_id'] = user_id
+        first = AuthService.get_current_user()
+        assert AuthService.get_current_user() is first
+        assert AuthService.get_current_user_record().username == "giang"
+        # Bản ghi gọn được tạo từ đối tượng đã tải, không truy vấn thêm
+        assert queries() == 1
+
+def test_record_cached_across_requests():
+    app, user_id = _setup(USER_CACHE_ENABLED=True)
+    queries = _count_user_queries(app)
+    for _ in range(3):
+        with app.test_request_context():
+            from flask import session
+            session['user_id'] = user_id
+            assert AuthService.get_current_user_record().id == user_id
+    assert queries() == 1
+    assert user_cache.stats()['hits'] == 2
+
+def test_record_invalidated_on_update_and_deactivation():
+    app, user_id = _setup(USER_CACHE_ENABLED=True)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    assert b'giang@example.com' in client.get('/dashboard').data
+
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        user.email = "giang.new@example.com"
+        db.session.commit()
+    assert b'giang.new@example.com' in client.get('/dashboard').data
+
+    with app.app_context():
+        db.session.get(User, user_id).is_active = False
+        db.session.commit()
+    # Tài khoản bị vô hiệu hóa không còn truy cập được
+    assert client.get('/dashboard').status_code == 302
+
+def test_dashboard_skips_users_table_when_cached():
+    app, user_id = _setup(USER_CACHE_ENABLED=True)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    client.get('/dashboard')
+    queries = _count_user_queries(app)
+    assert client.get('/dashboard').status_code == 200
+    assert queries() == 0
+
+def test_disabled_cache_and_expiry():
+    app, user_id = _setup()
+    # Mặc định tắt: bộ nhớ đệm theo tiến trình không thấy việc vô hiệu hóa ở worker khác
+    assert app.config['USER_CACHE_ENABLED'] is False and not user_cache.enabled
+    queries = _count_user_queries(app)
+    for _ in range(2):
+        with app.test_request_context():
+            from flask import session
+            session['user_id'] = user_id
+            AuthService.get_current_user_record()
+    assert queries() == 2
+
+    app.config.update(USER_CACHE_ENABLED=True, USER_CACHE_TTL=0)
+    user_cache.init_app(app)
+    user_cache.put(user_id, "record")
+    # TTL = 0: hết hạn ngay
+    assert user_cache.get(user_id) is None
+
+def test_deactivation_elsewhere_is_seen_without_cache():
+    from sqlalchemy import update
+    app, user_id = _setup()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    assert client.get('/dashboard').status_code == 200
+    # UPDATE không qua ORM, như khi một tiến trình khác vô hiệu hóa tài khoản
+    with app.app_context():
+        db.session.execute(update(User).where(User.id == user_id).values(is_active=False))
+        db.session.commit()
+    assert client.get('/dashboard').status_code == 302
+
+if __name__ == "__main__":
+    test_current_user_memoized_per_request()
+    test_record_cached_across_requests()
+    test_record_invalidated_on_update_and_deactivation()
+    test_dashboard_skips_users_table_when_cached()
+    test_disabled_cache_and_expiry()
+    test_deactivation_elsewhere_is_seen_without_cache()
+    print("✅ Tất cả kiểm tra bộ nhớ đệm người dùng đều thành công")
@@ -0,0 +1,68 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import inspect, text
+from app import create_app, db
+from app.models.user import User
+from app.models.service import Service
+from app.services.password_service import PasswordService
+from app.services.vault_service import VaultService
+from app.utils.encryption import EncryptionService
+from app.utils.schema import add_missing_columns
+
+def _user():
+    user = User(username="dung", email="dung@example.com")
+    user.set_password("Pass1234")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+def test_listing_vault_services_derives_key_once(monkeypatch):
+    app = create_app('testing')
+    with app.app_context():
+        user = _user()
+        for i in range(5):
+            PasswordService.add_service(user.id, {
+                'service_name': f'svc{i}', 'service_username': 'dung', 'service_password': f'secret{i}'
+            }, user.password_hash)
+
+        derivations = []
+        original = EncryptionService._derive_key
+        monkeypatch.setattr(EncryptionService, "_derive_key", lambda self: derivations.append(1) or original(self))
+
+        services = PasswordService.get_user_services(user.id, include_passwords=True, master_password=user.password_hash)
+        assert [s["service_password"] for s in services] == [f"secret{i}" for i in range(5)]
+        assert len(derivations) == 1
+
+def test_migrate_legacy_rows():
+    app = create_app('testing')
+    with app.app_context():
+        user = _user()
+        legacy = Service(user_id=user.id, service_name="old", service_username="dung")
+        legacy.set_service_password("legacy-secret", user.password_hash)
+        db.session.add(legacy)
+        db.session.commit()
+        assert legacy.wrapped_data_key is None
+
+        assert VaultService.migrate_user(user) == {"migrated": 1, "failed": 0}
+        assert legacy.wrapped_data_key is not None
+        assert legacy.encryption_salt == ""
+        assert legacy.get_service_password(user.password_hash) == "legacy-secret"
+
+def test_add_missing_columns_to_old_database():
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        with db.engine.begin() as conn:
+            conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(150), "
+                              "email VARCHAR(150), password_hash VARCHAR(255), is_active BOOLEAN, "
+                              "created_at DATETIME, updated_at DATETIME)"))
+        assert "users.vault_salt" in add_missing_columns()
+        columns = {c['name'] for c in inspect(db.engine).get_columns('users')}
+        assert "vault_salt" in columns
+
+if __name__ == "__main__":
+    test_migrate_legacy_rows()
+    test_add_missing_columns_to_old_database()
+    print("✅ Tất cả kiểm tra vault đều thành công")